@@ -0,0 +1,36 @@
+"""Run the micro-benchmarks: ``python -m benchmarks [--save NAME] [--compare NAME]``."""
+
+import argparse
+import sys
+from pathlib import Path
+
+from benchmarks.harness import load, measure, report, save
+from benchmarks.hot_paths import cases
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+def _result_path(name: str) -> Path:
+    path = Path(name)
+    return path if path.suffix == ".json" else RESULTS_DIR / f"{name}.json"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument("-k", "--filter", default="", help="only run cases whose name contains this string")
+    parser.add_argument("--save", metavar="NAME", help="save results to benchmarks/results/NAME.json (or a path)")
+    parser.add_argument("--compare", metavar="NAME", help="compare against saved results")
+    parser.add_argument("--threshold", type=float, default=0.1, help="relative slowdown reported as a regression")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per timing repeat")
+    args = parser.parse_args()
+
+    baseline = load(_result_path(args.compare)) if args.compare else None
+    results = [measure(case, min_time=args.min_time) for case in cases() if args.filter in case.name]
+    regressions = report(results, baseline, args.threshold)
+    if args.save:
+        save(results, _result_path(args.save))
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
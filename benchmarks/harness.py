@@ -0,0 +1,113 @@
+import json
+import platform
+import subprocess
+import sys
+import timeit
+import tracemalloc
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from datetime import UTC, datetime
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from typing import Any
+
+TRACKED_PACKAGES = ("fastapi", "pydantic", "pydantic-core", "starlette", "telethon")
+
+
+@dataclass(frozen=True)
+class Case:
+    """A benchmark body; ``ops`` is how many operations one call performs (e.g. messages per page)."""
+
+    name: str
+    func: Callable[[], object]
+    ops: int = 1
+
+
+@dataclass(frozen=True)
+class Result:
+    """Best-of timing per op, peak traced bytes per op, and blocks still allocated per op after one call."""
+
+    name: str
+    ops: int
+    ns_per_op: float
+    bytes_per_op: float
+    blocks_per_op: float
+
+
+def measure(case: Case, min_time: float = 0.2, repeat: int = 5) -> Result:
+    timer = timeit.Timer(case.func)
+    number, _ = timer.autorange()
+    number = max(number, int(number * min_time / 0.2))
+    best = min(timer.repeat(repeat=repeat, number=number)) / number
+
+    case.func()
+    tracemalloc.start()
+    try:
+        blocks_before = sys.getallocatedblocks()
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        case.func()
+        _, peak = tracemalloc.get_traced_memory()
+        blocks = sys.getallocatedblocks() - blocks_before
+    finally:
+        tracemalloc.stop()
+
+    return Result(
+        name=case.name,
+        ops=case.ops,
+        ns_per_op=best / case.ops * 1e9,
+        bytes_per_op=(peak - base) / case.ops,
+        blocks_per_op=max(blocks, 0) / case.ops,
+    )
+
+
+def environment() -> dict[str, Any]:
+    packages: dict[str, str | None] = {}
+    for name in TRACKED_PACKAGES:
+        try:
+            packages[name] = version(name)
+        except PackageNotFoundError:
+            packages[name] = None
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.now(UTC).isoformat(),
+        "commit": commit,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "packages": packages,
+    }
+
+
+def save(results: list[Result], path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {"environment": environment(), "results": {r.name: asdict(r) for r in results}}
+    path.write_text(json.dumps(payload, indent=2) + "\n")
+
+
+def load(path: Path) -> dict[str, Result]:
+    payload = json.loads(path.read_text())
+    return {name: Result(**data) for name, data in payload["results"].items()}
+
+
+def report(results: list[Result], baseline: dict[str, Result] | None = None, threshold: float = 0.1) -> int:
+    """Print a results table, optionally against a baseline. Returns the number of time regressions."""
+    header = f"{'case':<34} {'ns/op':>11} {'B/op':>10} {'blocks/op':>10}"
+    print(header + ("  vs baseline" if baseline else ""))
+    regressions = 0
+    for r in results:
+        line = f"{r.name:<34} {r.ns_per_op:>11.1f} {r.bytes_per_op:>10.1f} {r.blocks_per_op:>10.2f}"
+        old = baseline.get(r.name) if baseline else None
+        if old:
+            delta = r.ns_per_op / old.ns_per_op - 1
+            flag = ""
+            if delta > threshold:
+                flag = "  REGRESSION"
+                regressions += 1
+            line += f"  {delta:+7.1%} time {r.bytes_per_op - old.bytes_per_op:+9.1f} B{flag}"
+        print(line)
+    return regressions
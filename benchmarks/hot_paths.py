@@ -0,0 +1,107 @@
+"""Benchmark cases for the request hot paths, built from the test suite's mock builders."""
+
+import asyncio
+import os
+from collections.abc import Callable
+from typing import Any
+from unittest.mock import patch
+
+os.environ.setdefault("TELEGRAM_API_ID", "0")
+os.environ.setdefault("TELEGRAM_API_HASH", "benchmark")
+
+import structlog  # noqa: E402
+from pydantic_core import to_json  # noqa: E402
+from src.core.responses import FastJSONResponse  # noqa: E402
+from src.core.retry import with_retry  # noqa: E402
+from src.main import configure_logging  # noqa: E402
+from src.schemas.telegram import ChannelPostsResponse  # noqa: E402
+from src.services.telegram import (  # noqa: E402
+    _decode_cursor,
+    _encode_cursor,
+    _serialize_message,
+    compile_message_serializer,
+    decode_multi_cursor,
+    encode_multi_cursor,
+    get_channel_posts,
+)
+from tests.conftest import AsyncIter, make_mock_channel, make_mock_message  # noqa: E402
+
+from benchmarks.harness import Case  # noqa: E402
+
+PAGE_SIZE = 100
+DISPATCH_BATCH = 1000
+MULTI_TAGS = 10
+
+
+class _Client:
+    def __init__(self, entity: Any, messages: list[Any]) -> None:
+        self._entity = entity
+        self._messages = messages
+
+    async def get_entity(self, channel: object) -> Any:
+        return self._entity
+
+    def iter_messages(self, entity: Any, **kwargs: Any) -> AsyncIter:
+        return AsyncIter(self._messages)
+
+
+class _Pool:
+    def __init__(self, client: Any) -> None:
+        self._clients = [client]
+
+    async def get_next(self) -> Any:
+        return self._clients[0]
+
+
+def _quiet_logging() -> None:
+    configure_logging()
+    structlog.configure(logger_factory=structlog.PrintLoggerFactory(file=open(os.devnull, "w")))  # noqa: SIM115
+
+
+def _run_async(loop: asyncio.AbstractEventLoop, factory: Callable[[], Any]) -> Callable[[], object]:
+    return lambda: loop.run_until_complete(factory())
+
+
+def cases() -> list[Case]:
+    _quiet_logging()
+    loop = asyncio.new_event_loop()
+    raw = [make_mock_message(msg_id=i, text=f"post {i} " * 40) for i in range(PAGE_SIZE)]
+    messages = [_serialize_message(m) for m in raw]
+    projected = compile_message_serializer(frozenset({"id", "date", "text"}))
+    cursor = _encode_cursor(1735689600, 123456, 1234567890, -987654321)
+    multi: dict[str, str | None] = {f"#tag{i}": cursor for i in range(MULTI_TAGS)}
+    multi_cursor = encode_multi_cursor(multi)
+    assert multi_cursor is not None
+    client = _Client(make_mock_channel(), raw)
+    pool = _Pool(client)
+
+    async def noop(client: object) -> None:
+        return None
+
+    async def get_pool() -> _Pool:
+        return pool
+
+    async def dispatch() -> None:
+        with patch("src.core.retry.get_session_pool", new=get_pool):
+            for _ in range(DISPATCH_BATCH):
+                await with_retry(noop)
+
+    async def channel_posts() -> None:
+        await get_channel_posts(client, "testchannel", limit=PAGE_SIZE)
+
+    def validated_response() -> bytes:
+        response = ChannelPostsResponse.model_validate({"messages": messages, "count": len(messages)})
+        return to_json(response.model_dump(mode="json"))
+
+    return [
+        Case("serialize_message", lambda: [_serialize_message(m) for m in raw], PAGE_SIZE),
+        Case("serialize_message[id,date,text]", lambda: [projected(m) for m in raw], PAGE_SIZE),
+        Case("encode_cursor", lambda: _encode_cursor(1735689600, 123456, 1234567890, -987654321)),
+        Case("decode_cursor", lambda: _decode_cursor(cursor)),
+        Case(f"encode_multi_cursor[{MULTI_TAGS}]", lambda: encode_multi_cursor(multi)),
+        Case(f"decode_multi_cursor[{MULTI_TAGS}]", lambda: decode_multi_cursor(multi_cursor)),
+        Case("response_model_validated", validated_response, PAGE_SIZE),
+        Case("response_fast_json", lambda: FastJSONResponse({"messages": messages, "count": PAGE_SIZE}), PAGE_SIZE),
+        Case("with_retry_dispatch", _run_async(loop, dispatch), DISPATCH_BATCH),
+        Case("get_channel_posts", _run_async(loop, channel_posts), PAGE_SIZE),
+    ]
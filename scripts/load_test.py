@@ -0,0 +1,134 @@
+"""Drive the API with a weighted request mix and report throughput, latency and session use.
+
+By default the app runs in-process against the fake Telegram backend
+(TELEGRAM_BACKEND=fake, tuned with the FAKE_* settings), so nothing touches
+real accounts. Pass --url to load a running server instead; session
+utilization (RPC-seconds per wall-clock second, above 1.0 when a session
+serves concurrent calls) is only available in-process.
+
+    uv run python scripts/load_test.py --concurrency 64 --duration 30
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+from contextlib import AsyncExitStack
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("TELEGRAM_BACKEND", "fake")
+os.environ.setdefault("TELEGRAM_API_ID", "0")
+os.environ.setdefault("TELEGRAM_API_HASH", "fake")
+os.environ.setdefault("WEBHOOK_OUTBOX_DIR", "/tmp/load-test-webhooks")
+os.environ.setdefault("LOG_LEVEL", "warning")
+
+import httpx  # noqa: E402
+
+MIX: dict[str, tuple[int, str]] = {
+    "posts": (50, "/api/channels/{channel}/posts?limit=50"),
+    "info": (20, "/api/channels/{channel}/info"),
+    "comments": (10, "/api/channels/{channel}/posts/{post}/comments?limit=20"),
+    "channel_search": (10, "/api/channels/{channel}/search?q=news&limit=20"),
+    "tag_search": (5, "/api/search/posts?tag=%23{channel}&limit=20"),
+    "photos": (5, "/api/channels/{channel}/photos?limit=5"),
+}
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def worker(
+    client: httpx.AsyncClient,
+    deadline: float,
+    channels: list[str],
+    latencies: dict[str, list[float]],
+    statuses: Counter[int],
+) -> None:
+    names = list(MIX)
+    weights = [MIX[name][0] for name in names]
+    while time.perf_counter() < deadline:
+        name = random.choices(names, weights)[0]
+        path = MIX[name][1].format(channel=random.choice(channels), post=random.randint(1, 1000))
+        start = time.perf_counter()
+        try:
+            response = await client.get(path)
+            statuses[response.status_code] += 1
+        except httpx.HTTPError:
+            statuses[0] += 1
+        latencies[name].append(time.perf_counter() - start)
+
+
+async def run(args: argparse.Namespace) -> None:
+    channels = [f"channel{i}" for i in range(args.channels)]
+    latencies: dict[str, list[float]] = defaultdict(list)
+    statuses: Counter[int] = Counter()
+    sessions: list[object] = []
+
+    async with AsyncExitStack() as stack:
+        if args.url:
+            client = httpx.AsyncClient(base_url=args.url, timeout=60)
+        else:
+            from src.dependencies import get_session_pool
+            from src.main import app, lifespan
+
+            await stack.enter_async_context(lifespan(app))
+            sessions = (await get_session_pool()).clients
+            client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://load", timeout=60)
+        await stack.enter_async_context(client)
+
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(
+            *(worker(client, deadline, channels, latencies, statuses) for _ in range(args.concurrency))
+        )
+        elapsed = time.perf_counter() - started
+        report(latencies, statuses, elapsed, sessions)
+
+
+def report(latencies: dict[str, list[float]], statuses: Counter[int], elapsed: float, sessions: list[object]) -> None:
+    total = sum(statuses.values())
+    print(f"requests: {total} in {elapsed:.1f}s = {total / elapsed:.1f} req/s")
+    print(f"statuses: {dict(sorted(statuses.items()))}")
+    print(f"{'endpoint':<16} {'count':>7} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    everything = [v for values in latencies.values() for v in values]
+    for name, values in [*sorted(latencies.items()), ("all", everything)]:
+        print(
+            f"{name:<16} {len(values):>7} {percentile(values, 0.5) * 1e3:>9.1f} {percentile(values, 0.9) * 1e3:>9.1f}"
+            f" {percentile(values, 0.99) * 1e3:>9.1f} {max(values, default=0) * 1e3:>9.1f}"
+        )
+    from src.core.fake_telegram import FakeTelegramClient
+
+    clients = sorted((c for c in sessions if isinstance(c, FakeTelegramClient)), key=lambda c: c.name)
+    if not clients:
+        return
+    print(f"{'session':<10} {'calls':>7} {'errors':>7} {'util':>6} {'MB':>8} {'banned':>7}")
+    for c in clients:
+        s = c.stats
+        print(
+            f"{c.name:<10} {s.calls:>7} {s.errors:>7} {s.busy_seconds / elapsed:>6.2f}"
+            f" {s.bytes_downloaded / 1e6:>8.1f} {c.banned!s:>7}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="base URL of a running server (default: in-process app on the fake backend)")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--channels", type=int, default=50, help="number of distinct channels to spread load over")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    random.seed(args.seed)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+import asyncio
+import threading
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from src.config import settings
+from src.core.profiling import LoopLagMonitor, collapse, collect_stacks, dump_tasks
+from src.dependencies import get_loop_monitor, require_admin
+from src.schemas.admin import LoopLagResponse, TaskDumpResponse, TaskInfo
+
+router = APIRouter(prefix="/api/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+
+@router.get("/profile", response_class=PlainTextResponse)
+async def profile(
+    seconds: Annotated[float, Query(gt=0)] = 10.0,
+    interval_ms: Annotated[float, Query(ge=1, le=1000)] = 5.0,
+    all_threads: bool = False,
+) -> PlainTextResponse:
+    """Sample stacks for ``seconds`` and return them in collapsed (flamegraph) format.
+
+    Only the event loop thread is sampled unless ``all_threads`` is set.
+    """
+    if seconds > settings.profile_max_seconds:
+        raise HTTPException(status_code=422, detail=f"seconds must be <= {settings.profile_max_seconds}")
+    thread_ids = None if all_threads else [threading.get_ident()]
+    try:
+        counts = await asyncio.to_thread(collect_stacks, seconds, interval_ms / 1000, thread_ids)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e)) from None
+    return PlainTextResponse(collapse(counts))
+
+
+@router.get("/tasks", response_model=TaskDumpResponse)
+async def tasks() -> TaskDumpResponse:
+    infos = [TaskInfo(**task) for task in dump_tasks()]
+    return TaskDumpResponse(
+        tasks=infos, count=len(infos), in_telegram=sum(1 for t in infos if t.telegram_call is not None)
+    )
+
+
+@router.get("/loop", response_model=LoopLagResponse)
+async def loop_lag(
+    monitor: Annotated[LoopLagMonitor, Depends(get_loop_monitor)],
+) -> LoopLagResponse:
+    return LoopLagResponse(**monitor.stats())
@@ -1,19 +1,38 @@
+from collections.abc import AsyncIterator
+from typing import Annotated, Any
+
 import structlog
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 
+from src.config import settings
+from src.core.fanout import fan_out
+from src.core.hot_channels import HotChannels
+from src.core.message_search import search_channel
+from src.core.responses import FastJSONResponse, to_ndjson_line
 from src.core.retry import with_retry
+from src.dependencies import BatchPriority, ExportPriority, InteractivePriority, MessageFields, get_hot_channels
 from src.schemas.telegram import (
+    BatchChannelInfoResult,
+    BatchChannelPostsResult,
+    BatchChannelQuery,
+    BatchCommentsRequest,
+    BatchCommentsResponse,
+    BatchInfoRequest,
+    BatchPostsRequest,
     ChannelFullInfo,
     ChannelPhotosResponse,
     ChannelPostsResponse,
+    CommentTreesResponse,
     PostCommentsResponse,
 )
 from src.services.telegram import (
-    get_channel_info,
     get_channel_photos,
     get_channel_posts,
+    get_channels_info,
+    get_comment_trees,
     get_post_comments,
-    search_channel_messages,
+    get_posts_comments,
     search_comments,
 )
 
@@ -22,10 +41,10 @@ logger = structlog.get_logger()
 router = APIRouter(prefix="/api/channels", tags=["channels"])
 
 
-@router.get("/{channel}/info", response_model=ChannelFullInfo)
-async def channel_info(channel: str) -> ChannelFullInfo:
+@router.get("/{channel}/info", response_model=ChannelFullInfo, dependencies=[InteractivePriority])
+async def channel_info(hot: Annotated[HotChannels, Depends(get_hot_channels)], channel: str) -> ChannelFullInfo:
     try:
-        info = await with_retry(get_channel_info, channel)
+        info = await hot.info(channel)
         return ChannelFullInfo(**info)
     except HTTPException:
         raise
@@ -36,15 +55,20 @@ async def channel_info(channel: str) -> ChannelFullInfo:
         raise HTTPException(status_code=500, detail=str(e)) from e
 
 
-@router.get("/{channel}/posts", response_model=ChannelPostsResponse)
+@router.get("/{channel}/posts", response_model=ChannelPostsResponse, dependencies=[InteractivePriority])
 async def channel_posts(
+    hot: Annotated[HotChannels, Depends(get_hot_channels)],
     channel: str,
+    fields: MessageFields,
     offset_id: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
-) -> ChannelPostsResponse:
+) -> Response:
     try:
-        messages = await with_retry(get_channel_posts, channel, offset_id=offset_id, limit=limit)
-        return ChannelPostsResponse(messages=messages, count=len(messages))
+        if offset_id == 0:
+            messages = await hot.posts(channel, limit, fields)
+        else:
+            messages = await with_retry(get_channel_posts, channel, offset_id=offset_id, limit=limit, fields=fields)
+        return FastJSONResponse({"messages": messages, "count": len(messages)})
     except HTTPException:
         raise
     except ValueError as e:
@@ -54,16 +78,76 @@ async def channel_posts(
         raise HTTPException(status_code=500, detail=str(e)) from e
 
 
-@router.get("/{channel}/posts/{post_id}/comments", response_model=PostCommentsResponse)
+@router.post("/batch/posts", response_class=StreamingResponse, dependencies=[BatchPriority])
+async def batch_channel_posts(body: BatchPostsRequest, fields: MessageFields) -> StreamingResponse:
+    async def fetch(query: BatchChannelQuery) -> list[dict[str, Any]]:
+        return await with_retry(  # type: ignore[no-any-return]
+            get_channel_posts,
+            query.channel,
+            offset_id=query.offset_id,
+            min_id=query.min_id,
+            limit=query.limit,
+            fields=fields,
+        )
+
+    async def stream() -> AsyncIterator[bytes]:
+        async for query, messages, error in fan_out(body.channels, fetch, settings.batch_concurrency):
+            if error is not None:
+                line = BatchChannelPostsResult(channel=query.channel, status_code=error.status_code, error=error.detail)
+                yield to_ndjson_line(line.model_dump())
+                continue
+            messages = messages or []
+            yield to_ndjson_line(
+                {
+                    "channel": query.channel,
+                    "messages": messages,
+                    "count": len(messages),
+                    "status_code": 200,
+                    "error": None,
+                }
+            )
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+@router.post("/batch/info", response_class=StreamingResponse, dependencies=[BatchPriority])
+async def batch_channel_info(body: BatchInfoRequest) -> StreamingResponse:
+    size = settings.channel_info_chunk_size
+    chunks = [body.channels[i : i + size] for i in range(0, len(body.channels), size)]
+
+    async def fetch(chunk: list[str]) -> list[dict[str, Any]]:
+        return await with_retry(  # type: ignore[no-any-return]
+            get_channels_info, chunk, full=body.full, concurrency=settings.comments_concurrency
+        )
+
+    async def stream() -> AsyncIterator[bytes]:
+        async for chunk, results, error in fan_out(chunks, fetch, settings.batch_concurrency):
+            if error is not None:
+                for channel in chunk:
+                    line = BatchChannelInfoResult(channel=channel, status_code=error.status_code, error=error.detail)
+                    yield to_ndjson_line(line.model_dump())
+                continue
+            for result in results or []:
+                yield to_ndjson_line(result)
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+@router.get(
+    "/{channel}/posts/{post_id}/comments", response_model=PostCommentsResponse, dependencies=[InteractivePriority]
+)
 async def post_comments(
     channel: str,
     post_id: int,
+    fields: MessageFields,
     offset_id: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
-) -> PostCommentsResponse:
+) -> Response:
     try:
-        messages = await with_retry(get_post_comments, channel, post_id, offset_id=offset_id, limit=limit)
-        return PostCommentsResponse(messages=messages, count=len(messages))
+        messages = await with_retry(
+            get_post_comments, channel, post_id, offset_id=offset_id, limit=limit, fields=fields
+        )
+        return FastJSONResponse({"messages": messages, "count": len(messages)})
     except HTTPException:
         raise
     except ValueError as e:
@@ -73,15 +157,65 @@ async def post_comments(
         raise HTTPException(status_code=500, detail=str(e)) from e
 
 
-@router.get("/{channel}/photos", response_model=ChannelPhotosResponse)
+@router.post("/{channel}/comments/batch", response_model=BatchCommentsResponse, dependencies=[BatchPriority])
+async def batch_post_comments(channel: str, body: BatchCommentsRequest, fields: MessageFields) -> Response:
+    try:
+        comments = await with_retry(
+            get_posts_comments,
+            channel,
+            body.post_ids,
+            limit=body.limit,
+            concurrency=settings.comments_concurrency,
+            fields=fields,
+        )
+        return FastJSONResponse({"comments": comments, "count": sum(len(c) for c in comments.values())})
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e)) from None
+    except Exception as e:
+        logger.error("batch_post_comments_error", channel=channel, error=str(e))
+        raise HTTPException(status_code=500, detail=str(e)) from e
+
+
+@router.get("/{channel}/comments/tree", response_model=CommentTreesResponse, dependencies=[BatchPriority])
+async def comment_trees(
+    channel: str,
+    fields: MessageFields,
+    offset_id: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=50),
+    max_comments: int = Query(100, ge=1, le=1000),
+) -> Response:
+    try:
+        posts = await with_retry(
+            get_comment_trees,
+            channel,
+            offset_id=offset_id,
+            limit=limit,
+            max_comments=max_comments,
+            concurrency=settings.comments_concurrency,
+            fields=fields,
+        )
+        return FastJSONResponse({"posts": posts, "count": len(posts)})
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e)) from None
+    except Exception as e:
+        logger.error("comment_trees_error", channel=channel, error=str(e))
+        raise HTTPException(status_code=500, detail=str(e)) from e
+
+
+@router.get("/{channel}/photos", response_model=ChannelPhotosResponse, dependencies=[ExportPriority])
 async def channel_photos(
     channel: str,
+    fields: MessageFields,
     offset_id: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=50),
-) -> ChannelPhotosResponse:
+) -> Response:
     try:
-        messages = await with_retry(get_channel_photos, channel, offset_id=offset_id, limit=limit)
-        return ChannelPhotosResponse(messages=messages, count=len(messages))
+        messages = await with_retry(get_channel_photos, channel, offset_id=offset_id, limit=limit, fields=fields)
+        return FastJSONResponse({"messages": messages, "count": len(messages)})
     except HTTPException:
         raise
     except ValueError as e:
@@ -91,16 +225,17 @@ async def channel_photos(
         raise HTTPException(status_code=500, detail=str(e)) from e
 
 
-@router.get("/{channel}/search", response_model=ChannelPostsResponse)
+@router.get("/{channel}/search", response_model=ChannelPostsResponse, dependencies=[InteractivePriority])
 async def channel_search(
     channel: str,
+    fields: MessageFields,
     q: str = Query(..., min_length=1),
     offset_id: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
-) -> ChannelPostsResponse:
+) -> Response:
     try:
-        messages = await with_retry(search_channel_messages, channel, q, offset_id=offset_id, limit=limit)
-        return ChannelPostsResponse(messages=messages, count=len(messages))
+        messages = await search_channel(channel, q, offset_id=offset_id, limit=limit, fields=fields)
+        return FastJSONResponse({"messages": messages, "count": len(messages)})
     except HTTPException:
         raise
     except ValueError as e:
@@ -110,16 +245,17 @@ async def channel_search(
         raise HTTPException(status_code=500, detail=str(e)) from e
 
 
-@router.get("/{channel}/comments/search", response_model=ChannelPostsResponse)
+@router.get("/{channel}/comments/search", response_model=ChannelPostsResponse, dependencies=[InteractivePriority])
 async def channel_comments_search(
     channel: str,
+    fields: MessageFields,
     q: str = Query(..., min_length=1),
     offset_id: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
-) -> ChannelPostsResponse:
+) -> Response:
     try:
-        messages = await with_retry(search_comments, channel, q, offset_id=offset_id, limit=limit)
-        return ChannelPostsResponse(messages=messages, count=len(messages))
+        messages = await with_retry(search_comments, channel, q, offset_id=offset_id, limit=limit, fields=fields)
+        return FastJSONResponse({"messages": messages, "count": len(messages)})
     except HTTPException:
         raise
     except ValueError as e:
@@ -1,24 +1,32 @@
+from typing import Annotated
+
 import structlog
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 
+from src.core.message_search import search_across_channels
+from src.core.responses import FastJSONResponse
 from src.core.retry import with_retry
-from src.schemas.telegram import SearchChannelsResponse, SearchPostsResponse
-from src.services.telegram import search_channels, search_posts
+from src.core.search_prefetch import SearchPrefetcher, search_many
+from src.dependencies import BatchPriority, InteractivePriority, MessageFields, get_search_prefetcher
+from src.schemas.telegram import MultiSearchPostsResponse, SearchChannelsResponse, SearchPostsResponse
+from src.services.telegram import search_channels
 
 logger = structlog.get_logger()
 
 router = APIRouter(prefix="/api/search", tags=["search"])
 
 
-@router.get("/posts", response_model=SearchPostsResponse)
+@router.get("/posts", response_model=SearchPostsResponse, dependencies=[InteractivePriority])
 async def search_posts_endpoint(
+    prefetcher: Annotated[SearchPrefetcher, Depends(get_search_prefetcher)],
+    fields: MessageFields,
     tag: str = Query(..., min_length=1),
     cursor: str | None = Query(None),
     limit: int = Query(100, ge=1, le=100),
-) -> SearchPostsResponse:
+) -> Response:
     try:
-        messages, next_cursor = await with_retry(search_posts, tag, cursor=cursor, limit=limit)
-        return SearchPostsResponse(messages=messages, next_cursor=next_cursor, count=len(messages))
+        messages, next_cursor = await prefetcher.fetch(tag, cursor, limit, fields)
+        return FastJSONResponse({"messages": messages, "next_cursor": next_cursor, "count": len(messages)})
     except HTTPException:
         raise
     except Exception as e:
@@ -26,7 +34,51 @@ async def search_posts_endpoint(
         raise HTTPException(status_code=500, detail=str(e)) from e
 
 
-@router.get("/channels", response_model=SearchChannelsResponse)
+@router.get("/posts/multi", response_model=MultiSearchPostsResponse, dependencies=[BatchPriority])
+async def search_posts_multi_endpoint(
+    prefetcher: Annotated[SearchPrefetcher, Depends(get_search_prefetcher)],
+    fields: MessageFields,
+    tags: Annotated[list[str], Query(min_length=1, max_length=50)],
+    cursor: str | None = Query(None),
+    limit: int = Query(100, ge=1, le=100),
+) -> Response:
+    try:
+        messages, next_cursor, errors = await search_many(prefetcher, tags, cursor, limit, fields)
+        return FastJSONResponse(
+            {"messages": messages, "next_cursor": next_cursor, "count": len(messages), "errors": errors}
+        )
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from None
+    except Exception as e:
+        logger.error("search_posts_multi_error", tags=tags, error=str(e))
+        raise HTTPException(status_code=500, detail=str(e)) from e
+
+
+@router.get("/messages", response_model=MultiSearchPostsResponse, dependencies=[BatchPriority])
+async def search_messages_endpoint(
+    fields: MessageFields,
+    channels: Annotated[list[str], Query(min_length=1, max_length=50)],
+    q: str = Query(..., min_length=1),
+    cursor: str | None = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+) -> Response:
+    try:
+        messages, next_cursor, errors = await search_across_channels(channels, q, cursor, limit, fields)
+        return FastJSONResponse(
+            {"messages": messages, "next_cursor": next_cursor, "count": len(messages), "errors": errors}
+        )
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from None
+    except Exception as e:
+        logger.error("search_messages_error", channels=channels, query=q, error=str(e))
+        raise HTTPException(status_code=500, detail=str(e)) from e
+
+
+@router.get("/channels", response_model=SearchChannelsResponse, dependencies=[InteractivePriority])
 async def search_channels_endpoint(
     q: str = Query(..., min_length=1),
     limit: int = Query(20, ge=1, le=100),
@@ -0,0 +1,74 @@
+import asyncio
+from collections.abc import AsyncIterator
+from typing import Annotated
+
+import structlog
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+from pydantic_core import to_json
+
+from src.config import settings
+from src.core.subscriptions import Subscription, SubscriptionHub
+from src.dependencies import get_subscription_hub
+
+logger = structlog.get_logger()
+
+router = APIRouter(prefix="/api/stream", tags=["stream"])
+
+
+async def _subscribe(hub: SubscriptionHub, channels: list[str]) -> Subscription:
+    try:
+        return await hub.subscribe(channels)
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e)) from None
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e)) from None
+
+
+@router.get("/channels", response_class=StreamingResponse)
+async def stream_channels_sse(
+    hub: Annotated[SubscriptionHub, Depends(get_subscription_hub)],
+    channels: Annotated[list[str], Query(min_length=1, max_length=100)],
+) -> StreamingResponse:
+    subscription = await _subscribe(hub, channels)
+
+    async def events() -> AsyncIterator[str]:
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.get(), timeout=settings.stream_heartbeat_interval)
+                except TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {event['event']}\ndata: {to_json(event).decode()}\n\n"
+        finally:
+            await hub.unsubscribe(subscription)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@router.websocket("/ws")
+async def stream_channels_ws(
+    websocket: WebSocket,
+    hub: Annotated[SubscriptionHub, Depends(get_subscription_hub)],
+    channels: Annotated[list[str], Query(min_length=1, max_length=100)],
+) -> None:
+    try:
+        subscription = await _subscribe(hub, channels)
+    except HTTPException as e:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=e.detail)
+        return
+    await websocket.accept()
+    try:
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.get(), timeout=settings.stream_heartbeat_interval)
+            except TimeoutError:
+                event = {"event": "ping"}
+            await websocket.send_bytes(to_json(event))
+    except WebSocketDisconnect:
+        logger.info("stream_ws_disconnected", dropped=subscription.dropped)
+    finally:
+        await hub.unsubscribe(subscription)
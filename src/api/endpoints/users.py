@@ -1,7 +1,9 @@
 import structlog
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Response
 
+from src.core.responses import FastJSONResponse
 from src.core.retry import with_retry
+from src.dependencies import ExportPriority
 from src.schemas.telegram import UserProfilePhotosResponse
 from src.services.telegram import get_user_profile_photos
 
@@ -10,14 +12,14 @@ logger = structlog.get_logger()
 router = APIRouter(prefix="/api/users", tags=["users"])
 
 
-@router.get("/{user}/photos", response_model=UserProfilePhotosResponse)
+@router.get("/{user}/photos", response_model=UserProfilePhotosResponse, dependencies=[ExportPriority])
 async def user_photos(
     user: str,
     limit: int = Query(10, ge=1, le=50),
-) -> UserProfilePhotosResponse:
+) -> Response:
     try:
         photos = await with_retry(get_user_profile_photos, user, limit=limit)
-        return UserProfilePhotosResponse(user_id=user, photos=photos, count=len(photos))
+        return FastJSONResponse({"user_id": user, "photos": photos, "count": len(photos)})
     except HTTPException:
         raise
     except ValueError as e:
@@ -0,0 +1,68 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Response
+
+from src.core.webhooks import Webhook, WebhookDispatcher, check_target
+from src.dependencies import get_webhook_dispatcher, require_admin
+from src.schemas.webhooks import WebhookCreateRequest, WebhookInfo, WebhookListResponse
+
+router = APIRouter(prefix="/api/webhooks", tags=["webhooks"], dependencies=[Depends(require_admin)])
+
+
+def _info(webhook: Webhook) -> WebhookInfo:
+    return WebhookInfo(
+        id=webhook.id,
+        url=webhook.url,
+        channels=webhook.channels,
+        pending_batches=len(webhook.pending_batches()),
+        active=webhook.subscription is not None,
+    )
+
+
+@router.post("", response_model=WebhookInfo, status_code=201)
+async def create_webhook(
+    body: WebhookCreateRequest,
+    dispatcher: Annotated[WebhookDispatcher, Depends(get_webhook_dispatcher)],
+) -> WebhookInfo:
+    try:
+        await check_target(str(body.url))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from None
+    try:
+        webhook = await dispatcher.create(str(body.url), body.channels)
+        return _info(webhook)
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e)) from None
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e)) from None
+
+
+@router.get("", response_model=WebhookListResponse)
+async def list_webhooks(
+    dispatcher: Annotated[WebhookDispatcher, Depends(get_webhook_dispatcher)],
+) -> WebhookListResponse:
+    webhooks = [_info(webhook) for webhook in dispatcher.webhooks]
+    return WebhookListResponse(webhooks=webhooks, count=len(webhooks))
+
+
+@router.get("/{webhook_id}", response_model=WebhookInfo)
+async def get_webhook(
+    webhook_id: str,
+    dispatcher: Annotated[WebhookDispatcher, Depends(get_webhook_dispatcher)],
+) -> WebhookInfo:
+    webhook = dispatcher.get(webhook_id)
+    if webhook is None:
+        raise HTTPException(status_code=404, detail=f"Webhook {webhook_id} not found")
+    return _info(webhook)
+
+
+@router.delete("/{webhook_id}", status_code=204)
+async def delete_webhook(
+    webhook_id: str,
+    dispatcher: Annotated[WebhookDispatcher, Depends(get_webhook_dispatcher)],
+) -> Response:
+    if not await dispatcher.delete(webhook_id):
+        raise HTTPException(status_code=404, detail=f"Webhook {webhook_id} not found")
+    return Response(status_code=204)
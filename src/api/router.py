@@ -1,9 +1,12 @@
 from fastapi import APIRouter
 
-from src.api.endpoints import channels, health, search, users
+from src.api.endpoints import admin, channels, health, search, stream, users, webhooks
 
 router = APIRouter()
 router.include_router(health.router, tags=["health"])
 router.include_router(channels.router)
 router.include_router(search.router)
+router.include_router(stream.router)
 router.include_router(users.router)
+router.include_router(webhooks.router)
+router.include_router(admin.router)
@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -9,12 +11,96 @@ class Settings(BaseSettings):
     host: str = "0.0.0.0"
     port: int = 8001
     log_level: str = "info"
+    log_mode: Literal["sync", "queued"] = "sync"
+    log_queue_size: int = 10_000
+    log_sample_rates: dict[str, float] = {}
     cors_origins: list[str] = ["*"]
     metrics_enabled: bool = True
+    otel_enabled: bool = False
+    otel_endpoint: str = "http://localhost:4318/v1/traces"
+    admin_token: str | None = None
+    profile_max_seconds: float = 60.0
+    loop_lag_interval: float = 0.5
 
     telegram_api_id: int
     telegram_api_hash: str
     sessions_dir: str = "/app/sessions"
+    workers: int = 1
+    worker_dir: str = "/tmp/telegram-scraper-workers"
+    replicas: int = 1
+    state_backend: Literal["memory", "redis"] = "memory"
+    state_url: str = "redis://localhost:6379/0"
+    state_prefix: str = "tgscraper:"
+    state_sync_interval: float = 1.0
+    session_lease_ttl: float = 30.0
+    entity_cache_ttl: float = 86400.0
+    discussion_cache_ttl: float = 3600.0
+    telegram_backend: Literal["telethon", "fake"] = "telethon"
+    session_storage: Literal["memory", "sqlite"] = "memory"
+    session_flush_interval: float = 30.0
+
+    admission_enabled: bool = True
+    admission_slots_per_session: int = 4
+    admission_queue_limits: dict[str, int] = {"interactive": 200, "batch": 1000, "export": 100}
+    admission_max_wait: dict[str, float] = {"interactive": 5.0, "batch": 30.0, "export": 60.0}
+    request_timeouts: dict[str, float] = {"interactive": 30.0, "batch": 120.0, "export": 300.0}
+    cancel_on_disconnect: bool = True
+
+    batch_concurrency: int = 8
+    channel_info_chunk_size: int = 100
+    comments_concurrency: int = 4
+
+    search_prefetch_pages: int = 2
+    search_prefetch_ttl: float = 60.0
+    search_prefetch_max_bytes: int = 32 * 1024 * 1024
+    search_prefetch_concurrency: int = 4
+
+    message_store_path: str = "/app/store/messages.db"
+    message_store_ttl: float = 86400.0
+    message_store_max_rows: int = 1_000_000
+    message_index_enabled: bool = True
+    message_index_tokenizer: str = "unicode61 remove_diacritics 2"
+    message_index_max_lag: float = 300.0
+
+    hot_channels: list[str] = []
+    hot_channels_learned: int = 20
+    hot_channels_min_hits: float = 5.0
+    hot_channels_halflife: float = 300.0
+    hot_cache_ttl: float = 300.0
+    hot_cache_refresh: float = 60.0
+    hot_cache_page_size: int = 100
+    hot_cache_max_bytes: int = 16 * 1024 * 1024
+    hot_warm_interval: float = 5.0
+    hot_warm_idle_fraction: float = 0.5
+
+    stream_queue_size: int = 1000
+    stream_heartbeat_interval: float = 15.0
+
+    webhook_outbox_dir: str = "/app/webhooks"
+    webhook_allowed_hosts: list[str] = []
+    webhook_batch_size: int = 100
+    webhook_batch_window: float = 2.0
+    webhook_max_attempts: int = 10
+    webhook_backoff_base: float = 1.0
+    webhook_backoff_max: float = 300.0
+    webhook_timeout: float = 10.0
+
+    compression_enabled: bool = True
+    compression_minimum_size: int = 1024
+    compression_thread_threshold: int = 256 * 1024
+
+    fake_sessions: int = 4
+    fake_latency_ms: float = 50.0
+    fake_latency_sigma: float = 0.5
+    fake_posts_per_channel: int = 10_000
+    fake_comments_per_post: int = 20
+    fake_media_ratio: float = 0.3
+    fake_media_bytes: int = 200_000
+    fake_bandwidth_mbps: float = 100.0
+    fake_flood_wait_rate: float = 0.0
+    fake_flood_wait_seconds: int = 5
+    fake_ban_rate: float = 0.0
+    fake_seed: int | None = None
 
 
 settings = Settings()
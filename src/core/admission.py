@@ -0,0 +1,186 @@
+"""Admission control between the endpoints and the session pool.
+
+Every :func:`~src.core.retry.with_retry` call takes a slot from the
+:class:`AdmissionController` first. There are ``slots_per_session`` slots per
+pooled session, counted at acquire time so capacity shrinks as sessions are
+removed from the pool; when they are all taken, callers wait in one bounded FIFO queue
+per :class:`Priority`. A freed slot always goes to the highest-priority waiter,
+so a flood of batch or export work cannot starve interactive requests.
+
+Instead of letting queues grow until clients time out, a caller is shed with
+``503`` and ``Retry-After`` as soon as its queue is full or the predicted wait
+(the work queued ahead of it divided by the capacity, times a moving average of
+slot hold time) exceeds its class limit. A caller whose prediction was too
+optimistic is shed once it has waited for the full limit.
+
+The priority of the current request lives in a context variable set by the
+``request_class`` route dependency or by :func:`use_priority` for
+background work.
+"""
+
+import asyncio
+import contextlib
+import math
+import time
+from collections import deque
+from collections.abc import Callable, Iterator, Mapping
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+
+import structlog
+from fastapi import HTTPException
+
+from src.core.metrics import ADMISSION_ACTIVE, ADMISSION_QUEUE_DEPTH, ADMISSION_SHED, ADMISSION_WAIT
+
+logger = structlog.get_logger()
+
+SERVICE_TIME_ALPHA = 0.1
+INITIAL_SERVICE_TIME = 0.25
+
+
+class Priority(IntEnum):
+    """Lower values are served first."""
+
+    INTERACTIVE = 0  # single lookups a user is waiting on
+    BATCH = 1  # fan-out endpoints that make many calls per request
+    EXPORT = 2  # bulk, latency-insensitive work: media downloads and speculative prefetch
+
+    @property
+    def label(self) -> str:
+        return self.name.lower()
+
+
+_priority: ContextVar[Priority] = ContextVar("admission_priority", default=Priority.INTERACTIVE)
+
+
+def current_priority() -> Priority:
+    return _priority.get()
+
+
+def set_priority(priority: Priority) -> None:
+    _priority.set(priority)
+
+
+@contextmanager
+def use_priority(priority: Priority) -> Iterator[None]:
+    """Run ``with_retry`` calls in this block under ``priority``."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        capacity: int | Callable[[], int],
+        queue_limits: Mapping[str, int],
+        max_wait: Mapping[str, float],
+    ) -> None:
+        self._capacity = capacity if callable(capacity) else lambda: capacity
+        self._queue_limits = {p: queue_limits.get(p.label, 0) for p in Priority}
+        self._max_wait = {p: max_wait.get(p.label, 0.0) for p in Priority}
+        self._queues: dict[Priority, deque[asyncio.Future[None]]] = {p: deque() for p in Priority}
+        self._active = 0
+        self._service_time = INITIAL_SERVICE_TIME
+
+    @property
+    def capacity(self) -> int:
+        return max(self._capacity(), 1)
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def queued(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    def depth(self, priority: Priority) -> int:
+        return len(self._queues[priority])
+
+    def predicted_wait(self, priority: Priority) -> float:
+        """Seconds a new ``priority`` caller would wait for a slot, from the work queued ahead of it."""
+        ahead = sum(len(self._queues[p]) for p in Priority if p <= priority)
+        if ahead == 0 and self._active < self.capacity:
+            return 0.0
+        return (ahead + 1) / self.capacity * self._service_time
+
+    async def acquire(self, priority: Priority) -> None:
+        """Wait for a slot; raises a 503 ``HTTPException`` when the call is shed. Pair with :meth:`release`."""
+        if self._active < self.capacity and not any(self._queues.values()):
+            self._active += 1
+            ADMISSION_ACTIVE.set(self._active)
+            ADMISSION_WAIT.labels(priority.label).observe(0.0)
+            return
+        wait = self.predicted_wait(priority)
+        queue = self._queues[priority]
+        if len(queue) >= self._queue_limits[priority]:
+            raise self._shed(priority, "queue_full", wait)
+        if wait > self._max_wait[priority]:
+            raise self._shed(priority, "predicted_wait", wait)
+        waiter: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        queue.append(waiter)
+        self._update_depth(priority)
+        start = time.perf_counter()
+        try:
+            async with asyncio.timeout(self._max_wait[priority]):
+                await waiter
+        except TimeoutError:
+            if not self._handed_over(waiter, priority):
+                raise self._shed(priority, "timeout", self.predicted_wait(priority)) from None
+        except BaseException:
+            # Cancelled while queued (client went away); give back a slot handed over meanwhile.
+            if self._handed_over(waiter, priority):
+                self.release(None)
+            raise
+        ADMISSION_WAIT.labels(priority.label).observe(time.perf_counter() - start)
+
+    def _handed_over(self, waiter: asyncio.Future[None], priority: Priority) -> bool:
+        if waiter.done() and not waiter.cancelled():
+            return True
+        waiter.cancel()
+        # release() may already have dropped a waiter cancelled along with its task.
+        with contextlib.suppress(ValueError):
+            self._queues[priority].remove(waiter)
+        self._update_depth(priority)
+        return False
+
+    def release(self, held: float | None) -> None:
+        """Return a slot, handing it straight to the highest-priority waiter if there is one."""
+        if held is not None:
+            self._service_time += SERVICE_TIME_ALPHA * (held - self._service_time)
+        # After the capacity shrank, slots are retired until the active count fits again.
+        for priority in Priority if self._active <= self.capacity else ():
+            queue = self._queues[priority]
+            while queue:
+                waiter = queue.popleft()
+                if not waiter.done():
+                    waiter.set_result(None)
+                    self._update_depth(priority)
+                    return
+            self._update_depth(priority)
+        self._active -= 1
+        ADMISSION_ACTIVE.set(self._active)
+
+    def _update_depth(self, priority: Priority) -> None:
+        ADMISSION_QUEUE_DEPTH.labels(priority.label).set(len(self._queues[priority]))
+
+    def _shed(self, priority: Priority, reason: str, wait: float) -> HTTPException:
+        ADMISSION_SHED.labels(priority.label, reason).inc()
+        retry_after = max(math.ceil(wait), 1)
+        logger.warning(
+            "request_shed",
+            priority=priority.label,
+            reason=reason,
+            predicted_wait=round(wait, 3),
+            active=self._active,
+            queued=self.depth(priority),
+        )
+        return HTTPException(
+            status_code=503,
+            detail=f"Overloaded, retry after {retry_after}s",
+            headers={"Retry-After": str(retry_after)},
+        )
@@ -0,0 +1,41 @@
+"""Per-request deadlines.
+
+A request's deadline is an absolute event-loop time kept in a context
+variable. The ``request_class`` route dependency sets it from the class
+default in ``REQUEST_TIMEOUTS`` (which an ``X-Request-Timeout`` header can
+shorten), and :func:`~src.core.retry.with_retry` runs the admission wait and
+every attempt under it, so Telegram calls still running when it passes are
+cancelled rather than finishing for nobody.
+"""
+
+import asyncio
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_deadline: ContextVar[float | None] = ContextVar("request_deadline", default=None)
+
+
+def current_deadline() -> float | None:
+    return _deadline.get()
+
+
+def time_left() -> float | None:
+    """Seconds until the current deadline (negative once it has passed), or None without one."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - asyncio.get_running_loop().time()
+
+
+def set_deadline(timeout: float) -> None:
+    """Make the current request's deadline ``timeout`` seconds from now."""
+    _deadline.set(asyncio.get_running_loop().time() + timeout)
+
+
+@contextmanager
+def use_deadline(deadline: float | None) -> Iterator[None]:
+    """Run the block under an absolute ``deadline``; None detaches it from the request's deadline."""
+    token = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
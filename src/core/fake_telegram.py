@@ -0,0 +1,326 @@
+"""In-process stand-in for ``TelegramClient`` used to load-test the service offline.
+
+Every channel name resolves to a deterministic synthetic channel with
+``posts_per_channel`` posts, a linked discussion group and comment threads.
+Each round trip sleeps for a log-normally distributed latency and may raise
+``FloodWaitError`` or ``UserDeactivatedBanError`` at the configured rates, so
+retry, rotation and session removal behave as they would against Telegram.
+"""
+
+import asyncio
+import math
+import random
+import time
+import zlib
+from collections.abc import AsyncIterator, Callable, Iterable, Sequence
+from dataclasses import dataclass, field
+from datetime import UTC, datetime, timedelta
+from itertools import islice
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Any, cast
+
+from telethon.errors import FloodWaitError, UserDeactivatedBanError
+from telethon.tl.functions.channels import GetChannelsRequest, GetFullChannelRequest, SearchPostsRequest
+from telethon.tl.functions.contacts import SearchRequest
+from telethon.tl.types import (
+    Channel,
+    ChatPhotoEmpty,
+    InputChannel,
+    InputPeerChannel,
+    Message,
+    MessageMediaPhoto,
+    MessageReplies,
+    MessageReplyHeader,
+    PeerChannel,
+    PhotoEmpty,
+)
+from telethon.utils import get_peer_id, resolve_id
+
+from src.config import settings
+from src.core.metrics import DOWNLOADED_BYTES, observe_rpc, record_flood_wait, rpc_method
+
+if TYPE_CHECKING:
+    from telethon import TelegramClient
+
+EPOCH = datetime(2024, 1, 1, tzinfo=UTC)
+PAGE_SIZE = 100
+SEARCH_PAGES = 10
+SEARCH_CHANNELS = 5
+WORDS = ("news", "update", "market", "release", "photo", "video", "report", "today", "thread", "launch")
+
+
+@dataclass(frozen=True)
+class FakeBackendConfig:
+    latency_ms: float = 50.0
+    latency_sigma: float = 0.5
+    posts_per_channel: int = 10_000
+    comments_per_post: int = 20
+    media_ratio: float = 0.3
+    media_bytes: int = 200_000
+    bandwidth_mbps: float = 100.0
+    flood_wait_rate: float = 0.0
+    flood_wait_seconds: int = 5
+    ban_rate: float = 0.0
+    seed: int | None = None
+
+    @classmethod
+    def from_settings(cls) -> "FakeBackendConfig":
+        return cls(
+            latency_ms=settings.fake_latency_ms,
+            latency_sigma=settings.fake_latency_sigma,
+            posts_per_channel=settings.fake_posts_per_channel,
+            comments_per_post=settings.fake_comments_per_post,
+            media_ratio=settings.fake_media_ratio,
+            media_bytes=settings.fake_media_bytes,
+            bandwidth_mbps=settings.fake_bandwidth_mbps,
+            flood_wait_rate=settings.fake_flood_wait_rate,
+            flood_wait_seconds=settings.fake_flood_wait_seconds,
+            ban_rate=settings.fake_ban_rate,
+            seed=settings.fake_seed,
+        )
+
+
+@dataclass
+class SessionStats:
+    calls: int = 0
+    errors: int = 0
+    in_flight: int = 0
+    busy_seconds: float = 0.0
+    bytes_downloaded: int = 0
+
+
+@dataclass
+class _FakeProfilePhoto:
+    date: datetime
+
+
+@dataclass(eq=False)
+class FakeTelegramClient:
+    name: str
+    config: FakeBackendConfig
+    stats: SessionStats = field(default_factory=SessionStats)
+    banned: bool = False
+
+    parse_mode = None
+    _self_id = None
+
+    @property
+    def session_name(self) -> str:
+        return self.name
+
+    def __post_init__(self) -> None:
+        seed = None if self.config.seed is None else self.config.seed + zlib.crc32(self.name.encode())
+        self._rng = random.Random(seed)
+        self._connected = False
+        self._resolved: set[int] = set()
+        self._handlers: list[tuple[Callable[..., Any], Any]] = []
+        self._mb_entity_cache: dict[int, Any] = {}
+        self._media = random.Random(0).randbytes(self.config.media_bytes)
+
+    async def connect(self) -> None:
+        self._connected = True
+
+    async def disconnect(self) -> None:
+        self._connected = False
+
+    def is_connected(self) -> bool:
+        return self._connected
+
+    async def is_user_authorized(self) -> bool:
+        return not self.banned
+
+    def add_event_handler(self, callback: Callable[..., Any], event: Any = None) -> None:
+        self._handlers.append((callback, event))
+
+    def remove_event_handler(self, callback: Callable[..., Any], event: Any = None) -> int:
+        before = len(self._handlers)
+        self._handlers = [(cb, ev) for cb, ev in self._handlers if cb != callback]
+        return before - len(self._handlers)
+
+    async def _rpc(self, method: str, transfer_bytes: int = 0) -> None:
+        """Simulate one round trip of ``method``, then roll for an injected error."""
+        with observe_rpc(method, self.name):
+            if self.banned:
+                raise UserDeactivatedBanError(None)
+            delay = self.config.latency_ms / 1000 * math.exp(self._rng.gauss(0, self.config.latency_sigma))
+            delay += transfer_bytes * 8 / (self.config.bandwidth_mbps * 1_000_000)
+            self.stats.calls += 1
+            self.stats.in_flight += 1
+            start = time.perf_counter()
+            try:
+                await asyncio.sleep(delay)
+            finally:
+                self.stats.in_flight -= 1
+                self.stats.busy_seconds += time.perf_counter() - start
+            roll = self._rng.random()
+            if roll < self.config.ban_rate:
+                self.banned = True
+                self.stats.errors += 1
+                raise UserDeactivatedBanError(None)
+            if roll < self.config.ban_rate + self.config.flood_wait_rate:
+                self.stats.errors += 1
+                record_flood_wait(method, self.name, self.config.flood_wait_seconds, "raised")
+                raise FloodWaitError(None, capture=self.config.flood_wait_seconds)
+
+    async def _resolve(self, peer: Any) -> int:
+        channel_id = _channel_id(peer)
+        if channel_id not in self._resolved:
+            await self._rpc("ResolveUsernameRequest")
+            self._resolved.add(channel_id)
+        return channel_id
+
+    async def get_entity(self, peer: Any) -> Channel:
+        return _channel(await self._resolve(peer))
+
+    async def get_input_entity(self, peer: Any) -> InputPeerChannel:
+        channel = _channel(await self._resolve(peer))
+        return InputPeerChannel(channel.id, channel.access_hash)
+
+    async def iter_messages(
+        self,
+        entity: Any,
+        limit: int | None = None,
+        offset_id: int = 0,
+        min_id: int = 0,
+        reply_to: int | None = None,
+        search: str | None = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[Message]:
+        channel_id = _channel_id(entity)
+        if reply_to is not None:
+            bottom = reply_to * self.config.comments_per_post
+            top = bottom + self.config.comments_per_post
+        else:
+            bottom, top = 0, self.config.posts_per_channel
+        if offset_id:
+            top = min(top, offset_id - 1)
+        candidates: Iterable[int] = range(top, max(bottom, min_id), -1)
+        if search is not None:
+            candidates = (i for i in candidates if i % 5 == 0)
+        ids = list(islice(candidates, limit))
+        method = "GetRepliesRequest" if reply_to is not None else "SearchRequest" if search else "GetHistoryRequest"
+        for start in range(0, len(ids), PAGE_SIZE):
+            await self._rpc(method)
+            for msg_id in ids[start : start + PAGE_SIZE]:
+                message = self._message(channel_id, msg_id, reply_to=reply_to, search=search)
+                yield message
+
+    async def get_messages(self, entity: Any, ids: Sequence[int]) -> list[Message | None]:
+        channel_id = _channel_id(entity)
+        await self._rpc("GetMessagesRequest")
+        return [self._message(channel_id, i) if 0 < i <= self.config.posts_per_channel else None for i in ids]
+
+    async def download_media(self, message: Any, file: Any = None) -> bytes:
+        await self._rpc("GetFileRequest", transfer_bytes=len(self._media))
+        self.stats.bytes_downloaded += len(self._media)
+        DOWNLOADED_BYTES.labels(self.name).inc(len(self._media))
+        return self._media
+
+    async def get_profile_photos(self, entity: Any, limit: int | None = None) -> list[_FakeProfilePhoto]:
+        await self._rpc("GetUserPhotosRequest")
+        return [_FakeProfilePhoto(date=EPOCH - timedelta(days=30 * i)) for i in range(min(limit or 3, 3))]
+
+    async def __call__(self, request: Any, ordered: bool = False) -> Any:
+        await self._rpc(rpc_method(request))
+        if isinstance(request, list):
+            return [self._handle(r) for r in request]
+        return self._handle(request)
+
+    def _handle(self, request: Any) -> Any:
+        if isinstance(request, GetFullChannelRequest):
+            channel = _channel(_channel_id(request.channel))
+            full = SimpleNamespace(
+                id=channel.id,
+                about=f"About {channel.title}",
+                participants_count=channel.participants_count,
+                linked_chat_id=channel.id + 1,
+            )
+            return SimpleNamespace(full_chat=full, chats=[channel, _channel(channel.id + 1, megagroup=True)], users=[])
+        if isinstance(request, GetChannelsRequest):
+            return SimpleNamespace(chats=[_channel(_channel_id(c)) for c in request.id])
+        if isinstance(request, SearchPostsRequest):
+            return self._search_posts(request)
+        if isinstance(request, SearchRequest):
+            return SimpleNamespace(chats=[_channel(_channel_id(f"{request.q}{i}")) for i in range(request.limit)])
+        raise TypeError(f"FakeTelegramClient does not support {type(request).__name__}")
+
+    def _search_posts(self, request: SearchPostsRequest) -> SimpleNamespace:
+        page = request.offset_rate
+        channels = [_channel(_channel_id(f"{request.hashtag}{i}")) for i in range(SEARCH_CHANNELS)]
+        messages = []
+        for i in range(request.limit):
+            n = page * request.limit + i
+            channel = channels[n % SEARCH_CHANNELS]
+            msg_id = self.config.posts_per_channel - n // SEARCH_CHANNELS
+            messages.append(_raw_message(self.config, channel.id, msg_id, hashtag=request.hashtag))
+        next_rate = page + 1 if page + 1 < SEARCH_PAGES else None
+        return SimpleNamespace(messages=messages, chats=channels, users=[], next_rate=next_rate)
+
+    def _message(self, channel_id: int, msg_id: int, reply_to: int | None = None, search: str | None = None) -> Message:
+        message = _raw_message(self.config, channel_id, msg_id, reply_to=reply_to, search=search)
+        channel = _channel(channel_id)
+        message._finish_init(self, {get_peer_id(channel): channel}, None)
+        return message
+
+
+def _channel_id(peer: Any) -> int:
+    if isinstance(peer, (Channel, InputPeerChannel, InputChannel, PeerChannel)):
+        return cast("int", getattr(peer, "channel_id", None) or peer.id)
+    if isinstance(peer, int):
+        return resolve_id(peer)[0] if peer < 0 else peer
+    name = str(peer).lstrip("@").lower()
+    if name.startswith("missing"):
+        raise ValueError(f'No user has "{name}" as username')
+    if name.lstrip("-").isdigit():
+        return _channel_id(int(name))
+    return zlib.crc32(name.encode()) % 1_000_000_000 + 1_000
+
+
+def _channel(channel_id: int, megagroup: bool = False) -> Channel:
+    return Channel(
+        id=channel_id,
+        title=f"Channel {channel_id}",
+        photo=ChatPhotoEmpty(),
+        date=EPOCH,
+        access_hash=channel_id * 7 + 1,
+        username=f"channel{channel_id}",
+        broadcast=not megagroup,
+        megagroup=megagroup,
+        participants_count=channel_id % 100_000,
+    )
+
+
+def _raw_message(
+    config: FakeBackendConfig,
+    channel_id: int,
+    msg_id: int,
+    reply_to: int | None = None,
+    search: str | None = None,
+    hashtag: str | None = None,
+) -> Message:
+    rng = random.Random(channel_id * 1_000_003 + msg_id)
+    words = [rng.choice(WORDS) for _ in range(rng.randint(5, 120))]
+    text = " ".join([*filter(None, (hashtag, search)), *words])
+    has_media = reply_to is None and rng.random() < config.media_ratio
+    has_comments = reply_to is None and config.comments_per_post > 0 and msg_id % 3 != 0
+    reply_header = None
+    if reply_to is not None:
+        first = reply_to * config.comments_per_post + 1
+        parent = rng.randint(first, msg_id - 1) if msg_id > first and rng.random() < 0.5 else reply_to
+        reply_header = MessageReplyHeader(reply_to_msg_id=parent)
+    return Message(
+        id=msg_id,
+        peer_id=PeerChannel(channel_id),
+        date=EPOCH + timedelta(minutes=10 * msg_id),
+        message=text,
+        post=reply_to is None,
+        views=rng.randint(100, 100_000),
+        forwards=rng.randint(0, 1_000),
+        replies=MessageReplies(replies=config.comments_per_post, replies_pts=0) if has_comments else None,
+        media=MessageMediaPhoto(photo=PhotoEmpty(id=msg_id)) if has_media else None,
+        reply_to=reply_header,
+    )
+
+
+def create_fake_clients(count: int, config: FakeBackendConfig) -> list["TelegramClient"]:
+    return [cast("TelegramClient", FakeTelegramClient(f"fake-{i}", config)) for i in range(count)]
@@ -0,0 +1,41 @@
+import asyncio
+from collections.abc import AsyncIterator, Awaitable, Callable, Sequence
+
+import structlog
+from fastapi import HTTPException
+
+logger = structlog.get_logger()
+
+
+def to_http_error(exc: Exception) -> HTTPException:
+    if isinstance(exc, HTTPException):
+        return exc
+    if isinstance(exc, ValueError):
+        return HTTPException(status_code=404, detail=str(exc))
+    return HTTPException(status_code=500, detail=str(exc))
+
+
+async def fan_out[T, R](
+    items: Sequence[T],
+    func: Callable[[T], Awaitable[R]],
+    concurrency: int,
+) -> AsyncIterator[tuple[T, R | None, HTTPException | None]]:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(item: T) -> tuple[T, R | None, HTTPException | None]:
+        async with semaphore:
+            try:
+                return item, await func(item), None
+            except Exception as e:
+                error = to_http_error(e)
+                if error.status_code >= 500:
+                    logger.error("fan_out_item_error", func=getattr(func, "__name__", None), error=str(e))
+                return item, None, error
+
+    tasks = [asyncio.create_task(run(item)) for item in items]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
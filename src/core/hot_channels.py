@@ -0,0 +1,178 @@
+"""Warm cache for the channels that are requested constantly.
+
+The hot set is ``HOT_CHANNELS`` plus up to ``HOT_CHANNELS_LEARNED`` channels
+with the highest request rate, measured as a request count that halves every
+``HOT_CHANNELS_HALFLIFE`` seconds. For hot channels the info and the first
+posts page are cached, and a background loop refetches an entry once it is
+older than ``HOT_CACHE_REFRESH``, well before it expires, so interactive
+requests for them are answered from memory.
+
+Refreshes are spare-capacity work: they only run while the admission
+controller has idle slots and go through ``with_retry`` at export priority, so
+they share the admission queues and flood-wait cooldowns with everything else.
+While the service is idle, a first page served from the cache is at most
+``HOT_CACHE_REFRESH`` seconds behind the channel. Under sustained load refreshes
+are deferred and entries are served until they expire, so the bound is
+``HOT_CACHE_TTL`` seconds.
+"""
+
+import asyncio
+import time
+from collections.abc import Sequence
+from typing import Any
+
+import structlog
+
+from src.core.admission import Priority, use_priority
+from src.core.metrics import HOT_CHANNEL_REFRESHES, record_cache_lookup
+from src.core.page_buffer import PageBuffer
+from src.core.retry import with_retry
+from src.dependencies import get_admission_controller
+from src.services.telegram import compile_message_projector, get_channel_info, get_channel_posts
+
+logger = structlog.get_logger()
+
+INFO_BYTES = 1024
+MESSAGE_OVERHEAD_BYTES = 512
+MIN_SCORE = 0.1
+
+
+def _page_size(messages: list[dict[str, Any]]) -> int:
+    return sum(len(m.get("text") or "") + MESSAGE_OVERHEAD_BYTES for m in messages)
+
+
+class HotChannels:
+    def __init__(
+        self,
+        buffer: PageBuffer,
+        channels: Sequence[str] = (),
+        learned: int = 20,
+        min_hits: float = 5.0,
+        halflife: float = 300.0,
+        refresh_after: float = 60.0,
+        page_size: int = 100,
+        interval: float = 5.0,
+        idle_fraction: float = 0.5,
+    ) -> None:
+        self._buffer = buffer
+        self._configured = [c.lower() for c in channels]
+        self._learned = learned
+        self._min_hits = min_hits
+        self._decay = 0.5 ** (interval / halflife) if halflife > 0 else 0.0
+        self._refresh_after = refresh_after
+        self._page_size = page_size
+        self._interval = interval
+        self._idle_fraction = idle_fraction
+        self._hits: dict[str, float] = {}
+        self._hot: dict[str, None] = dict.fromkeys(self._configured)
+        self._task: asyncio.Task[None] | None = None
+
+    def hot(self) -> list[str]:
+        return list(self._hot)
+
+    def is_hot(self, channel: str) -> bool:
+        return channel.lower() in self._hot
+
+    def _rank(self) -> None:
+        """Recompute the hot set: configured channels first, then the most requested ones."""
+        hot = dict.fromkeys(self._configured)
+        if self._learned > 0:
+            ranked = sorted(self._hits.items(), key=lambda item: item[1], reverse=True)
+            learned = [c for c, hits in ranked if hits >= self._min_hits and c not in hot]
+            hot.update(dict.fromkeys(learned[: self._learned]))
+        self._hot = hot
+
+    def _record(self, channel: str) -> str:
+        key = channel.lower()
+        self._hits[key] = self._hits.get(key, 0.0) + 1.0
+        return key
+
+    def _cached(self, kind: str, key: str) -> Any | None:
+        entry = self._buffer.get((kind, key))
+        if key in self._hot:
+            record_cache_lookup("hot_channels", "hit" if entry is not None else "miss")
+        return entry[1] if entry is not None else None
+
+    async def info(self, channel: str) -> dict[str, Any]:
+        key = self._record(channel)
+        cached = self._cached("info", key)
+        if cached is not None:
+            return cached  # type: ignore[no-any-return]
+        return await self._fetch_info(key) if self.is_hot(key) else await with_retry(get_channel_info, channel)
+
+    async def posts(self, channel: str, limit: int, fields: frozenset[str] | None = None) -> list[dict[str, Any]]:
+        """First page of ``channel``; hot channels are fetched ``page_size`` deep and sliced."""
+        key = self._record(channel)
+        if limit > self._page_size:
+            return await with_retry(get_channel_posts, channel, limit=limit, fields=fields)  # type: ignore[no-any-return]
+        messages = self._cached("posts", key)
+        if messages is None:
+            if not self.is_hot(key):
+                return await with_retry(get_channel_posts, channel, limit=limit, fields=fields)  # type: ignore[no-any-return]
+            messages = await self._fetch_posts(key)
+        return list(map(compile_message_projector(fields), messages[:limit]))
+
+    async def _fetch_info(self, channel: str) -> dict[str, Any]:
+        info: dict[str, Any] = await with_retry(get_channel_info, channel)
+        self._buffer.put(("info", channel), (time.monotonic(), info), INFO_BYTES)
+        return info
+
+    async def _fetch_posts(self, channel: str) -> list[dict[str, Any]]:
+        messages: list[dict[str, Any]] = await with_retry(get_channel_posts, channel, limit=self._page_size)
+        self._buffer.put(("posts", channel), (time.monotonic(), messages), _page_size(messages))
+        return messages
+
+    def _stale(self, kind: str, channel: str) -> bool:
+        entry = self._buffer.get((kind, channel))
+        return entry is None or time.monotonic() - entry[0] >= self._refresh_after
+
+    def _idle(self) -> bool:
+        admission = get_admission_controller()
+        if admission is None:
+            return True
+        return admission.queued == 0 and admission.active < admission.capacity * self._idle_fraction
+
+    async def warm(self) -> int:
+        """Refresh stale hot entries while there is idle capacity; returns how many were fetched."""
+        self._rank()
+        refreshed = 0
+        for channel in self.hot():
+            for kind in ("info", "posts"):
+                if not self._stale(kind, channel):
+                    continue
+                if not self._idle():
+                    logger.debug("hot_channels_warm_deferred", reason="busy", refreshed=refreshed)
+                    return refreshed
+                fetch = self._fetch_info if kind == "info" else self._fetch_posts
+                try:
+                    with use_priority(Priority.EXPORT):
+                        await fetch(channel)
+                except Exception as e:
+                    HOT_CHANNEL_REFRESHES.labels(kind, "error").inc()
+                    logger.warning("hot_channel_refresh_failed", channel=channel, kind=kind, error=str(e))
+                    continue
+                HOT_CHANNEL_REFRESHES.labels(kind, "ok").inc()
+                refreshed += 1
+        return refreshed
+
+    def _age_hits(self) -> None:
+        self._hits = {c: h * self._decay for c, h in self._hits.items() if h * self._decay >= MIN_SCORE}
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self._interval)
+            self._age_hits()
+            refreshed = await self.warm()
+            if refreshed:
+                logger.info("hot_channels_warmed", refreshed=refreshed, hot=len(self.hot()))
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="hot-channels-warmer")
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self._buffer.clear()
@@ -0,0 +1,155 @@
+"""Queued, sampled structlog pipeline.
+
+In ``queued`` mode the request path only runs the cheap processors
+(contextvars, level, sampling, timestamp) and hands the event dict to a
+bounded queue; rendering and the write to stdout happen on a background
+thread in batches. When the queue is full the record is dropped and counted
+instead of blocking the event loop, and the writer reports the number of
+dropped records in a ``log_records_dropped`` line once it catches up.
+"""
+
+import queue
+import random
+import sys
+import threading
+from collections.abc import Callable, Mapping
+from datetime import UTC, datetime
+from typing import Any, TextIO
+
+import structlog
+
+from src.core.metrics import LOG_RECORDS_DROPPED, LOG_RECORDS_SAMPLED_OUT
+
+Renderer = Callable[[Any, str, dict[str, Any]], str | bytes]
+
+BATCH_SIZE = 256
+
+_sink: "LogSink | None" = None
+
+
+class SamplingProcessor:
+    """Keep only a fraction of selected events, e.g. ``{"get_channel_posts_done": 0.1}``."""
+
+    def __init__(self, rates: Mapping[str, float]) -> None:
+        self.rates = dict(rates)
+
+    def __call__(self, logger: Any, method_name: str, event_dict: dict[str, Any]) -> dict[str, Any]:
+        rate = self.rates.get(event_dict.get("event", ""))
+        if rate is None or rate >= 1.0:
+            return event_dict
+        if random.random() >= rate:
+            LOG_RECORDS_SAMPLED_OUT.labels(event_dict["event"]).inc()
+            raise structlog.DropEvent
+        event_dict["sample_rate"] = rate
+        return event_dict
+
+
+class LogSink:
+    def __init__(self, renderer: Renderer, stream: TextIO | None = None, maxsize: int = 10_000) -> None:
+        self._renderer = renderer
+        self._stream = stream or sys.stdout
+        self._queue: queue.Queue[dict[str, Any] | None] = queue.Queue(maxsize)
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._closed = False
+        self.dropped = 0
+        self._reported = 0
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def put(self, event_dict: dict[str, Any]) -> None:
+        if self._closed:
+            # Loggers cached before shutdown keep working, just synchronously.
+            self._stream.write(self._render(event_dict) + "\n")
+            return
+        try:
+            self._queue.put_nowait(event_dict)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            LOG_RECORDS_DROPPED.inc()
+
+    def close(self, timeout: float = 5.0) -> None:
+        self._closed = True
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self) -> None:
+        running = True
+        while running:
+            batch = [self._queue.get()]
+            while len(batch) < BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            lines = []
+            for event_dict in batch:
+                if event_dict is None:
+                    running = False
+                    continue
+                lines.append(self._render(event_dict))
+            with self._lock:
+                dropped, self._reported = self.dropped - self._reported, self.dropped
+            if dropped:
+                lines.append(
+                    self._render(
+                        {
+                            "event": "log_records_dropped",
+                            "dropped": dropped,
+                            "level": "warning",
+                            "timestamp": datetime.now(UTC).isoformat(),
+                        }
+                    )
+                )
+            if lines:
+                self._stream.write("\n".join(lines) + "\n")
+                self._stream.flush()
+
+    def _render(self, event_dict: dict[str, Any]) -> str:
+        method_name = event_dict.get("level", "info")
+        try:
+            rendered = self._renderer(None, method_name, event_dict)
+        except Exception as e:
+            rendered = f"log render error {type(e).__name__}: {event_dict!r}"
+        return rendered.decode() if isinstance(rendered, bytes) else rendered
+
+
+class QueueLogger:
+    """structlog logger whose methods receive the unrendered event dict and enqueue it."""
+
+    def __init__(self, sink: LogSink) -> None:
+        self._sink = sink
+
+    def msg(self, **event_dict: Any) -> None:
+        self._sink.put(event_dict)
+
+    debug = info = warning = warn = error = critical = exception = fatal = msg
+
+
+class QueueLoggerFactory:
+    def __init__(self, sink: LogSink) -> None:
+        self._sink = sink
+
+    def __call__(self, *args: Any) -> QueueLogger:
+        return QueueLogger(self._sink)
+
+
+def start_log_sink(renderer: Renderer, maxsize: int) -> LogSink:
+    global _sink  # noqa: PLW0603
+    stop_log_sink()
+    _sink = LogSink(renderer, maxsize=maxsize)
+    _sink.start()
+    return _sink
+
+
+def stop_log_sink() -> None:
+    global _sink  # noqa: PLW0603
+    if _sink is not None:
+        _sink.close()
+        _sink = None
@@ -0,0 +1,86 @@
+"""Channel search that prefers the local full-text index over Telegram.
+
+A channel whose posts are fully indexed by the message store is searched
+locally; any other channel goes to Telegram's server-side search. The
+multi-channel search pages every channel independently with one cursor per
+channel, like the multi-tag post search.
+"""
+
+import asyncio
+from collections.abc import Sequence
+from typing import Any
+
+import structlog
+from fastapi import HTTPException
+
+from src.core.message_store import get_message_store
+from src.core.metrics import MESSAGE_SEARCHES
+from src.core.retry import with_retry
+from src.core.search_prefetch import MERGE_FIELDS
+from src.services.telegram import (
+    compile_message_projector,
+    decode_multi_cursor,
+    encode_multi_cursor,
+    search_channel_messages,
+)
+
+logger = structlog.get_logger()
+
+
+async def search_channel(
+    channel: str, query: str, offset_id: int = 0, limit: int = 20, fields: frozenset[str] | None = None
+) -> list[dict[str, Any]]:
+    store = get_message_store()
+    peer = await store.indexed_peer(channel) if store is not None else None
+    if store is None or peer is None:
+        MESSAGE_SEARCHES.labels("telegram").inc()
+        return await with_retry(  # type: ignore[no-any-return]
+            search_channel_messages, channel, query, offset_id=offset_id, limit=limit, fields=fields
+        )
+    MESSAGE_SEARCHES.labels("local").inc()
+    messages = await store.search(peer, query, offset_id, limit)
+    return list(map(compile_message_projector(fields), messages))
+
+
+async def search_across_channels(
+    channels: Sequence[str],
+    query: str,
+    cursor: str | None,
+    limit: int,
+    fields: frozenset[str] | None = None,
+) -> tuple[list[dict[str, Any]], str | None, dict[str, str]]:
+    """Up to ``limit`` matches from each channel, newest first across channels."""
+    cursors: dict[str, str | None] = decode_multi_cursor(cursor) if cursor else {}
+    active = [c for c in dict.fromkeys(channels) if c not in cursors or cursors[c]]
+    logger.info("search_channels_messages", channels=len(active), query=query, limit=limit)
+    fetch_fields = fields | MERGE_FIELDS if fields is not None else None
+    try:
+        offsets = {c: int(cursors.get(c) or 0) for c in active}
+    except ValueError:
+        raise ValueError("Invalid cursor") from None
+    results = await asyncio.gather(
+        *(search_channel(c, query, offsets[c], limit, fetch_fields) for c in active), return_exceptions=True
+    )
+
+    found: list[dict[str, Any]] = []
+    next_cursors = {c: cursors[c] for c in channels if c in cursors}
+    errors: dict[str, str] = {}
+    for channel, result in zip(active, results, strict=True):
+        if isinstance(result, HTTPException):
+            errors[channel] = result.detail
+        elif isinstance(result, ValueError):
+            errors[channel] = str(result)
+        elif isinstance(result, BaseException):
+            raise result
+        else:
+            found += result
+            next_cursors[channel] = str(result[-1]["id"]) if len(result) == limit else None
+    if active and len(errors) == len(active):
+        first = next(r for r in results if isinstance(r, HTTPException | ValueError))
+        raise first
+
+    # Pages of different channels never share a message, so they only need ordering.
+    found.sort(key=lambda m: (m.get("date") is not None, m.get("date") or ""), reverse=True)
+    messages = list(map(compile_message_projector(fields), found))
+    logger.info("search_channels_messages_done", channels=len(active), count=len(messages), errors=len(errors))
+    return messages, encode_multi_cursor(next_cursors), errors
@@ -0,0 +1,416 @@
+"""Local read-through store for channel history and comment threads.
+
+Messages are kept in a SQLite database in WAL mode (shared safely by all
+workers) together with the id ranges each history is known to be complete
+for: every existing message with ``lo <= id <= hi`` is stored. A history page
+is assembled by walking down from ``offset_id``, reading covered ranges from
+disk and fetching only the gaps from Telegram, bounded below by the next
+covered range. The newest page (``offset_id=0``) always comes from Telegram,
+because only Telegram knows the current top of a channel.
+
+Edits and view counts are the only changes to old messages, so a range is
+trusted for ``MESSAGE_STORE_TTL`` seconds and refetched after that. Histories
+are keyed by peer id and thread: 0 for channel posts, the post id for the
+comments under a post. Every few hundred writes, stale ranges are evicted
+together with their messages, and so are the least recently fetched ranges
+while the store holds more than ``MESSAGE_STORE_MAX_ROWS`` messages.
+
+With ``MESSAGE_INDEX_ENABLED`` the message texts are also kept in an FTS5
+full-text index. A channel counts as fully indexed while one fresh range
+reaches from its first post up to a top fetched within the last
+``MESSAGE_INDEX_MAX_LAG`` seconds; channel search is answered locally only
+then, so local results never silently miss part of a channel.
+"""
+
+import asyncio
+import contextlib
+import sqlite3
+import threading
+import time
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from typing import Any, TypeVar
+
+import structlog
+from pydantic_core import from_json, to_json
+
+from src.config import settings
+from src.core.metrics import MESSAGE_STORE_EVICTIONS, MESSAGE_STORE_MESSAGES, record_cache_lookup
+
+logger = structlog.get_logger()
+
+T = TypeVar("T")
+
+# Writes between two passes enforcing the age and size bounds.
+PRUNE_EVERY = 200
+
+Fetch = Callable[[int, int, int], Awaitable[list[dict[str, Any]]]]
+
+SCHEMA_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    key INTEGER PRIMARY KEY,
+    peer INTEGER NOT NULL,
+    thread INTEGER NOT NULL,
+    id INTEGER NOT NULL,
+    date TEXT,
+    text TEXT NOT NULL,
+    data BLOB NOT NULL,
+    UNIQUE (peer, thread, id)
+);
+CREATE TABLE IF NOT EXISTS ranges (
+    peer INTEGER NOT NULL,
+    thread INTEGER NOT NULL,
+    lo INTEGER NOT NULL,
+    hi INTEGER NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (peer, thread, lo)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS heads (
+    peer INTEGER NOT NULL,
+    thread INTEGER NOT NULL,
+    top INTEGER NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (peer, thread)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS aliases (
+    name TEXT PRIMARY KEY,
+    peer INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+INDEX_SCHEMA = """
+CREATE VIRTUAL TABLE messages_fts USING fts5(text, content='messages', content_rowid='key', tokenize={tokenize});
+CREATE TRIGGER messages_fts_insert AFTER INSERT ON messages BEGIN
+    INSERT INTO messages_fts (rowid, text) VALUES (new.key, new.text);
+END;
+CREATE TRIGGER messages_fts_delete AFTER DELETE ON messages BEGIN
+    INSERT INTO messages_fts (messages_fts, rowid, text) VALUES ('delete', old.key, old.text);
+END;
+CREATE TRIGGER messages_fts_update AFTER UPDATE OF text ON messages WHEN old.text IS NOT new.text BEGIN
+    INSERT INTO messages_fts (messages_fts, rowid, text) VALUES ('delete', old.key, old.text);
+    INSERT INTO messages_fts (rowid, text) VALUES (new.key, new.text);
+END;
+INSERT INTO messages_fts (messages_fts) VALUES ('rebuild');
+"""
+
+DROP_INDEX = """
+DROP TRIGGER IF EXISTS messages_fts_insert;
+DROP TRIGGER IF EXISTS messages_fts_delete;
+DROP TRIGGER IF EXISTS messages_fts_update;
+DROP TABLE IF EXISTS messages_fts;
+"""
+
+# The store is a cache, so a database written by an older schema is simply dropped.
+DROP_ALL = (
+    DROP_INDEX
+    + """
+DROP TABLE IF EXISTS messages;
+DROP TABLE IF EXISTS ranges;
+DROP TABLE IF EXISTS heads;
+DROP TABLE IF EXISTS aliases;
+"""
+)
+
+
+def match_expression(query: str) -> str:
+    """FTS5 query matching messages that contain every word of ``query``, with FTS syntax taken literally."""
+    return " ".join('"' + term.replace('"', '""') + '"' for term in query.split())
+
+
+_store: "MessageStore | None" = None
+
+
+class MessageStore:
+    def __init__(
+        self,
+        path: Path,
+        ttl: float = 86400.0,
+        max_rows: int = 1_000_000,
+        index: bool = False,
+        tokenizer: str = "unicode61 remove_diacritics 2",
+        max_lag: float = 300.0,
+    ) -> None:
+        self.path = path
+        self.ttl = ttl
+        self.max_rows = max_rows
+        self.max_lag = max_lag
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            self._conn.executescript(DROP_ALL)
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._conn.executescript(SCHEMA)
+        if index:
+            self.index_enabled = self._setup_index(tokenizer)
+        else:
+            self._conn.executescript(DROP_INDEX)
+            self.index_enabled = False
+        self._aliases: dict[str, int] = {}
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    def _setup_index(self, tokenizer: str) -> bool:
+        """Create, rebuild or keep the full-text index; False when this SQLite has no FTS5."""
+        tokenize = "'" + tokenizer.replace("'", "''") + "'"
+        row = self._conn.execute("SELECT sql FROM sqlite_master WHERE name = 'messages_fts'").fetchone()
+        if row is not None and f"tokenize={tokenize}" in row[0]:
+            return True
+        try:
+            self._conn.executescript(f"BEGIN IMMEDIATE;{DROP_INDEX}{INDEX_SCHEMA.format(tokenize=tokenize)}COMMIT;")
+        except sqlite3.OperationalError as e:
+            if self._conn.in_transaction:
+                self._conn.execute("ROLLBACK")
+            logger.warning("message_index_unavailable", error=str(e))
+            return False
+        logger.info("message_index_built", tokenizer=tokenizer)
+        return True
+
+    async def _run(self, func: Callable[..., T], *args: Any) -> T:
+        def locked() -> T:
+            with self._lock:
+                return func(*args)
+
+        return await asyncio.to_thread(locked)
+
+    def _fresh_since(self) -> float:
+        return time.time() - self.ttl
+
+    def _covering(self, peer: int, thread: int, message_id: int) -> int | None:
+        """Low end of the fresh range containing ``message_id``."""
+        row = self._conn.execute(
+            "SELECT lo FROM ranges WHERE peer = ? AND thread = ? AND lo <= ? AND hi >= ? AND updated_at >= ?",
+            (peer, thread, message_id, message_id, self._fresh_since()),
+        ).fetchone()
+        return row[0] if row else None
+
+    def _below(self, peer: int, thread: int, message_id: int) -> int | None:
+        """High end of the nearest fresh range entirely below ``message_id``."""
+        row = self._conn.execute(
+            "SELECT MAX(hi) FROM ranges WHERE peer = ? AND thread = ? AND hi < ? AND updated_at >= ?",
+            (peer, thread, message_id, self._fresh_since()),
+        ).fetchone()
+        return row[0] if row else None
+
+    def _read(self, peer: int, thread: int, upper: int, lower: int, limit: int) -> list[dict[str, Any]]:
+        rows = self._conn.execute(
+            "SELECT data FROM messages WHERE peer = ? AND thread = ? AND id BETWEEN ? AND ? ORDER BY id DESC LIMIT ?",
+            (peer, thread, lower, upper, limit),
+        ).fetchall()
+        return [from_json(row[0]) for row in rows]
+
+    def _write(
+        self, peer: int, thread: int, messages: list[dict[str, Any]], lo: int, hi: int, head: bool = False
+    ) -> None:
+        """Store ``messages`` as all there is in ``lo..hi`` and mark it covered, merging with fresh adjacent ranges.
+
+        ``head`` records ``hi`` as the current top of the history.
+        """
+        now = time.time()
+        with self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            ids = {m["id"] for m in messages}
+            gone = self._conn.execute(
+                "SELECT id FROM messages WHERE peer = ? AND thread = ? AND id BETWEEN ? AND ?", (peer, thread, lo, hi)
+            ).fetchall()
+            self._conn.executemany(
+                "DELETE FROM messages WHERE peer = ? AND thread = ? AND id = ?",
+                [(peer, thread, row[0]) for row in gone if row[0] not in ids],
+            )
+            self._conn.executemany(
+                "INSERT INTO messages (peer, thread, id, date, text, data) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (peer, thread, id) DO UPDATE SET date = excluded.date, text = excluded.text, "
+                "data = excluded.data",
+                [(peer, thread, m["id"], m.get("date"), m.get("text") or "", to_json(m)) for m in messages],
+            )
+            if head:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO heads (peer, thread, top, fetched_at) VALUES (?, ?, ?, ?)",
+                    (peer, thread, hi, now),
+                )
+            rows = self._conn.execute(
+                "SELECT lo, hi, updated_at FROM ranges WHERE peer = ? AND thread = ? AND lo <= ? AND hi >= ?",
+                (peer, thread, hi + 1, lo - 1),
+            ).fetchall()
+            # Stale ranges that touch the new one are dropped rather than merged, or they would never be refetched.
+            fresh = [r for r in rows if r[2] >= now - self.ttl]
+            self._conn.executemany(
+                "DELETE FROM ranges WHERE peer = ? AND thread = ? AND lo = ?", [(peer, thread, r[0]) for r in rows]
+            )
+            self._conn.executemany(
+                "DELETE FROM messages WHERE peer = ? AND thread = ? AND id BETWEEN ? AND ? AND id NOT BETWEEN ? AND ?",
+                [(peer, thread, r[0], r[1], lo, hi) for r in rows if r[2] < now - self.ttl],
+            )
+            self._conn.execute(
+                "INSERT INTO ranges (peer, thread, lo, hi, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (
+                    peer,
+                    thread,
+                    min([lo, *(r[0] for r in fresh)]),
+                    max([hi, *(r[1] for r in fresh)]),
+                    min([now, *(r[2] for r in fresh)]),
+                ),
+            )
+
+    def _drop_range(self, peer: int, thread: int, lo: int, hi: int) -> int:
+        self._conn.execute("DELETE FROM ranges WHERE peer = ? AND thread = ? AND lo = ?", (peer, thread, lo))
+        return self._conn.execute(
+            "DELETE FROM messages WHERE peer = ? AND thread = ? AND id BETWEEN ? AND ?", (peer, thread, lo, hi)
+        ).rowcount
+
+    def _prune(self) -> int:
+        """Drop stale ranges, then the least recently fetched ones until at most ``max_rows`` messages remain."""
+        evicted = 0
+        with self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            ranges = self._conn.execute(
+                "SELECT peer, thread, lo, hi, updated_at FROM ranges ORDER BY updated_at"
+            ).fetchall()
+            stored = self._conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+            for peer, thread, lo, hi, updated_at in ranges:
+                if updated_at >= self._fresh_since() and stored - evicted <= self.max_rows:
+                    break
+                evicted += self._drop_range(peer, thread, lo, hi)
+        return evicted
+
+    async def prune(self) -> int:
+        """Enforce the age and size bounds; returns how many messages were evicted."""
+        evicted = await self._run(self._prune)
+        if evicted:
+            MESSAGE_STORE_EVICTIONS.inc(evicted)
+            logger.info("message_store_pruned", evicted=evicted)
+        return evicted
+
+    async def history(
+        self, peer: int, thread: int, offset_id: int, limit: int, min_id: int, fetch: Fetch
+    ) -> list[dict[str, Any]]:
+        """Messages older than ``offset_id`` (newest first when 0) and newer than ``min_id``, newest first.
+
+        ``fetch(offset_id, limit, min_id)`` asks Telegram for the same kind of
+        page and must return fully serialized messages.
+        """
+        result: list[dict[str, Any]] = []
+        upper: int | None = offset_id - 1 if offset_id > 0 else None
+        local = remote = 0
+        while len(result) < limit and (upper is None or upper > min_id):
+            if upper is not None:
+                lo = await self._run(self._covering, peer, thread, upper)
+                if lo is not None:
+                    lower = max(lo, min_id + 1)
+                    stored = await self._run(self._read, peer, thread, upper, lower, limit - len(result))
+                    result += stored
+                    local += len(stored)
+                    upper = lower - 1
+                    continue
+                below = await self._run(self._below, peer, thread, upper)
+                floor = max(min_id, below or 0)
+            else:
+                floor = min_id
+            wanted = limit - len(result)
+            fetched = await fetch(upper + 1 if upper is not None else 0, wanted, floor)
+            remote += len(fetched)
+            result += fetched
+            exhausted = len(fetched) < wanted
+            top = upper if upper is not None else (fetched[0]["id"] if fetched else None)
+            if top is not None:
+                bottom = floor + 1 if exhausted else fetched[-1]["id"]
+                await self._run(self._write, peer, thread, fetched, bottom, top, upper is None)
+                self._writes += 1
+                if self._writes % PRUNE_EVERY == 0:
+                    await self.prune()
+            if not exhausted or top is None:
+                break
+            upper = floor
+        record_cache_lookup("message_store", "hit" if not remote else "partial" if local else "miss")
+        MESSAGE_STORE_MESSAGES.labels("local").inc(local)
+        MESSAGE_STORE_MESSAGES.labels("telegram").inc(remote)
+        return result
+
+    def _remember(self, name: str, peer: int) -> None:
+        self._conn.execute("INSERT OR REPLACE INTO aliases (name, peer) VALUES (?, ?)", (name, peer))
+
+    async def remember(self, channel: str, peer: int) -> None:
+        """Record that ``channel`` resolves to ``peer``, so it can be searched without resolving it."""
+        name = channel.lower()
+        if self._aliases.get(name) != peer:
+            await self._run(self._remember, name, peer)
+            self._aliases[name] = peer
+
+    def _peer(self, name: str) -> int | None:
+        row = self._conn.execute("SELECT peer FROM aliases WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def _is_indexed(self, peer: int) -> bool:
+        row = self._conn.execute("SELECT top, fetched_at FROM heads WHERE peer = ? AND thread = 0", (peer,)).fetchone()
+        if row is None or row[1] < time.time() - self.max_lag:
+            return False
+        lo = self._covering(peer, 0, row[0])
+        return lo is not None and lo <= 1
+
+    async def indexed_peer(self, channel: str) -> int | None:
+        """Peer id of ``channel`` if its posts are fully indexed, else None."""
+        if not self.index_enabled:
+            return None
+        name = channel.lower()
+        peer = self._aliases.get(name)
+        if peer is None:
+            peer = await self._run(self._peer, name)
+            if peer is None:
+                return None
+            self._aliases[name] = peer
+        return peer if await self._run(self._is_indexed, peer) else None
+
+    def _search(self, peer: int, match: str, offset_id: int, limit: int) -> list[dict[str, Any]]:
+        rows = self._conn.execute(
+            "SELECT m.data FROM messages_fts JOIN messages m ON m.key = messages_fts.rowid "
+            "WHERE messages_fts MATCH ? AND m.peer = ? AND m.thread = 0 AND m.id < ? ORDER BY m.id DESC LIMIT ?",
+            (match, peer, offset_id or 1 << 62, limit),
+        ).fetchall()
+        return [from_json(row[0]) for row in rows]
+
+    async def search(self, peer: int, query: str, offset_id: int = 0, limit: int = 20) -> list[dict[str, Any]]:
+        """Posts of ``peer`` older than ``offset_id`` containing every word of ``query``, newest first."""
+        match = match_expression(query)
+        if not match:
+            return []
+        return await self._run(self._search, peer, match, offset_id, limit)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def open_message_store() -> MessageStore | None:
+    global _store  # noqa: PLW0603
+    close_message_store()
+    if settings.message_store_path:
+        try:
+            _store = MessageStore(
+                Path(settings.message_store_path),
+                ttl=settings.message_store_ttl,
+                max_rows=settings.message_store_max_rows,
+                index=settings.message_index_enabled,
+                tokenizer=settings.message_index_tokenizer,
+                max_lag=settings.message_index_max_lag,
+            )
+        except (OSError, sqlite3.Error) as e:
+            logger.warning("message_store_unavailable", path=settings.message_store_path, error=str(e))
+            return None
+        logger.info("message_store_ready", path=settings.message_store_path, index=_store.index_enabled)
+    return _store
+
+
+def close_message_store() -> None:
+    global _store  # noqa: PLW0603
+    if _store is not None:
+        with contextlib.suppress(sqlite3.Error):
+            _store.close()
+        _store = None
+
+
+def get_message_store() -> MessageStore | None:
+    return _store
@@ -0,0 +1,100 @@
+"""Prometheus metrics for the Telegram layer.
+
+The HTTP instrumentator only sees whole requests; these series split that
+time into session waits, individual MTProto calls, flood waits and retries,
+and track pool health, admission queues and cache effectiveness. Everything
+is registered in the default registry, so it is served by the existing
+``/metrics`` endpoint.
+"""
+
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any
+
+from prometheus_client import Counter, Gauge, Histogram
+
+RPC_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+FLOOD_BUCKETS = (1, 3, 5, 10, 30, 60, 120, 300, 900, 3600)
+
+RPC_DURATION = Histogram(
+    "telegram_rpc_duration_seconds",
+    "MTProto request latency, including flood waits Telethon sleeps through",
+    ["method", "session"],
+    buckets=RPC_BUCKETS,
+)
+RPC_ERRORS = Counter("telegram_rpc_errors_total", "MTProto requests that raised", ["method", "session", "error"])
+FLOOD_WAITS = Counter(
+    "telegram_flood_waits_total",
+    "Flood waits seen per method; outcome=slept was absorbed by Telethon, outcome=raised reached the service",
+    ["method", "session", "outcome"],
+)
+FLOOD_WAIT_SECONDS = Histogram(
+    "telegram_flood_wait_seconds", "Requested flood wait durations", ["method"], buckets=FLOOD_BUCKETS
+)
+SESSION_WAIT = Histogram(
+    "telegram_session_wait_seconds", "Time spent waiting for a session from the pool", buckets=RPC_BUCKETS
+)
+RETRIES = Counter("telegram_retries_total", "Failed with_retry attempts by reason", ["func", "reason"])
+IN_FLIGHT = Gauge("telegram_pool_in_flight", "Service calls currently running per session", ["session"])
+SESSIONS_ACTIVE = Gauge("telegram_sessions_active", "Sessions currently in the pool")
+SESSIONS_REMOVED = Counter("telegram_sessions_removed_total", "Sessions removed from the pool", ["reason"])
+DOWNLOADED_BYTES = Counter("telegram_downloaded_bytes_total", "Media bytes downloaded", ["session"])
+LOG_RECORDS_DROPPED = Counter("log_records_dropped_total", "Log records dropped because the log queue was full")
+LOG_RECORDS_SAMPLED_OUT = Counter("log_records_sampled_out_total", "Log records skipped by sampling", ["event"])
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds",
+    "How late the event loop woke up from a fixed sleep",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+ADMISSION_ACTIVE = Gauge("admission_active_slots", "Admission slots currently held by with_retry calls")
+ADMISSION_QUEUE_DEPTH = Gauge("admission_queue_depth", "Calls waiting for an admission slot", ["priority"])
+ADMISSION_WAIT = Histogram(
+    "admission_wait_seconds", "Time admitted calls waited for a slot", ["priority"], buckets=RPC_BUCKETS
+)
+ADMISSION_SHED = Counter("admission_shed_total", "Calls rejected with 503 by admission control", ["priority", "reason"])
+DEADLINES_EXCEEDED = Counter(
+    "request_deadlines_exceeded_total", "with_retry calls cancelled at the request deadline", ["func"]
+)
+CLIENT_DISCONNECTS = Counter("client_disconnects_total", "Requests cancelled because the client went away")
+HOT_CHANNEL_REFRESHES = Counter(
+    "hot_channel_refreshes_total", "Background refreshes of hot channel entries", ["kind", "result"]
+)
+MESSAGE_STORE_MESSAGES = Counter(
+    "message_store_messages_total", "Messages returned by history reads, by where they came from", ["source"]
+)
+MESSAGE_STORE_EVICTIONS = Counter("message_store_evictions_total", "Messages evicted from the message store")
+MESSAGE_SEARCHES = Counter("message_searches_total", "Channel searches by where they were answered", ["source"])
+CACHE_LOOKUPS = Counter("cache_lookups_total", "Cache lookups by cache and result", ["cache", "result"])
+
+
+def session_label(client: Any) -> str:
+    name = getattr(client, "session_name", None)
+    return name if isinstance(name, str) else "unknown"
+
+
+def rpc_method(request: Any) -> str:
+    if isinstance(request, list):
+        return "container"
+    return type(request).__name__
+
+
+@contextmanager
+def observe_rpc(method: str, session: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        RPC_ERRORS.labels(method, session, type(e).__name__).inc()
+        raise
+    finally:
+        RPC_DURATION.labels(method, session).observe(time.perf_counter() - start)
+
+
+def record_flood_wait(method: str, session: str, seconds: float, outcome: str) -> None:
+    FLOOD_WAITS.labels(method, session, outcome).inc()
+    FLOOD_WAIT_SECONDS.labels(method).observe(seconds)
+
+
+def record_cache_lookup(cache: str, result: str) -> None:
+    CACHE_LOOKUPS.labels(cache, result).inc()
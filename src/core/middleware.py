@@ -1,15 +1,44 @@
+import asyncio
 import time
+import zlib
 from collections.abc import Awaitable, Callable
+from typing import Protocol
 from uuid import uuid4
 
 import structlog
 from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from src.config import settings
+from src.core.metrics import CLIENT_DISCONNECTS
+from src.core.timing import request_timings
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional encoder
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional encoder
+    zstandard = None
 
 logger = structlog.get_logger()
 
+UNCOMPRESSIBLE_TYPES = (
+    "image/",
+    "video/",
+    "audio/",
+    "font/woff",
+    "application/zip",
+    "application/gzip",
+    "application/x-gzip",
+    "application/zstd",
+    "text/event-stream",
+)
+
 
 async def request_id_middleware(request: Request, call_next: Callable[[Request], Awaitable[Response]]) -> Response:
     request_id = request.headers.get("x-request-id", str(uuid4()))
@@ -22,19 +51,262 @@ async def request_id_middleware(request: Request, call_next: Callable[[Request],
 
 async def logging_middleware(request: Request, call_next: Callable[[Request], Awaitable[Response]]) -> Response:
     start = time.perf_counter()
-    response = await call_next(request)
+    with request_timings(f"{request.method} {request.url.path}") as timings:
+        response = await call_next(request)
     elapsed = time.perf_counter() - start
+    response.headers["server-timing"] = timings.server_timing(elapsed)
     logger.info(
         "request",
         method=request.method,
         path=request.url.path,
         status=response.status_code,
         duration=round(elapsed, 4),
+        timing=timings.fields(),
     )
     return response
 
 
+class CancelOnDisconnectMiddleware:
+    """Cancel a request's handler when the client disconnects before the response is complete.
+
+    ASGI servers only report a disconnect through ``receive``, which handlers
+    that never read the body don't call, so an abandoned request would keep its
+    session and bandwidth until its Telegram calls finish. A pump task reads
+    ``receive`` on the handler's behalf and cancels it on ``http.disconnect``;
+    the cancelled request is answered (to nobody) with 499 so the outer
+    middleware still sees a response.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        messages: asyncio.Queue[Message] = asyncio.Queue()
+        started = complete = disconnected = False
+
+        async def tracking_send(message: Message) -> None:
+            nonlocal started, complete
+            if message["type"] == "http.response.start":
+                started = True
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                complete = True
+            await send(message)
+
+        handler: asyncio.Future[None] = asyncio.ensure_future(self.app(scope, messages.get, tracking_send))
+
+        async def pump() -> None:
+            nonlocal disconnected
+            while True:
+                message = await receive()
+                messages.put_nowait(message)
+                if message["type"] == "http.disconnect":
+                    if not complete:
+                        disconnected = True
+                        handler.cancel()
+                    return
+
+        pump_task = asyncio.create_task(pump())
+        try:
+            await handler
+        except asyncio.CancelledError:
+            current = asyncio.current_task()
+            if not disconnected or (current is not None and current.cancelling()):
+                raise
+            CLIENT_DISCONNECTS.inc()
+            logger.info("client_disconnected", method=scope["method"], path=scope["path"])
+            if not started:
+                await send({"type": "http.response.start", "status": 499, "headers": []})
+                await send({"type": "http.response.body", "body": b""})
+        finally:
+            pump_task.cancel()
+
+
+class Compressor(Protocol):
+    def compress(self, data: bytes) -> bytes: ...
+
+    def flush(self) -> bytes: ...
+
+    def finish(self) -> bytes: ...
+
+
+class GzipCompressor:
+    def __init__(self, level: int = 6) -> None:
+        self._obj = zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._obj.flush()
+
+
+class BrotliCompressor:
+    def __init__(self, quality: int = 4) -> None:
+        self._obj = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return bytes(self._obj.process(data))
+
+    def flush(self) -> bytes:
+        return bytes(self._obj.flush())
+
+    def finish(self) -> bytes:
+        return bytes(self._obj.finish())
+
+
+class ZstdCompressor:
+    def __init__(self, level: int = 3) -> None:
+        self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return bytes(self._obj.compress(data))
+
+    def flush(self) -> bytes:
+        return bytes(self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK))
+
+    def finish(self) -> bytes:
+        return bytes(self._obj.flush())
+
+
+def available_encodings() -> dict[str, Callable[[], Compressor]]:
+    encodings: dict[str, Callable[[], Compressor]] = {}
+    if zstandard is not None:
+        encodings["zstd"] = ZstdCompressor
+    if brotli is not None:
+        encodings["br"] = BrotliCompressor
+    encodings["gzip"] = GzipCompressor
+    return encodings
+
+
+def negotiate_encoding(accept_encoding: str, encodings: dict[str, Callable[[], Compressor]]) -> str | None:
+    """Pick the client's highest-weighted encoding, breaking ties by server preference."""
+    weights: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        key, _, value = params.strip().partition("=")
+        if key.strip() == "q":
+            try:
+                q = float(value)
+            except ValueError:
+                q = 0.0
+        weights[name.strip().lower()] = q
+    best: str | None = None
+    best_q = 0.0
+    for encoding in encodings:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class CompressionMiddleware:
+    """Negotiated gzip/br/zstd compression that also handles streaming bodies.
+
+    gzip is always available; br and zstd are offered when the ``brotli`` and
+    ``zstandard`` packages are installed.
+
+    Single-body responses below ``minimum_size`` are sent as-is; streamed
+    responses are compressed chunk by chunk and flushed so each chunk reaches
+    the client without waiting for the rest. Chunks of at least
+    ``thread_threshold`` bytes are compressed in a worker thread.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, thread_threshold: int = 256 * 1024) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.thread_threshold = thread_threshold
+        self.encodings = available_encodings()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await _CompressionResponder(self, encoding, send).run(scope, receive)
+
+
+class _CompressionResponder:
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send) -> None:
+        self.middleware = middleware
+        self.encoding = encoding
+        self.send = send
+        self.start: Message | None = None
+        self.compressor: Compressor | None = None
+
+    async def run(self, scope: Scope, receive: Receive) -> None:
+        await self.middleware.app(scope, receive, self.wrapped_send)
+
+    async def wrapped_send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+        elif message["type"] != "http.response.body":
+            await self.send(message)
+        elif self.start is not None:
+            await self._send_first_body(self.start, message)
+            self.start = None
+        else:
+            if self.compressor is not None:
+                message["body"] = await self._compress(message.get("body", b""), final=not message.get("more_body"))
+            await self.send(message)
+
+    async def _send_first_body(self, start: Message, message: Message) -> None:
+        headers = MutableHeaders(raw=start["headers"])
+        body: bytes = message.get("body", b"")
+        more_body: bool = message.get("more_body", False)
+        if (
+            "content-encoding" in headers
+            or headers.get("content-type", "").startswith(UNCOMPRESSIBLE_TYPES)
+            or (not more_body and len(body) < self.middleware.minimum_size)
+        ):
+            await self.send(start)
+            await self.send(message)
+            return
+
+        self.compressor = self.middleware.encodings[self.encoding]()
+        headers["content-encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        message["body"] = await self._compress(body, final=not more_body)
+        if more_body:
+            del headers["content-length"]
+        else:
+            headers["content-length"] = str(len(message["body"]))
+        await self.send(start)
+        await self.send(message)
+
+    async def _compress(self, data: bytes, final: bool) -> bytes:
+        if len(data) >= self.middleware.thread_threshold:
+            return await asyncio.to_thread(self._compress_sync, data, final)
+        return self._compress_sync(data, final)
+
+    def _compress_sync(self, data: bytes, final: bool) -> bytes:
+        assert self.compressor is not None
+        out = self.compressor.compress(data)
+        return out + (self.compressor.finish() if final else self.compressor.flush())
+
+
 def register_middleware(app: FastAPI) -> None:
+    if settings.workers > 1:
+        from src.core.sharding import worker_routing_middleware
+
+        app.middleware("http")(worker_routing_middleware)
+    if settings.cancel_on_disconnect:
+        app.add_middleware(CancelOnDisconnectMiddleware)
+    if settings.compression_enabled:
+        app.add_middleware(
+            CompressionMiddleware,
+            minimum_size=settings.compression_minimum_size,
+            thread_threshold=settings.compression_thread_threshold,
+        )
     app.middleware("http")(logging_middleware)
     app.middleware("http")(request_id_middleware)
     app.add_middleware(
@@ -0,0 +1,55 @@
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Any
+
+
+class PageBuffer:
+    def __init__(self, ttl: float, max_bytes: int) -> None:
+        self._ttl = ttl
+        self._max_bytes = max_bytes
+        self._entries: OrderedDict[Hashable, tuple[float, int, Any]] = OrderedDict()
+        self._bytes = 0
+
+    def get(self, key: Hashable) -> Any | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, _, value = entry
+        if expires_at <= time.monotonic():
+            self._drop(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: Any, size: int) -> bool:
+        if size > self._max_bytes:
+            return False
+        if key in self._entries:
+            self._drop(key)
+        self._evict(size)
+        self._entries[key] = (time.monotonic() + self._ttl, size, value)
+        self._bytes += size
+        return True
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key) is not None
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+
+    @property
+    def size(self) -> int:
+        return self._bytes
+
+    def _drop(self, key: Hashable) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def _evict(self, incoming: int) -> None:
+        now = time.monotonic()
+        for key in [k for k, (expires_at, _, _) in self._entries.items() if expires_at <= now]:
+            self._drop(key)
+        while self._entries and self._bytes + incoming > self._max_bytes:
+            self._drop(next(iter(self._entries)))
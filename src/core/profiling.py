@@ -0,0 +1,182 @@
+"""Runtime diagnostics behind the admin endpoints.
+
+:func:`collect_stacks` is a wall-clock sampling profiler: a helper thread
+reads ``sys._current_frames()`` every ``interval`` seconds and counts the
+stacks it sees, which :func:`collapse` turns into the ``frame;frame;frame N``
+format understood by flamegraph.pl, speedscope and friends. Only one profile
+can run at a time.
+
+:func:`dump_tasks` walks every asyncio task's await chain down to the
+innermost coroutine, so a request stuck inside a ``TelegramClient`` call shows
+which MTProto request it is waiting on. :class:`LoopLagMonitor` measures how
+late the event loop wakes up from a fixed sleep, which is what blocking code
+on the loop (large serialisations, sync I/O) looks like from the outside.
+"""
+
+import asyncio
+import os
+import statistics
+import sys
+import sysconfig
+import threading
+import time
+from collections import Counter, deque
+from collections.abc import Iterable
+from types import CodeType, FrameType
+from typing import Any
+
+from src.core.metrics import EVENT_LOOP_LAG, rpc_method
+
+_profiling = threading.Lock()
+_PATH_PREFIXES = sorted(
+    {p for p in (sysconfig.get_paths()["purelib"], sysconfig.get_paths()["stdlib"], os.getcwd()) if p},
+    key=len,
+    reverse=True,
+)
+
+
+def _short_path(filename: str) -> str:
+    for prefix in _PATH_PREFIXES:
+        if filename.startswith(prefix):
+            return filename[len(prefix) :].lstrip(os.sep)
+    return filename
+
+
+def _frame_label(code: CodeType) -> str:
+    return f"{code.co_qualname} ({_short_path(code.co_filename)})"
+
+
+def _stack(frame: FrameType | None) -> list[str]:
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    labels.reverse()
+    return labels
+
+
+def collect_stacks(seconds: float, interval: float = 0.005, thread_ids: Iterable[int] | None = None) -> Counter[str]:
+    """Sample the given threads (all but the sampler by default) for ``seconds``; blocking."""
+    if not _profiling.acquire(blocking=False):
+        raise RuntimeError("A profile is already running")
+    try:
+        own = threading.get_ident()
+        wanted = set(thread_ids) if thread_ids is not None else None
+        counts: Counter[str] = Counter()
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own or (wanted is not None and ident not in wanted):
+                    continue
+                stack = [names.get(ident, f"thread-{ident}"), *_stack(frame)]
+                counts[";".join(label.replace(";", ",") for label in stack)] += 1
+            time.sleep(interval)
+        return counts
+    finally:
+        _profiling.release()
+
+
+def collapse(counts: Counter[str]) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in counts.most_common())
+
+
+def _await_chain(awaitable: Any) -> tuple[list[FrameType], Any]:
+    """Frames along an await chain, outermost first, and the innermost non-coroutine awaitable."""
+    frames: list[FrameType] = []
+    seen = set()
+    while awaitable is not None and id(awaitable) not in seen:
+        seen.add(id(awaitable))
+        frame = getattr(awaitable, "cr_frame", None) or getattr(awaitable, "gi_frame", None)
+        if frame is None:
+            frame = getattr(awaitable, "ag_frame", None)
+        if frame is None:
+            return frames, awaitable
+        frames.append(frame)
+        awaitable = getattr(awaitable, "cr_await", None) or getattr(awaitable, "gi_yieldfrom", None)
+    return frames, None
+
+
+def _telegram_call(frames: list[FrameType]) -> str | None:
+    """The outermost Telethon frame of a chain, plus the MTProto request being sent if visible."""
+    entry = next((f for f in frames if f"{os.sep}telethon{os.sep}" in f.f_code.co_filename), None)
+    if entry is None:
+        return None
+    call = entry.f_code.co_qualname
+    request = next((f.f_locals.get("request") for f in frames if f.f_code.co_name == "_call"), None)
+    if request is not None:
+        call = f"{call} -> {rpc_method(request)}"
+    return call
+
+
+def dump_tasks() -> list[dict[str, Any]]:
+    tasks = []
+    for task in asyncio.all_tasks():
+        coro = task.get_coro()
+        frames, leaf = _await_chain(coro)
+        if task.cancelled():
+            state = "cancelled"
+        elif task.done():
+            state = "done"
+        else:
+            state = "pending"
+        tasks.append(
+            {
+                "name": task.get_name(),
+                "coro": getattr(coro, "__qualname__", type(coro).__name__),
+                "state": state,
+                "stack": [f"{_frame_label(f.f_code)}:{f.f_lineno}" for f in frames],
+                "awaiting": repr(leaf) if leaf is not None else None,
+                "telegram_call": _telegram_call(frames),
+            }
+        )
+    tasks.sort(key=lambda t: (t["telegram_call"] is None, t["name"]))
+    return tasks
+
+
+class LoopLagMonitor:
+    """Sleep ``interval`` in a loop and record how much later than asked the loop woke up."""
+
+    def __init__(self, interval: float = 0.5, window: int = 600) -> None:
+        self.interval = interval
+        self.samples: deque[float] = deque(maxlen=window)
+        self._task: asyncio.Task[None] | None = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="loop-lag-monitor")
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.record(max(0.0, loop.time() - start - self.interval))
+
+    def record(self, lag: float) -> None:
+        self.samples.append(lag)
+        EVENT_LOOP_LAG.observe(lag)
+
+    def stats(self) -> dict[str, Any]:
+        samples = sorted(self.samples)
+        if not samples:
+            return {"interval": self.interval, "samples": 0}
+
+        def ms(seconds: float) -> float:
+            return round(seconds * 1000, 2)
+
+        return {
+            "interval": self.interval,
+            "samples": len(samples),
+            "current_ms": ms(self.samples[-1]),
+            "mean_ms": ms(statistics.fmean(samples)),
+            "p50_ms": ms(samples[len(samples) // 2]),
+            "p99_ms": ms(samples[min(len(samples) - 1, int(len(samples) * 0.99))]),
+            "max_ms": ms(samples[-1]),
+        }
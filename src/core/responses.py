@@ -0,0 +1,16 @@
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from pydantic_core import to_json
+
+from src.core.timing import span
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        with span("render"):
+            return to_json(content)
+
+
+def to_ndjson_line(content: Any) -> bytes:
+    return to_json(content) + b"\n"
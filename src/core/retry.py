@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import asyncio
+import time
 from typing import TYPE_CHECKING, Any
 
 import structlog
@@ -11,7 +13,11 @@ from telethon.errors import (
     UserDeactivatedBanError,
 )
 
-from src.dependencies import get_session_pool
+from src.core.admission import current_priority
+from src.core.deadline import current_deadline, time_left
+from src.core.metrics import DEADLINES_EXCEEDED, IN_FLIGHT, RETRIES, SESSION_WAIT, session_label
+from src.core.timing import record_span, span
+from src.dependencies import get_admission_controller, get_session_pool
 
 if TYPE_CHECKING:
     from collections.abc import Callable, Coroutine
@@ -27,18 +33,60 @@ async def with_retry(
     func: Callable[..., Coroutine[Any, Any, Any]],
     *args: Any,
     **kwargs: Any,
+) -> Any:
+    # Admission wait and attempts all run under the request deadline; past it the call is cancelled.
+    try:
+        async with asyncio.timeout_at(current_deadline()) as timeout:
+            return await _admitted_call(func, *args, **kwargs)
+    except TimeoutError:
+        if not timeout.expired():
+            raise
+        logger.warning("deadline_exceeded", func=func.__name__)
+        DEADLINES_EXCEEDED.labels(func.__name__).inc()
+        raise HTTPException(status_code=504, detail="Deadline exceeded") from None
+
+
+async def _admitted_call(
+    func: Callable[..., Coroutine[Any, Any, Any]],
+    *args: Any,
+    **kwargs: Any,
+) -> Any:
+    admission = get_admission_controller()
+    if admission is None:
+        return await _call_with_retry(func, *args, **kwargs)
+    with span("admission_wait"):
+        await admission.acquire(current_priority())
+    start = time.perf_counter()
+    try:
+        return await _call_with_retry(func, *args, **kwargs)
+    finally:
+        admission.release(time.perf_counter() - start)
+
+
+async def _call_with_retry(
+    func: Callable[..., Coroutine[Any, Any, Any]],
+    *args: Any,
+    **kwargs: Any,
 ) -> Any:
     pool = await get_session_pool()
     last_error: Exception | None = None
     for attempt in range(MAX_RETRIES):
-        client: TelegramClient | None = await pool.get_next()
+        wait_start = time.perf_counter()
+        with span("session_wait"):
+            client: TelegramClient | None = await pool.get_next()
+        SESSION_WAIT.observe(time.perf_counter() - wait_start)
         if not client:
             logger.error("no_sessions", func=func.__name__)
             raise HTTPException(status_code=503, detail="No telegram sessions available")
+        in_flight = IN_FLIGHT.labels(session_label(client))
+        in_flight.inc()
+        attempt_start = time.perf_counter()
         try:
             return await func(client, *args, **kwargs)
         except FloodWaitError as e:
             logger.warning("flood_wait", seconds=e.seconds, attempt=attempt, func=func.__name__)
+            RETRIES.labels(func.__name__, "flood_wait").inc()
+            await pool.cooldown(client, e.seconds)
             last_error = e
         except (UserDeactivatedBanError, AuthKeyUnregisteredError) as e:
             logger.error(
@@ -49,11 +97,22 @@ async def with_retry(
                 func=func.__name__,
                 sessions_remaining=len(pool._clients) - 1,
             )
-            await pool.remove_client(client)
+            RETRIES.labels(func.__name__, "session_dead").inc()
+            await pool.remove_client(client, reason=type(e).__name__)
             last_error = e
         except UserBannedInChannelError as e:
             logger.warning("user_banned_in_channel", error=str(e), attempt=attempt, func=func.__name__)
+            RETRIES.labels(func.__name__, "banned_in_channel").inc()
             last_error = e
+        finally:
+            in_flight.dec()
+        elapsed = time.perf_counter() - attempt_start
+        record_span("retry", elapsed)
+        left = time_left()
+        if left is not None and attempt < MAX_RETRIES - 1 and left < elapsed:
+            # Another attempt would most likely be cut off by the deadline.
+            logger.warning("retry_skipped", func=func.__name__, attempt=attempt, time_left=round(left, 3))
+            break
     if isinstance(last_error, FloodWaitError):
         raise HTTPException(status_code=429, detail=f"Rate limited, retry after {last_error.seconds}s")
     if isinstance(last_error, (UserDeactivatedBanError, AuthKeyUnregisteredError)):
@@ -0,0 +1,215 @@
+import asyncio
+import base64
+import hashlib
+import json
+from collections.abc import Sequence
+from typing import TYPE_CHECKING, Any
+
+import structlog
+from fastapi import HTTPException
+
+from src.core.admission import Priority, use_priority
+from src.core.deadline import use_deadline
+from src.core.metrics import record_cache_lookup
+from src.core.page_buffer import PageBuffer
+from src.core.retry import with_retry
+from src.core.session_pool import prefer_session
+from src.services.telegram import (
+    compile_message_projector,
+    cursor_session,
+    decode_multi_cursor,
+    encode_multi_cursor,
+    merge_search_results,
+    search_posts,
+)
+
+if TYPE_CHECKING:
+    from src.core.shared_state import SharedState
+
+logger = structlog.get_logger()
+
+SearchPage = tuple[list[dict[str, Any]], str | None]
+SearchKey = tuple[str, str, int, frozenset[str] | None]
+SortKey = tuple[bool, str, int, int]
+
+MERGE_FIELDS = frozenset({"date", "channel"})
+
+MESSAGE_OVERHEAD_BYTES = 512
+
+
+def _page_size(page: SearchPage) -> int:
+    messages, _ = page
+    return sum(len(m.get("text") or "") + MESSAGE_OVERHEAD_BYTES for m in messages)
+
+
+def _sort_key(message: dict[str, Any]) -> SortKey:
+    """Newest-first order of merged results, made total by the channel and message id."""
+    channel = message.get("channel")
+    return (message.get("date") is not None, message.get("date") or "", channel["id"] if channel else 0, message["id"])
+
+
+def _resume_cursor(page: str | None, after: SortKey | None) -> str:
+    """Tag cursor that reads page ``page`` again, skipping messages up to and including ``after``."""
+    data: dict[str, Any] = {"page": page, "after": after}
+    session = cursor_session(page) if page else None
+    if session is not None:
+        # Keeps the request on the session that issued the page cursor.
+        data["s"] = session
+    return base64.urlsafe_b64encode(json.dumps(data).encode()).decode()
+
+
+def _read_cursor(cursor: str | None) -> tuple[str | None, SortKey | None]:
+    """Page cursor and resume point of a tag cursor; plain search cursors have no resume point."""
+    if not cursor:
+        return None, None
+    try:
+        decoded = json.loads(base64.urlsafe_b64decode(cursor))
+    except (ValueError, TypeError):
+        return cursor, None
+    if not isinstance(decoded, dict) or "page" not in decoded:
+        return cursor, None
+    after = decoded.get("after")
+    if after is not None and (not isinstance(after, list) or len(after) != 4):
+        raise ValueError("Invalid cursor")
+    return decoded["page"], (after[0], after[1], after[2], after[3]) if after is not None else None
+
+
+def _shared_key(key: SearchKey) -> str:
+    tag, cursor, limit, fields = key
+    raw = json.dumps([tag, cursor, limit, sorted(fields) if fields is not None else None])
+    return hashlib.sha1(raw.encode(), usedforsecurity=False).hexdigest()
+
+
+class SearchPrefetcher:
+    def __init__(
+        self, buffer: PageBuffer, depth: int, concurrency: int, state: "SharedState | None" = None, ttl: float = 60.0
+    ) -> None:
+        self._buffer = buffer
+        self._state = state
+        self._ttl = ttl
+        self._depth = depth
+        self._semaphore = asyncio.Semaphore(max(concurrency, 1))
+        self._inflight: dict[SearchKey, asyncio.Task[SearchPage | None]] = {}
+
+    async def fetch(self, tag: str, cursor: str | None, limit: int, fields: frozenset[str] | None = None) -> SearchPage:
+        page: SearchPage | None = None
+        if cursor:
+            key = (tag, cursor, limit, fields)
+            page = self._buffer.get(key)
+            result = "hit" if page is not None else "miss"
+            if page is None and key in self._inflight:
+                page = await asyncio.shield(self._inflight[key])
+                result = "inflight" if page is not None else "miss"
+            if page is None and self._state is not None:
+                # Another replica may have prefetched this page.
+                shared = await self._state.get_json("search", _shared_key(key))
+                if shared is not None:
+                    page = (shared[0], shared[1])
+                    result = "shared"
+            record_cache_lookup("search_prefetch", result)
+            logger.info("search_prefetch_lookup", tag=tag, hit=page is not None)
+        if page is None:
+            with prefer_session(cursor_session(cursor) if cursor else None):
+                page = await with_retry(search_posts, tag, cursor=cursor, limit=limit, fields=fields)
+        self._schedule(tag, page[1], limit, fields, self._depth)
+        return page
+
+    def _schedule(
+        self, tag: str, cursor: str | None, limit: int, fields: frozenset[str] | None, remaining: int
+    ) -> None:
+        if not cursor or remaining <= 0:
+            return
+        key = (tag, cursor, limit, fields)
+        if key in self._inflight:
+            return
+        buffered = self._buffer.get(key)
+        if buffered is not None:
+            self._schedule(tag, buffered[1], limit, fields, remaining - 1)
+            return
+        if self._semaphore.locked():
+            logger.debug("search_prefetch_skipped", tag=tag, reason="busy")
+            return
+        task = asyncio.create_task(self._prefetch(key, remaining))
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+    async def _prefetch(self, key: SearchKey, remaining: int) -> SearchPage | None:
+        tag, cursor, limit, fields = key
+        async with self._semaphore:
+            try:
+                # Speculative work goes to the back of the admission queue and outlives the request.
+                with prefer_session(cursor_session(cursor)), use_priority(Priority.EXPORT), use_deadline(None):
+                    page: SearchPage = await with_retry(search_posts, tag, cursor=cursor, limit=limit, fields=fields)
+            except HTTPException as e:
+                logger.warning("search_prefetch_failed", tag=tag, status=e.status_code, detail=e.detail)
+                return None
+            except Exception as e:
+                logger.error("search_prefetch_error", tag=tag, error=str(e))
+                return None
+        self._buffer.put(key, page, _page_size(page))
+        if self._state is not None:
+            await self._state.set_json(list(page), "search", _shared_key(key), ttl=self._ttl)
+        self._schedule(tag, page[1], limit, fields, remaining - 1)
+        return page
+
+    async def close(self) -> None:
+        tasks = list(self._inflight.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._buffer.clear()
+
+
+async def search_many(
+    prefetcher: SearchPrefetcher,
+    tags: Sequence[str],
+    cursor: str | None,
+    limit: int,
+    fields: frozenset[str] | None = None,
+) -> tuple[list[dict[str, Any]], str | None, dict[str, str]]:
+    """The ``limit`` newest matches across ``tags``.
+
+    Each tag's cursor points at the page its next message is on; a page that
+    was only partly returned is read again and resumed after the last
+    message returned from it.
+    """
+    cursors: dict[str, str | None] = decode_multi_cursor(cursor) if cursor else {}
+    active = [tag for tag in dict.fromkeys(tags) if tag not in cursors or cursors[tag]]
+    logger.info("search_many", tags=len(active), limit=limit)
+    fetch_fields = fields | MERGE_FIELDS if fields is not None else None
+    positions = {tag: _read_cursor(cursors.get(tag)) for tag in active}
+    results = await asyncio.gather(
+        *(prefetcher.fetch(tag, positions[tag][0], limit, fetch_fields) for tag in active), return_exceptions=True
+    )
+
+    pages: dict[str, SearchPage] = {}
+    next_cursors = {tag: cursors[tag] for tag in tags if tag in cursors}
+    errors: dict[str, str] = {}
+    for tag, result in zip(active, results, strict=True):
+        if isinstance(result, HTTPException):
+            errors[tag] = result.detail
+        elif isinstance(result, BaseException):
+            raise result
+        else:
+            messages, page_next = result
+            after = positions[tag][1]
+            if after is not None:
+                messages = [m for m in messages if _sort_key(m) < after]
+            pages[tag] = (messages, page_next)
+    if active and len(errors) == len(active):
+        first = next(r for r in results if isinstance(r, HTTPException))
+        raise first
+
+    merged = merge_search_results([messages for messages, _ in pages.values()])
+    merged = sorted(merged, key=_sort_key, reverse=True)[:limit]
+    boundary = _sort_key(merged[-1]) if merged else None
+    for tag, (messages, page_next) in pages.items():
+        returned = [key for key in map(_sort_key, messages) if boundary is None or key >= boundary]
+        if len(returned) == len(messages):
+            next_cursors[tag] = page_next
+        else:
+            next_cursors[tag] = _resume_cursor(positions[tag][0], min(returned, default=positions[tag][1]))
+
+    messages = list(map(compile_message_projector(fields), merged))
+    logger.info("search_many_done", tags=len(active), count=len(messages), errors=len(errors))
+    return messages, encode_multi_cursor(next_cursors), errors
@@ -1,23 +1,212 @@
 import asyncio
+import math
+import os
 import random
+import socket
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
 from itertools import cycle
 from pathlib import Path
+from typing import TYPE_CHECKING, Any, cast
 
 import structlog
 from telethon import TelegramClient
+from telethon.errors import FloodWaitError
 
 from src.config import settings
+from src.core.metrics import (
+    DOWNLOADED_BYTES,
+    SESSIONS_ACTIVE,
+    SESSIONS_REMOVED,
+    observe_rpc,
+    record_flood_wait,
+    rpc_method,
+    session_label,
+)
+from src.core.session_storage import BufferedSQLiteSession
+
+if TYPE_CHECKING:
+    from src.core.sharding import WorkerShard
+    from src.core.shared_state import SharedState
 
 logger = structlog.get_logger()
 
+_preferred_session: ContextVar[str | None] = ContextVar("preferred_session", default=None)
+
+
+@contextmanager
+def prefer_session(name: str | None) -> Iterator[None]:
+    """Make ``SessionPool.get_next`` hand out the named session while it is in the pool."""
+    token = _preferred_session.set(name)
+    try:
+        yield
+    finally:
+        _preferred_session.reset(token)
+
+
+class InstrumentedTelegramClient(TelegramClient):  # type: ignore[misc]
+    """TelegramClient that reports every MTProto request to the metrics, labelled by session file."""
+
+    def __init__(self, session: str, api_id: int, api_hash: str, buffered: bool = False) -> None:
+        super().__init__(BufferedSQLiteSession(session) if buffered else session, api_id, api_hash)
+        self.session_name = Path(session).name
+
+    async def _call(self, sender: Any, request: Any, ordered: bool = False, flood_sleep_threshold: Any = None) -> Any:
+        method = rpc_method(request)
+        flood_before = dict(self._flood_waited_requests)
+        start = time.time()
+        raised = False
+        try:
+            with observe_rpc(method, self.session_name):
+                return await super()._call(
+                    sender, request, ordered=ordered, flood_sleep_threshold=flood_sleep_threshold
+                )
+        except FloodWaitError as e:
+            raised = True
+            record_flood_wait(method, self.session_name, e.seconds, "raised")
+            raise
+        finally:
+            if not raised:
+                # Telethon sleeps through short flood waits itself; the only trace is a new due time.
+                for constructor_id, due in self._flood_waited_requests.items():
+                    if flood_before.get(constructor_id) != due:
+                        record_flood_wait(method, self.session_name, max(due - start, 0.0), "slept")
+
+    async def download_media(self, *args: Any, **kwargs: Any) -> Any:
+        result = await super().download_media(*args, **kwargs)
+        if isinstance(result, bytes):
+            DOWNLOADED_BYTES.labels(self.session_name).inc(len(result))
+        return result
+
 
 class SessionPool:
-    def __init__(self) -> None:
+    def __init__(self, shard: "WorkerShard | None" = None, state: "SharedState | None" = None) -> None:
+        self._shard = shard
+        self._state = state
+        self._owner = f"{socket.gethostname()}:{os.getpid()}"
         self._clients: list[TelegramClient] = []
         self._cycle: cycle[TelegramClient] | None = None
         self._lock = asyncio.Lock()
+        self._cooldowns: dict[str, float] = {}
+        self._leases: set[str] = set()
+        self._candidates: list[str] = []
+        self._share = 0
+        self._sync_task: asyncio.Task[None] | None = None
+        self._flush_task: asyncio.Task[None] | None = None
 
     async def init(self) -> None:
+        if settings.telegram_backend == "fake":
+            from src.core.fake_telegram import FakeBackendConfig, create_fake_clients
+
+            clients = create_fake_clients(settings.fake_sessions, FakeBackendConfig.from_settings())
+            owned = set(await self._claim([session_label(c) for c in clients]))
+            self._clients.extend(c for c in clients if session_label(c) in owned)
+            logger.warning("fake_telegram_backend", sessions=len(self._clients))
+        else:
+            await self._load_sessions()
+
+        if self._clients:
+            random.shuffle(self._clients)
+            self._cycle = cycle(self._clients)
+            logger.info("session_pool_ready", count=len(self._clients))
+        SESSIONS_ACTIVE.set(len(self._clients))
+        if self._state is not None:
+            self._sync_task = asyncio.create_task(self._sync(), name="session-pool-sync")
+        if any(isinstance(getattr(c, "session", None), BufferedSQLiteSession) for c in self._clients):
+            self._flush_task = asyncio.create_task(self._flush_periodically(), name="session-flush")
+
+    async def _claim(self, names: list[str]) -> list[str]:
+        """Narrow ``names`` to the sessions this process may connect: its worker share, then its replica leases."""
+        total = len(names)
+        if self._shard is not None:
+            names = self._shard.claim(names)
+        if self._state is None or settings.replicas <= 1 or not names:
+            return names
+        self._candidates = names
+        self._share = math.ceil(total / (settings.replicas * max(settings.workers, 1)))
+        won = await self._acquire_leases()
+        logger.info("session_leases_acquired", sessions=sorted(self._leases), share=self._share)
+        return won
+
+    async def _acquire_leases(self) -> list[str]:
+        """Lease unowned sessions of this worker's share until it is full; returns the names won."""
+        assert self._state is not None
+        won = []
+        for name in self._candidates:
+            if len(self._leases) >= self._share:
+                break
+            if name in self._leases:
+                continue
+            if await self._state.acquire_lease(name, self._owner, settings.session_lease_ttl):
+                self._leases.add(name)
+                won.append(name)
+        return won
+
+    async def _take_over(self) -> None:
+        """Connect sessions whose lease expired, e.g. because the replica holding them died."""
+        for name in await self._acquire_leases():
+            try:
+                client = await self._open_session(name)
+            except Exception as e:
+                logger.error("session_takeover_failed", session=name, error=str(e))
+                assert self._state is not None
+                self._leases.discard(name)
+                await self._state.release_lease(name, self._owner)
+                continue
+            if client is None:
+                continue
+            async with self._lock:
+                self._clients.append(client)
+                self._cycle = cycle(self._clients)
+                count = len(self._clients)
+            SESSIONS_ACTIVE.set(count)
+            logger.warning("session_taken_over", session=name, count=count)
+
+    async def _sync(self) -> None:
+        """Renew session leases, take over expired ones and pull cooldowns other replicas have published."""
+        assert self._state is not None
+        while True:
+            await asyncio.sleep(settings.state_sync_interval)
+            for name in list(self._leases):
+                if not await self._state.acquire_lease(name, self._owner, settings.session_lease_ttl):
+                    self._leases.discard(name)
+                    client = next((c for c in self._clients if session_label(c) == name), None)
+                    if client is not None:
+                        await self.remove_client(client, reason="lease_lost")
+            await self._take_over()
+            names = [session_label(c) for c in self._clients]
+            self._cooldowns.update(await self._state.get_cooldowns(names))
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(settings.session_flush_interval)
+            await self.flush()
+
+    async def flush(self) -> int:
+        """Write in-memory session changes to their ``.session`` files; returns how many were written."""
+        flushed = 0
+        for client in self.clients:
+            session = getattr(client, "session", None)
+            if not isinstance(session, BufferedSQLiteSession):
+                continue
+            try:
+                flushed += await session.flush()
+            except Exception as e:
+                logger.error("session_flush_failed", session=session_label(client), error=str(e))
+        if flushed:
+            logger.debug("sessions_flushed", count=flushed)
+        return flushed
+
+    async def cooldown(self, client: TelegramClient, seconds: float) -> None:
+        """Keep ``client`` out of rotation for ``seconds``, on every replica sharing the state."""
+        name = session_label(client)
+        self._cooldowns[name] = max(self._cooldowns.get(name, 0.0), time.time() + seconds)
+        if self._state is not None:
+            await self._state.set_cooldown(name, seconds)
+
+    async def _load_sessions(self) -> None:
         sessions_dir = Path(settings.sessions_dir)
         if not sessions_dir.exists():
             logger.warning("sessions_dir_not_found", path=str(sessions_dir))
@@ -28,39 +217,75 @@ class SessionPool:
             logger.warning("no_sessions_found", path=str(sessions_dir))
             return
 
-        for session_file in session_files:
-            session_path = str(session_file.with_suffix(""))
-            client = TelegramClient(session_path, settings.telegram_api_id, settings.telegram_api_hash)
-            await client.connect()
-            try:
-                if not await client.is_user_authorized():
-                    logger.warning("session_not_authorized", session=session_file.name)
-                    await client.disconnect()
-                    continue
-            except Exception:
-                await client.disconnect()
-                raise
-            self._clients.append(client)
-            logger.info("session_loaded", session=session_file.name)
+        for name in await self._claim([f.stem for f in session_files]):
+            client = await self._open_session(name)
+            if client is not None:
+                self._clients.append(client)
 
-        if self._clients:
-            random.shuffle(self._clients)
-            self._cycle = cycle(self._clients)
-            logger.info("session_pool_ready", count=len(self._clients))
+    async def _open_session(self, name: str) -> TelegramClient | None:
+        """Connected client for session ``name``, or None if the session is not authorized."""
+        if settings.telegram_backend == "fake":
+            from src.core.fake_telegram import FakeBackendConfig, FakeTelegramClient
+
+            return cast("TelegramClient", FakeTelegramClient(name, FakeBackendConfig.from_settings()))
+        session_file = Path(settings.sessions_dir) / f"{name}.session"
+        client = InstrumentedTelegramClient(
+            str(session_file.with_suffix("")),
+            settings.telegram_api_id,
+            settings.telegram_api_hash,
+            buffered=settings.session_storage == "memory",
+        )
+        await client.connect()
+        try:
+            if not await client.is_user_authorized():
+                logger.warning("session_not_authorized", session=session_file.name)
+                await client.disconnect()
+                return None
+        except Exception:
+            await client.disconnect()
+            raise
+        logger.info("session_loaded", session=session_file.name)
+        return client
 
     async def close(self) -> None:
+        for task in (self._sync_task, self._flush_task):
+            if task is not None:
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+        self._sync_task = self._flush_task = None
+        # Disconnecting closes each session, which flushes buffered ones one last time.
         for client in self._clients:
             await client.disconnect()
+        if self._state is not None:
+            for name in self._leases:
+                await self._state.release_lease(name, self._owner)
+        self._leases.clear()
         self._clients.clear()
         self._cycle = None
+        SESSIONS_ACTIVE.set(0)
 
     async def get_next(self) -> TelegramClient | None:
         async with self._lock:
             if not self._cycle:
                 return None
-            return next(self._cycle)
+            now = time.time()
+            preferred = _preferred_session.get()
+            if preferred is not None and self._cooldowns.get(preferred, 0.0) <= now:
+                for client in self._clients:
+                    if session_label(client) == preferred:
+                        return client
+            # Skip sessions cooling down after a flood wait; if all are, take the one that frees up first.
+            earliest: TelegramClient | None = None
+            for _ in range(len(self._clients)):
+                client = next(self._cycle)
+                until = self._cooldowns.get(session_label(client), 0.0)
+                if until <= now:
+                    return client
+                if earliest is None or until < self._cooldowns[session_label(earliest)]:
+                    earliest = client
+            return earliest
 
-    async def remove_client(self, client: TelegramClient) -> None:
+    async def remove_client(self, client: TelegramClient, reason: str = "unknown") -> None:
         async with self._lock:
             if client not in self._clients:
                 return
@@ -70,8 +295,14 @@ class SessionPool:
             else:
                 self._cycle = None
             remaining = len(self._clients)
+        SESSIONS_REMOVED.labels(reason).inc()
+        SESSIONS_ACTIVE.set(remaining)
         await client.disconnect()
-        logger.warning("session_removed", remaining=remaining)
+        logger.warning("session_removed", reason=reason, remaining=remaining)
+
+    @property
+    def clients(self) -> list[TelegramClient]:
+        return list(self._clients)
 
     @property
     def available(self) -> bool:
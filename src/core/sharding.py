@@ -0,0 +1,244 @@
+"""Session sharding for multi-worker deployments.
+
+With ``WORKERS`` > 1 (and uvicorn started with the same ``--workers``) every
+worker process claims at most ``ceil(sessions / workers)`` sessions by taking
+an exclusive ``flock`` on ``WORKER_DIR/<session>.lock``, so each account is
+connected from exactly one process. A lock file holds the owner's internal
+address: a unix socket on which the worker serves the same app.
+
+:func:`worker_routing_middleware` sends requests that need a session owned by
+another worker (search cursors are tied to the account that issued them) to
+that worker over its socket, and spreads requests from workers that own no
+sessions at all over their peers. Webhooks are a singleton role: only the
+worker holding the ``role.webhooks`` lock runs the dispatcher, and the webhook
+API is routed to it. Forwarded requests are marked with
+``x-worker-forwarded`` and never forwarded twice. A lock whose holder has died
+is released by the kernel, so stale lock files are ignored and their sessions
+go to the next worker that starts.
+"""
+
+import asyncio
+import contextlib
+import fcntl
+import math
+import os
+import random
+from collections.abc import Awaitable, Callable, Iterable, Iterator
+from pathlib import Path
+
+import httpx
+import structlog
+import uvicorn
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+
+from src.dependencies import get_worker_shard
+from src.services.telegram import cursor_session, decode_multi_cursor
+
+logger = structlog.get_logger()
+
+FORWARDED_HEADER = "x-worker-forwarded"
+HOP_HEADERS = frozenset({"host", "connection", "keep-alive", "transfer-encoding", "te", "upgrade"})
+LOCAL_PREFIXES = ("/api/admin", "/api/stream/ws")
+WEBHOOKS_ROLE = "role.webhooks"
+
+
+class _InternalServer(uvicorn.Server):
+    # The public server owns the process signals; this one is stopped from the lifespan.
+    @contextlib.contextmanager
+    def capture_signals(self) -> Iterator[None]:
+        yield
+
+
+class WorkerShard:
+    def __init__(self, lock_dir: Path, workers: int, address: str | None = None) -> None:
+        self.lock_dir = lock_dir
+        self.workers = max(workers, 1)
+        self.address = address or str(lock_dir / f"worker-{os.getpid()}.sock")
+        self._locks: dict[str, int] = {}
+        self._roles: dict[str, int] = {}
+        self._clients: dict[str, httpx.AsyncClient] = {}
+        self._server: _InternalServer | None = None
+        self._serve_task: asyncio.Task[None] | None = None
+
+    @property
+    def owned(self) -> frozenset[str]:
+        return frozenset(self._locks)
+
+    def owns(self, name: str) -> bool:
+        return name in self._locks
+
+    def _lock_path(self, name: str) -> Path:
+        return self.lock_dir / f"{name}.lock"
+
+    def claim(self, names: Iterable[str]) -> list[str]:
+        """Lock this worker's share of ``names`` and return the ones it now owns."""
+        names = sorted(names)
+        if not names:
+            return []
+        self.lock_dir.mkdir(parents=True, exist_ok=True)
+        share = math.ceil(len(names) / self.workers)
+        # Start at a per-process offset so workers booting together don't all race for the same files.
+        start = os.getpid() % len(names)
+        for name in names[start:] + names[:start]:
+            if len(self._locks) >= share:
+                break
+            fd = self._lock(name)
+            if fd is not None:
+                self._locks[name] = fd
+        claimed = sorted(self._locks)
+        logger.info("sessions_claimed", sessions=claimed, share=share, total=len(names), address=self.address)
+        return claimed
+
+    def claim_role(self, role: str) -> bool:
+        """Take a singleton role (e.g. running the webhook dispatcher) if no live worker has it."""
+        if role not in self._roles:
+            self.lock_dir.mkdir(parents=True, exist_ok=True)
+            fd = self._lock(role)
+            if fd is None:
+                return False
+            self._roles[role] = fd
+        return True
+
+    def _lock(self, name: str) -> int | None:
+        fd = os.open(self._lock_path(name), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return None
+        os.ftruncate(fd, 0)
+        os.write(fd, self.address.encode())
+        return fd
+
+    def owner(self, name: str) -> str | None:
+        """Address of the live worker that owns a session or role, or None if nobody holds it."""
+        if name in self._locks or name in self._roles:
+            return self.address
+        path = self._lock_path(name)
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except FileNotFoundError:
+            return None
+        try:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_SH | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return path.read_text() or None
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            return None
+        finally:
+            os.close(fd)
+
+    def peers(self) -> list[str]:
+        """Addresses of the other live workers that own sessions."""
+        locks = (path.stem for path in self.lock_dir.glob("*.lock") if not path.name.startswith("role."))
+        addresses = {self.owner(name) for name in locks}
+        return sorted(a for a in addresses if a and a != self.address)
+
+    def release(self) -> None:
+        for fd in [*self._locks.values(), *self._roles.values()]:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+        self._locks.clear()
+        self._roles.clear()
+
+    async def start(self, app: FastAPI) -> None:
+        self.lock_dir.mkdir(parents=True, exist_ok=True)
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self.address)
+        config = uvicorn.Config(app, uds=self.address, lifespan="off", access_log=False, log_config=None)
+        self._server = _InternalServer(config)
+        self._serve_task = asyncio.create_task(self._server.serve(), name="worker-internal-server")
+        while not self._server.started:
+            await asyncio.sleep(0.01)
+        logger.info("worker_internal_server_started", address=self.address)
+
+    async def close(self) -> None:
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+        if self._server is not None and self._serve_task is not None:
+            self._server.should_exit = True
+            await self._serve_task
+            self._server = None
+            self._serve_task = None
+        self.release()
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self.address)
+
+    def _client(self, address: str) -> httpx.AsyncClient:
+        client = self._clients.get(address)
+        if client is None:
+            transport = httpx.AsyncHTTPTransport(uds=address)
+            client = httpx.AsyncClient(transport=transport, base_url="http://worker", timeout=None)
+            self._clients[address] = client
+        return client
+
+    async def forward(self, request: Request, address: str) -> Response:
+        headers = [(k, v) for k, v in request.headers.raw if k.decode().lower() not in HOP_HEADERS]
+        headers.append((FORWARDED_HEADER.encode(), str(os.getpid()).encode()))
+        request_id = structlog.contextvars.get_contextvars().get("request_id")
+        if request_id and "x-request-id" not in request.headers:
+            headers.append((b"x-request-id", request_id.encode()))
+        client = self._client(address)
+        upstream_request = client.build_request(
+            request.method,
+            request.url.path,
+            params=request.url.query,
+            headers=headers,
+            content=await request.body(),
+        )
+        upstream = await client.send(upstream_request, stream=True)
+        response_headers = {k: v for k, v in upstream.headers.items() if k.lower() not in HOP_HEADERS}
+        return StreamingResponse(
+            upstream.aiter_raw(),
+            status_code=upstream.status_code,
+            headers=response_headers,
+            background=BackgroundTask(upstream.aclose),
+        )
+
+
+def request_session(request: Request) -> str | None:
+    """Session a request is bound to, from a single or multi-tag search cursor."""
+    cursor = request.query_params.get("cursor")
+    if not cursor:
+        return None
+    session = cursor_session(cursor)
+    if session is not None:
+        return session
+    try:
+        cursors = decode_multi_cursor(cursor)
+    except ValueError:
+        return None
+    return next((s for c in cursors.values() if c and (s := cursor_session(c))), None)
+
+
+def _target(shard: WorkerShard, request: Request) -> str | None:
+    if FORWARDED_HEADER in request.headers or not request.url.path.startswith("/api/"):
+        return None
+    if request.url.path.startswith(LOCAL_PREFIXES):
+        return None
+    if request.url.path.startswith("/api/webhooks"):
+        owner = shard.owner(WEBHOOKS_ROLE)
+        return owner if owner != shard.address else None
+    session = request_session(request)
+    if session is not None and not shard.owns(session):
+        return shard.owner(session)
+    if not shard.owned:
+        peers = shard.peers()
+        return random.choice(peers) if peers else None
+    return None
+
+
+async def worker_routing_middleware(request: Request, call_next: Callable[[Request], Awaitable[Response]]) -> Response:
+    shard = get_worker_shard()
+    address = _target(shard, request) if shard is not None else None
+    if shard is None or address is None:
+        return await call_next(request)
+    try:
+        return await shard.forward(request, address)
+    except httpx.TransportError as e:
+        logger.warning("worker_forward_failed", address=address, error=str(e))
+        return await call_next(request)
@@ -0,0 +1,347 @@
+"""State shared between replicas.
+
+Flood-wait cooldowns, session leases, resolved entities and search pages are
+kept in a :class:`StateBackend`. The default :class:`MemoryBackend` keeps the
+single-process behaviour; ``STATE_BACKEND=redis`` points every replica at the
+same Redis-protocol server (Redis, Valkey, KeyDB, ...) through the small RESP
+client below, so a cooldown one replica observes is honoured by all of them.
+
+The shared state is an optimisation: backend errors are logged and treated as
+cache misses, never surfaced to requests. Deadlines are wall-clock
+timestamps because they are compared across hosts.
+"""
+
+import asyncio
+import contextlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Protocol
+from urllib.parse import urlsplit
+
+import structlog
+from telethon.tl.types import InputPeerChannel, InputPeerChat, InputPeerUser
+from telethon.utils import get_input_peer
+
+from src.config import settings
+
+logger = structlog.get_logger()
+
+_state: "SharedState | None" = None
+
+
+class StateBackendError(RuntimeError):
+    pass
+
+
+class StateBackend(Protocol):
+    async def get(self, key: str) -> bytes | None: ...
+
+    async def mget(self, keys: list[str]) -> list[bytes | None]: ...
+
+    async def set(self, key: str, value: bytes, ttl: float | None = None, nx: bool = False) -> bool: ...
+
+    async def expire(self, key: str, ttl: float) -> bool: ...
+
+    async def delete(self, key: str) -> None: ...
+
+    async def close(self) -> None: ...
+
+
+class MemoryBackend:
+    """Process-local backend; least recently written keys are evicted past ``max_keys``."""
+
+    def __init__(self, max_keys: int = 100_000) -> None:
+        self._max_keys = max_keys
+        self._data: OrderedDict[str, tuple[bytes, float | None]] = OrderedDict()
+
+    def _live(self, key: str) -> bytes | None:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    async def get(self, key: str) -> bytes | None:
+        return self._live(key)
+
+    async def mget(self, keys: list[str]) -> list[bytes | None]:
+        return [self._live(key) for key in keys]
+
+    async def set(self, key: str, value: bytes, ttl: float | None = None, nx: bool = False) -> bool:
+        if nx and self._live(key) is not None:
+            return False
+        self._data.pop(key, None)
+        self._data[key] = (value, time.monotonic() + ttl if ttl is not None else None)
+        while len(self._data) > self._max_keys:
+            self._data.popitem(last=False)
+        return True
+
+    async def expire(self, key: str, ttl: float) -> bool:
+        value = self._live(key)
+        if value is None:
+            return False
+        self._data[key] = (value, time.monotonic() + ttl)
+        return True
+
+    async def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    async def close(self) -> None:
+        self._data.clear()
+
+
+class _RespConnection:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.reader = reader
+        self.writer = writer
+
+    async def command(self, *args: str | bytes) -> Any:
+        out = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            data = arg.encode() if isinstance(arg, str) else arg
+            out.append(b"$%d\r\n%b\r\n" % (len(data), data))
+        self.writer.write(b"".join(out))
+        await self.writer.drain()
+        return await self._reply()
+
+    async def _reply(self) -> Any:
+        line = await self.reader.readline()
+        if not line:
+            raise ConnectionError("Connection closed")
+        kind, body = line[:1], line[1:-2]
+        if kind == b"+":
+            return body.decode()
+        if kind == b"-":
+            raise StateBackendError(body.decode())
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            length = int(body)
+            if length < 0:
+                return None
+            data = await self.reader.readexactly(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            count = int(body)
+            return None if count < 0 else [await self._reply() for _ in range(count)]
+        raise StateBackendError(f"Unexpected reply {line!r}")
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+class RedisBackend:
+    """Minimal RESP2 client: GET/MGET/SET/PEXPIRE/DEL over a small connection pool."""
+
+    def __init__(self, url: str, pool_size: int = 8, timeout: float = 2.0) -> None:
+        parts = urlsplit(url)
+        self._host = parts.hostname or "localhost"
+        self._port = parts.port or 6379
+        self._password = parts.password
+        self._db = parts.path.lstrip("/") or "0"
+        self._timeout = timeout
+        self._idle: asyncio.LifoQueue[_RespConnection] = asyncio.LifoQueue()
+        self._slots = asyncio.Semaphore(pool_size)
+
+    async def _connect(self) -> _RespConnection:
+        reader, writer = await asyncio.open_connection(self._host, self._port)
+        connection = _RespConnection(reader, writer)
+        try:
+            if self._password:
+                await connection.command("AUTH", self._password)
+            if self._db != "0":
+                await connection.command("SELECT", self._db)
+        except BaseException:
+            connection.close()
+            raise
+        return connection
+
+    async def _command(self, *args: str | bytes) -> Any:
+        async with self._slots:
+            connection = self._idle.get_nowait() if not self._idle.empty() else None
+            try:
+                if connection is None:
+                    connection = await asyncio.wait_for(self._connect(), self._timeout)
+                result = await asyncio.wait_for(connection.command(*args), self._timeout)
+            except StateBackendError:
+                # An error reply leaves the connection in a clean state.
+                if connection is not None:
+                    self._idle.put_nowait(connection)
+                raise
+            except (OSError, TimeoutError, asyncio.IncompleteReadError) as e:
+                if connection is not None:
+                    connection.close()
+                raise StateBackendError(f"{type(e).__name__}: {e}") from e
+            except BaseException:
+                if connection is not None:
+                    connection.close()
+                raise
+            self._idle.put_nowait(connection)
+            return result
+
+    async def get(self, key: str) -> bytes | None:
+        return await self._command("GET", key)  # type: ignore[no-any-return]
+
+    async def mget(self, keys: list[str]) -> list[bytes | None]:
+        if not keys:
+            return []
+        return await self._command("MGET", *keys)  # type: ignore[no-any-return]
+
+    async def set(self, key: str, value: bytes, ttl: float | None = None, nx: bool = False) -> bool:
+        args: list[str | bytes] = ["SET", key, value]
+        if ttl is not None:
+            args += ["PX", str(max(int(ttl * 1000), 1))]
+        if nx:
+            args.append("NX")
+        return await self._command(*args) is not None
+
+    async def expire(self, key: str, ttl: float) -> bool:
+        return bool(await self._command("PEXPIRE", key, str(max(int(ttl * 1000), 1))))
+
+    async def delete(self, key: str) -> None:
+        await self._command("DEL", key)
+
+    async def close(self) -> None:
+        while not self._idle.empty():
+            self._idle.get_nowait().close()
+
+
+def _encode_peer(entity: Any) -> dict[str, Any] | None:
+    try:
+        peer = get_input_peer(entity)
+    except TypeError:
+        return None
+    if isinstance(peer, InputPeerChannel):
+        return {"type": "channel", "id": peer.channel_id, "access_hash": peer.access_hash}
+    if isinstance(peer, InputPeerUser):
+        return {"type": "user", "id": peer.user_id, "access_hash": peer.access_hash}
+    if isinstance(peer, InputPeerChat):
+        return {"type": "chat", "id": peer.chat_id}
+    return None
+
+
+def _decode_peer(data: dict[str, Any]) -> Any:
+    if data["type"] == "channel":
+        return InputPeerChannel(data["id"], data["access_hash"])
+    if data["type"] == "user":
+        return InputPeerUser(data["id"], data["access_hash"])
+    return InputPeerChat(data["id"])
+
+
+class SharedState:
+    def __init__(self, backend: StateBackend, prefix: str = "") -> None:
+        self.backend = backend
+        self.prefix = prefix
+
+    def _key(self, *parts: str) -> str:
+        return self.prefix + ":".join(parts)
+
+    async def get_json(self, *key: str) -> Any | None:
+        try:
+            raw = await self.backend.get(self._key(*key))
+        except StateBackendError as e:
+            logger.warning("shared_state_error", op="get", error=str(e))
+            return None
+        return json.loads(raw) if raw is not None else None
+
+    async def set_json(self, value: Any, *key: str, ttl: float | None = None) -> None:
+        try:
+            await self.backend.set(self._key(*key), json.dumps(value).encode(), ttl=ttl)
+        except StateBackendError as e:
+            logger.warning("shared_state_error", op="set", error=str(e))
+
+    async def set_cooldown(self, session: str, seconds: float) -> None:
+        await self.set_json(time.time() + seconds, "cooldown", session, ttl=seconds)
+
+    async def get_cooldowns(self, sessions: list[str]) -> dict[str, float]:
+        try:
+            values = await self.backend.mget([self._key("cooldown", s) for s in sessions])
+        except StateBackendError as e:
+            logger.warning("shared_state_error", op="mget", error=str(e))
+            return {}
+        return {s: float(v) for s, v in zip(sessions, values, strict=True) if v is not None}
+
+    async def acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        """Take or renew the lease on ``name``; False if another owner holds it or the backend is down.
+
+        Renewal is GET-then-PEXPIRE, which is fine as long as the TTL is much
+        longer than the renewal interval.
+        """
+        key = self._key("lease", name)
+        try:
+            if await self.backend.set(key, owner.encode(), ttl=ttl, nx=True):
+                return True
+            current = await self.backend.get(key)
+            return current == owner.encode() and await self.backend.expire(key, ttl)
+        except StateBackendError as e:
+            logger.warning("shared_state_error", op="lease", error=str(e))
+            return False
+
+    async def release_lease(self, name: str, owner: str) -> None:
+        key = self._key("lease", name)
+        try:
+            if await self.backend.get(key) == owner.encode():
+                await self.backend.delete(key)
+        except StateBackendError as e:
+            logger.warning("shared_state_error", op="release", error=str(e))
+
+    async def get_entity(self, session: str, peer: str) -> Any | None:
+        data = await self.get_json("entity", session, peer.lower())
+        return _decode_peer(data) if data else None
+
+    async def put_entity(self, session: str, peer: str, entity: Any) -> None:
+        data = _encode_peer(entity)
+        if data is not None:
+            await self.set_json(data, "entity", session, peer.lower(), ttl=settings.entity_cache_ttl)
+
+    async def get_discussion(self, session: str, channel: str) -> tuple[int | None, Any | None] | None:
+        """Linked discussion group id and input peer cached for ``channel``; ``(None, None)`` if it has none."""
+        data = await self.get_json("discussion", session, channel.lower())
+        if data is None:
+            return None
+        return data["id"], _decode_peer(data["peer"]) if data["peer"] else None
+
+    async def put_discussion(self, session: str, channel: str, linked_chat_id: int | None, entity: Any | None) -> None:
+        peer = _encode_peer(entity) if entity is not None else None
+        if linked_chat_id and peer is None:
+            return
+        await self.set_json(
+            {"id": linked_chat_id or None, "peer": peer},
+            "discussion",
+            session,
+            channel.lower(),
+            ttl=settings.discussion_cache_ttl,
+        )
+
+    async def close(self) -> None:
+        await self.backend.close()
+
+
+def create_backend() -> StateBackend:
+    if settings.state_backend == "redis":
+        return RedisBackend(settings.state_url)
+    return MemoryBackend()
+
+
+async def open_shared_state() -> SharedState:
+    global _state  # noqa: PLW0603
+    await close_shared_state()
+    _state = SharedState(create_backend(), settings.state_prefix)
+    logger.info("shared_state_ready", backend=settings.state_backend)
+    return _state
+
+
+async def close_shared_state() -> None:
+    global _state  # noqa: PLW0603
+    if _state is not None:
+        with contextlib.suppress(StateBackendError):
+            await _state.close()
+        _state = None
+
+
+def get_shared_state() -> SharedState | None:
+    return _state
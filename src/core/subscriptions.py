@@ -0,0 +1,129 @@
+import asyncio
+from collections.abc import Sequence
+from typing import Any
+
+import structlog
+from telethon import TelegramClient, events
+
+from src.core.metrics import session_label
+from src.core.retry import with_retry
+from src.core.session_pool import SessionPool
+from src.services.telegram import _serialize_message, get_channel_peer_id, is_channel_member
+
+logger = structlog.get_logger()
+
+
+class Subscription:
+    def __init__(self, channel_ids: frozenset[int], maxsize: int) -> None:
+        self.channel_ids = channel_ids
+        self.dropped = 0
+        self._queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue(maxsize)
+
+    def push(self, event: dict[str, Any]) -> None:
+        if self._queue.full():
+            self._queue.get_nowait()
+            self.dropped += 1
+        self._queue.put_nowait(event)
+
+    async def get(self) -> dict[str, Any]:
+        return await self._queue.get()
+
+
+class SubscriptionHub:
+    def __init__(self, pool: SessionPool, queue_size: int) -> None:
+        self._pool = pool
+        self._queue_size = queue_size
+        self._subscribers: dict[int, set[Subscription]] = {}
+        self._owners: dict[int, TelegramClient] = {}
+        self._attached: set[TelegramClient] = set()
+        self._lock = asyncio.Lock()
+
+    async def subscribe(self, channels: Sequence[str]) -> Subscription:
+        ids = await asyncio.gather(*(with_retry(get_channel_peer_id, c) for c in channels))
+        channel_ids = frozenset(ids)
+        subscription = Subscription(channel_ids, self._queue_size)
+        async with self._lock:
+            try:
+                for channel, channel_id in zip(channels, ids, strict=True):
+                    await self._assign(channel_id, channel)
+            except BaseException:
+                for channel_id in channel_ids - self._subscribers.keys():
+                    self._owners.pop(channel_id, None)
+                raise
+            for channel_id in channel_ids:
+                self._subscribers.setdefault(channel_id, set()).add(subscription)
+        logger.info("subscribed", channels=len(channel_ids), subscribers=self.subscriber_count)
+        return subscription
+
+    async def unsubscribe(self, subscription: Subscription) -> None:
+        # Under the lock, so it cannot release a channel a concurrent subscribe is assigning.
+        async with self._lock:
+            for channel_id in subscription.channel_ids:
+                subscribers = self._subscribers.get(channel_id)
+                if subscribers is None:
+                    continue
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[channel_id]
+                    self._owners.pop(channel_id, None)
+        logger.info("unsubscribed", dropped=subscription.dropped, subscribers=self.subscriber_count)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len({s for subscribers in self._subscribers.values() for s in subscribers})
+
+    async def _is_member(self, client: TelegramClient, channel: str) -> bool:
+        try:
+            return await is_channel_member(client, channel)
+        except Exception as e:
+            logger.warning("membership_check_failed", channel=channel, session=session_label(client), error=str(e))
+            return False
+
+    async def _assign(self, channel_id: int, channel: str) -> None:
+        """Make the least loaded session that has joined ``channel`` its owner; only members get its updates."""
+        clients = self._pool.clients
+        owner = self._owners.get(channel_id)
+        if owner in clients:
+            return
+        if not clients:
+            raise RuntimeError("No telegram sessions available")
+        load = {client: 0 for client in clients}
+        for assigned in self._owners.values():
+            if assigned in load:
+                load[assigned] += 1
+        for candidate in sorted(clients, key=lambda c: load[c]):
+            if await self._is_member(candidate, channel):
+                owner = candidate
+                break
+        else:
+            raise ValueError(f"No session has joined channel {channel}")
+        if owner not in self._attached:
+            owner.add_event_handler(self._on_new_message, events.NewMessage())
+            owner.add_event_handler(self._on_message_edited, events.MessageEdited())
+            self._attached.add(owner)
+        self._owners[channel_id] = owner
+
+    async def _on_new_message(self, event: Any) -> None:
+        self._dispatch("new_message", event)
+
+    async def _on_message_edited(self, event: Any) -> None:
+        self._dispatch("message_edited", event)
+
+    def _dispatch(self, kind: str, event: Any) -> None:
+        channel_id = event.chat_id
+        if self._owners.get(channel_id) is not event.client:
+            return
+        subscribers = self._subscribers.get(channel_id)
+        if not subscribers:
+            return
+        payload = {"event": kind, "channel_id": channel_id, "message": _serialize_message(event.message)}
+        for subscription in subscribers:
+            subscription.push(payload)
+
+    def close(self) -> None:
+        for client in self._attached:
+            client.remove_event_handler(self._on_new_message)
+            client.remove_event_handler(self._on_message_edited)
+        self._attached.clear()
+        self._owners.clear()
+        self._subscribers.clear()
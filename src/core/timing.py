@@ -0,0 +1,113 @@
+"""Per-request phase timing.
+
+``logging_middleware`` opens a :class:`RequestTimings` collector for every
+request; code on the request path wraps its phases in :func:`span`. The
+collected totals are returned as a ``Server-Timing`` header and as a
+``timing`` field on the ``request`` log line. Concurrent spans of the same
+name (e.g. parallel downloads) are summed, so phases can add up to more than
+the wall-clock total.
+
+When ``OTEL_ENABLED`` is set and the OpenTelemetry SDK is installed, every
+span is also exported over OTLP/HTTP.
+"""
+
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any
+
+import structlog
+
+from src.config import settings
+
+logger = structlog.get_logger()
+
+_current: ContextVar["RequestTimings | None"] = ContextVar("request_timings", default=None)
+_tracer: Any = None
+_provider: Any = None
+
+
+class RequestTimings:
+    def __init__(self) -> None:
+        self.start = time.perf_counter()
+        self.spans: dict[str, float] = {}
+        self.counts: dict[str, int] = {}
+
+    def add(self, name: str, duration: float) -> None:
+        self.spans[name] = self.spans.get(name, 0.0) + duration
+        self.counts[name] = self.counts.get(name, 0) + 1
+
+    def fields(self) -> dict[str, float]:
+        return {name: round(duration * 1000, 1) for name, duration in self.spans.items()}
+
+    def server_timing(self, total: float) -> str:
+        entries = [f"{name};dur={duration * 1000:.1f}" for name, duration in self.spans.items()]
+        entries.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(entries)
+
+
+@contextmanager
+def request_timings(name: str) -> Iterator[RequestTimings]:
+    timings = RequestTimings()
+    token = _current.set(timings)
+    try:
+        if _tracer is None:
+            yield timings
+        else:
+            with _tracer.start_as_current_span(name):
+                yield timings
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    timings = _current.get()
+    if timings is None and _tracer is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        if _tracer is None:
+            yield
+        else:
+            with _tracer.start_as_current_span(name):
+                yield
+    finally:
+        if timings is not None:
+            timings.add(name, time.perf_counter() - start)
+
+
+def record_span(name: str, duration: float) -> None:
+    timings = _current.get()
+    if timings is not None:
+        timings.add(name, duration)
+
+
+def configure_tracing() -> None:
+    global _tracer, _provider  # noqa: PLW0603
+    if not settings.otel_enabled:
+        return
+    try:
+        from opentelemetry import trace
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    except ImportError:
+        logger.warning("otel_unavailable", reason="opentelemetry-sdk / otlp exporter not installed")
+        return
+    _provider = TracerProvider(resource=Resource.create({"service.name": settings.app_name}))
+    _provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=settings.otel_endpoint)))
+    trace.set_tracer_provider(_provider)
+    _tracer = trace.get_tracer("telegram-scraper-service")
+    logger.info("otel_enabled", endpoint=settings.otel_endpoint)
+
+
+def shutdown_tracing() -> None:
+    global _tracer, _provider  # noqa: PLW0603
+    if _provider is not None:
+        _provider.shutdown()
+    _tracer = None
+    _provider = None
@@ -0,0 +1,242 @@
+import asyncio
+import ipaddress
+import json
+import random
+import shutil
+import time
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlsplit
+from uuid import uuid4
+
+import httpx
+import structlog
+
+from src.config import settings
+from src.core.subscriptions import Subscription, SubscriptionHub
+
+logger = structlog.get_logger()
+
+WEBHOOK_FILE = "webhook.json"
+FAILED_DIR = "failed"
+# Client errors that mean "try again later" rather than "this request is wrong".
+RETRYABLE_STATUSES = frozenset({408, 429})
+
+
+async def check_target(url: str) -> None:
+    """Refuse webhook URLs resolving to internal addresses unless the host is in ``WEBHOOK_ALLOWED_HOSTS``.
+
+    This only checks the addresses at registration time; it is not a defence against DNS rebinding.
+    """
+    host = urlsplit(url).hostname
+    if not host:
+        raise ValueError("Webhook URL has no host")
+    if host.lower() in {h.lower() for h in settings.webhook_allowed_hosts}:
+        return
+    try:
+        infos = await asyncio.get_running_loop().getaddrinfo(host, None)
+    except OSError as e:
+        raise ValueError(f"Webhook host {host} does not resolve") from e
+    for info in infos:
+        address = ipaddress.ip_address(info[4][0])
+        if not address.is_global or address.is_multicast:
+            raise ValueError(f"Webhook host {host} resolves to non-public address {address}")
+
+
+@dataclass
+class Webhook:
+    id: str
+    url: str
+    channels: list[str]
+    directory: Path
+    subscription: Subscription | None = None
+    wakeup: asyncio.Event = field(default_factory=asyncio.Event)
+    tasks: list[asyncio.Task[None]] = field(default_factory=list)
+
+    def pending_batches(self) -> list[Path]:
+        return sorted(self.directory.glob("batch-*.json"))
+
+
+def _write_json(path: Path, data: Any) -> None:
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(data))
+    tmp.replace(path)
+
+
+class WebhookDispatcher:
+    def __init__(
+        self,
+        hub: SubscriptionHub,
+        outbox_dir: Path,
+        batch_size: int,
+        batch_window: float,
+        max_attempts: int,
+        backoff_base: float,
+        backoff_max: float,
+        timeout: float,
+    ) -> None:
+        self._hub = hub
+        self._outbox_dir = outbox_dir
+        self._batch_size = batch_size
+        self._batch_window = batch_window
+        self._max_attempts = max_attempts
+        self._backoff_base = backoff_base
+        self._backoff_max = backoff_max
+        self._http = httpx.AsyncClient(timeout=timeout)
+        self._webhooks: dict[str, Webhook] = {}
+
+    async def start(self) -> None:
+        try:
+            self._outbox_dir.mkdir(parents=True, exist_ok=True)
+        except OSError as e:
+            logger.warning("webhook_outbox_unavailable", path=str(self._outbox_dir), error=str(e))
+            return
+        paths = await asyncio.to_thread(lambda: sorted(self._outbox_dir.glob(f"*/{WEBHOOK_FILE}")))
+        for path in paths:
+            try:
+                data = json.loads(await asyncio.to_thread(path.read_text))
+                webhook = Webhook(id=data["id"], url=data["url"], channels=data["channels"], directory=path.parent)
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                logger.warning("webhook_load_failed", path=str(path), error=str(e))
+                continue
+            self._webhooks[webhook.id] = webhook
+            await self._start(webhook)
+        logger.info("webhooks_loaded", count=len(self._webhooks))
+
+    async def create(self, url: str, channels: Sequence[str]) -> Webhook:
+        webhook_id = uuid4().hex
+        webhook = Webhook(id=webhook_id, url=url, channels=list(channels), directory=self._outbox_dir / webhook_id)
+        # Persist first: a subscription is only taken once nothing after it can fail.
+        await asyncio.to_thread(webhook.directory.mkdir, parents=True)
+        try:
+            await asyncio.to_thread(
+                _write_json,
+                webhook.directory / WEBHOOK_FILE,
+                {"id": webhook.id, "url": webhook.url, "channels": webhook.channels},
+            )
+            webhook.subscription = await self._hub.subscribe(webhook.channels)
+        except BaseException:
+            await asyncio.to_thread(shutil.rmtree, webhook.directory, True)
+            raise
+        self._webhooks[webhook.id] = webhook
+        await self._start(webhook)
+        logger.info("webhook_created", webhook_id=webhook.id, channels=len(webhook.channels))
+        return webhook
+
+    async def delete(self, webhook_id: str) -> bool:
+        webhook = self._webhooks.pop(webhook_id, None)
+        if webhook is None:
+            return False
+        await self._stop(webhook)
+        await asyncio.to_thread(shutil.rmtree, webhook.directory, True)
+        logger.info("webhook_deleted", webhook_id=webhook_id)
+        return True
+
+    def get(self, webhook_id: str) -> Webhook | None:
+        return self._webhooks.get(webhook_id)
+
+    @property
+    def webhooks(self) -> list[Webhook]:
+        return list(self._webhooks.values())
+
+    async def close(self) -> None:
+        for webhook in self._webhooks.values():
+            await self._stop(webhook)
+        self._webhooks.clear()
+        await self._http.aclose()
+
+    def _backoff(self, attempt: int) -> float:
+        return min(self._backoff_base * 2.0**attempt, self._backoff_max) * random.uniform(0.5, 1.0)
+
+    async def _start(self, webhook: Webhook) -> None:
+        webhook.tasks.append(asyncio.create_task(self._subscribe_loop(webhook)))
+        webhook.tasks.append(asyncio.create_task(self._delivery_loop(webhook)))
+
+    async def _subscribe_loop(self, webhook: Webhook) -> None:
+        """Subscribe until it succeeds, so a webhook whose channels failed to resolve at startup recovers."""
+        attempt = 0
+        while webhook.subscription is None:
+            try:
+                webhook.subscription = await self._hub.subscribe(webhook.channels)
+            except Exception as e:
+                delay = self._backoff(attempt)
+                logger.error("webhook_subscribe_failed", webhook_id=webhook.id, attempt=attempt, error=str(e))
+                attempt += 1
+                await asyncio.sleep(delay)
+        await self._batch_loop(webhook, webhook.subscription)
+
+    async def _stop(self, webhook: Webhook) -> None:
+        for task in webhook.tasks:
+            task.cancel()
+        await asyncio.gather(*webhook.tasks, return_exceptions=True)
+        webhook.tasks.clear()
+        if webhook.subscription is not None:
+            await self._hub.unsubscribe(webhook.subscription)
+            webhook.subscription = None
+
+    async def _batch_loop(self, webhook: Webhook, subscription: Subscription) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            events = [await subscription.get()]
+            deadline = loop.time() + self._batch_window
+            while len(events) < self._batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    events.append(await asyncio.wait_for(subscription.get(), timeout=remaining))
+                except TimeoutError:
+                    break
+            path = webhook.directory / f"batch-{time.time_ns():020d}.json"
+            await asyncio.to_thread(_write_json, path, {"webhook_id": webhook.id, "events": events})
+            webhook.wakeup.set()
+
+    async def _delivery_loop(self, webhook: Webhook) -> None:
+        while True:
+            try:
+                # Cleared before listing, so a batch written while the listing runs still wakes us.
+                webhook.wakeup.clear()
+                batches = await asyncio.to_thread(webhook.pending_batches)
+                if not batches:
+                    await webhook.wakeup.wait()
+                    continue
+                for path in batches:
+                    await self._deliver(webhook, path)
+            except Exception as e:
+                logger.exception("webhook_delivery_error", webhook_id=webhook.id, error=str(e))
+                await asyncio.sleep(self._backoff(0))
+
+    async def _deliver(self, webhook: Webhook, path: Path) -> None:
+        body = await asyncio.to_thread(path.read_bytes)
+        for attempt in range(self._max_attempts):
+            try:
+                response = await self._http.post(
+                    webhook.url, content=body, headers={"Content-Type": "application/json"}
+                )
+                if response.is_success:
+                    await asyncio.to_thread(path.unlink)
+                    logger.info("webhook_delivered", webhook_id=webhook.id, batch=path.name, attempt=attempt)
+                    return
+                error = f"HTTP {response.status_code}"
+                if response.is_client_error and response.status_code not in RETRYABLE_STATUSES:
+                    # The receiver rejected the batch itself; sending it again will not change its mind.
+                    logger.warning(
+                        "webhook_delivery_rejected",
+                        webhook_id=webhook.id,
+                        batch=path.name,
+                        attempt=attempt,
+                        error=error,
+                    )
+                    break
+            except httpx.HTTPError as e:
+                error = str(e) or type(e).__name__
+            logger.warning(
+                "webhook_delivery_failed", webhook_id=webhook.id, batch=path.name, attempt=attempt, error=error
+            )
+            await asyncio.sleep(self._backoff(attempt))
+        failed_dir = webhook.directory / FAILED_DIR
+        await asyncio.to_thread(failed_dir.mkdir, exist_ok=True)
+        await asyncio.to_thread(path.replace, failed_dir / path.name)
+        logger.error("webhook_batch_abandoned", webhook_id=webhook.id, batch=path.name, attempts=attempt + 1)
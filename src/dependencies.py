@@ -1,11 +1,68 @@
+from __future__ import annotations
+
+import secrets
+from typing import TYPE_CHECKING, Annotated
+
+from fastapi import Depends, FastAPI, Header, HTTPException, Query
+
+from src.config import settings
+from src.core.admission import Priority, set_priority
+from src.core.deadline import set_deadline
 from src.core.session_pool import SessionPool
+from src.core.shared_state import get_shared_state
+from src.services.telegram import MESSAGE_FIELDS
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
+    from src.core.admission import AdmissionController
+    from src.core.hot_channels import HotChannels
+    from src.core.profiling import LoopLagMonitor
+    from src.core.search_prefetch import SearchPrefetcher
+    from src.core.sharding import WorkerShard
+    from src.core.subscriptions import SubscriptionHub
+    from src.core.webhooks import WebhookDispatcher
 
+_worker_shard: WorkerShard | None = None
 _pool: SessionPool | None = None
+_admission: AdmissionController | None = None
+_search_prefetcher: SearchPrefetcher | None = None
+_hot_channels: HotChannels | None = None
+_subscription_hub: SubscriptionHub | None = None
+_webhook_dispatcher: WebhookDispatcher | None = None
+_loop_monitor: LoopLagMonitor | None = None
+
+
+async def init_worker_shard() -> None:
+    global _worker_shard  # noqa: PLW0603
+    if settings.workers <= 1:
+        return
+    from pathlib import Path
+
+    from src.core.sharding import WorkerShard
+
+    _worker_shard = WorkerShard(Path(settings.worker_dir), settings.workers)
+
+
+async def start_worker_shard(app: FastAPI) -> None:
+    if _worker_shard:
+        await _worker_shard.start(app)
+
+
+async def close_worker_shard() -> None:
+    global _worker_shard  # noqa: PLW0603
+    if _worker_shard:
+        await _worker_shard.close()
+        _worker_shard = None
+
+
+def get_worker_shard() -> WorkerShard | None:
+    return _worker_shard
 
 
 async def init_session_pool() -> None:
     global _pool  # noqa: PLW0603
-    _pool = SessionPool()
+    _pool = SessionPool(_worker_shard, get_shared_state())
     await _pool.init()
 
 
@@ -20,3 +77,219 @@ async def get_session_pool() -> SessionPool:
     if _pool is None:
         raise RuntimeError("Session pool not initialized")
     return _pool
+
+
+async def init_admission_controller() -> None:
+    global _admission  # noqa: PLW0603
+    if not settings.admission_enabled:
+        return
+    from src.core.admission import AdmissionController
+
+    pool = await get_session_pool()
+    _admission = AdmissionController(
+        lambda: len(pool.clients) * settings.admission_slots_per_session,
+        queue_limits=settings.admission_queue_limits,
+        max_wait=settings.admission_max_wait,
+    )
+
+
+async def close_admission_controller() -> None:
+    global _admission  # noqa: PLW0603
+    _admission = None
+
+
+def get_admission_controller() -> AdmissionController | None:
+    return _admission
+
+
+def request_class(priority: Priority) -> Callable[..., Awaitable[None]]:
+    """Route dependency setting the request's admission priority and deadline.
+
+    ``X-Priority`` can only lower the route's priority and ``X-Request-Timeout``
+    (seconds) can only shorten the class's default timeout.
+    """
+
+    async def dependency(
+        x_priority: Annotated[str | None, Header()] = None,
+        x_request_timeout: Annotated[float | None, Header(gt=0)] = None,
+    ) -> None:
+        effective = priority
+        if x_priority:
+            try:
+                requested = Priority[x_priority.strip().upper()]
+            except KeyError:
+                choices = ", ".join(p.label for p in Priority)
+                raise HTTPException(status_code=422, detail=f"Unknown priority, expected one of: {choices}") from None
+            effective = max(priority, requested)
+        set_priority(effective)
+        timeout = settings.request_timeouts.get(effective.label)
+        if x_request_timeout is not None:
+            timeout = x_request_timeout if timeout is None else min(timeout, x_request_timeout)
+        if timeout is not None:
+            set_deadline(timeout)
+
+    return dependency
+
+
+async def init_search_prefetcher() -> None:
+    global _search_prefetcher  # noqa: PLW0603
+    from src.core.page_buffer import PageBuffer
+    from src.core.search_prefetch import SearchPrefetcher
+
+    _search_prefetcher = SearchPrefetcher(
+        PageBuffer(ttl=settings.search_prefetch_ttl, max_bytes=settings.search_prefetch_max_bytes),
+        depth=settings.search_prefetch_pages,
+        concurrency=settings.search_prefetch_concurrency,
+        state=get_shared_state() if settings.state_backend != "memory" else None,
+        ttl=settings.search_prefetch_ttl,
+    )
+
+
+async def close_search_prefetcher() -> None:
+    global _search_prefetcher  # noqa: PLW0603
+    if _search_prefetcher:
+        await _search_prefetcher.close()
+        _search_prefetcher = None
+
+
+async def get_search_prefetcher() -> SearchPrefetcher:
+    if _search_prefetcher is None:
+        raise RuntimeError("Search prefetcher not initialized")
+    return _search_prefetcher
+
+
+async def init_hot_channels() -> None:
+    global _hot_channels  # noqa: PLW0603
+    from src.core.hot_channels import HotChannels
+    from src.core.page_buffer import PageBuffer
+
+    _hot_channels = HotChannels(
+        PageBuffer(ttl=settings.hot_cache_ttl, max_bytes=settings.hot_cache_max_bytes),
+        channels=settings.hot_channels,
+        learned=settings.hot_channels_learned,
+        min_hits=settings.hot_channels_min_hits,
+        halflife=settings.hot_channels_halflife,
+        refresh_after=settings.hot_cache_refresh,
+        page_size=settings.hot_cache_page_size,
+        interval=settings.hot_warm_interval,
+        idle_fraction=settings.hot_warm_idle_fraction,
+    )
+    _hot_channels.start()
+
+
+async def close_hot_channels() -> None:
+    global _hot_channels  # noqa: PLW0603
+    if _hot_channels:
+        await _hot_channels.close()
+        _hot_channels = None
+
+
+async def get_hot_channels() -> HotChannels:
+    if _hot_channels is None:
+        raise RuntimeError("Hot channels not initialized")
+    return _hot_channels
+
+
+async def init_subscription_hub() -> None:
+    global _subscription_hub  # noqa: PLW0603
+    from src.core.subscriptions import SubscriptionHub
+
+    _subscription_hub = SubscriptionHub(await get_session_pool(), queue_size=settings.stream_queue_size)
+
+
+async def close_subscription_hub() -> None:
+    global _subscription_hub  # noqa: PLW0603
+    if _subscription_hub:
+        _subscription_hub.close()
+        _subscription_hub = None
+
+
+async def get_subscription_hub() -> SubscriptionHub:
+    if _subscription_hub is None:
+        raise RuntimeError("Subscription hub not initialized")
+    return _subscription_hub
+
+
+async def init_webhook_dispatcher() -> None:
+    global _webhook_dispatcher  # noqa: PLW0603
+    from pathlib import Path
+
+    from src.core.sharding import WEBHOOKS_ROLE
+    from src.core.webhooks import WebhookDispatcher
+
+    if _worker_shard and not _worker_shard.claim_role(WEBHOOKS_ROLE):
+        # Another worker delivers webhooks; the routing middleware sends the webhook API there.
+        return
+    _webhook_dispatcher = WebhookDispatcher(
+        await get_subscription_hub(),
+        outbox_dir=Path(settings.webhook_outbox_dir),
+        batch_size=settings.webhook_batch_size,
+        batch_window=settings.webhook_batch_window,
+        max_attempts=settings.webhook_max_attempts,
+        backoff_base=settings.webhook_backoff_base,
+        backoff_max=settings.webhook_backoff_max,
+        timeout=settings.webhook_timeout,
+    )
+    await _webhook_dispatcher.start()
+
+
+async def close_webhook_dispatcher() -> None:
+    global _webhook_dispatcher  # noqa: PLW0603
+    if _webhook_dispatcher:
+        await _webhook_dispatcher.close()
+        _webhook_dispatcher = None
+
+
+async def get_webhook_dispatcher() -> WebhookDispatcher:
+    if _webhook_dispatcher is None:
+        raise RuntimeError("Webhook dispatcher not initialized")
+    return _webhook_dispatcher
+
+
+async def init_loop_monitor() -> None:
+    global _loop_monitor  # noqa: PLW0603
+    from src.core.profiling import LoopLagMonitor
+
+    _loop_monitor = LoopLagMonitor(interval=settings.loop_lag_interval)
+    _loop_monitor.start()
+
+
+async def close_loop_monitor() -> None:
+    global _loop_monitor  # noqa: PLW0603
+    if _loop_monitor:
+        await _loop_monitor.close()
+        _loop_monitor = None
+
+
+async def get_loop_monitor() -> LoopLagMonitor:
+    if _loop_monitor is None:
+        raise RuntimeError("Loop monitor not initialized")
+    return _loop_monitor
+
+
+def require_admin(x_admin_token: Annotated[str | None, Header()] = None) -> None:
+    # Without a configured token the admin routes do not exist as far as clients can tell.
+    if not settings.admin_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if x_admin_token is None or not secrets.compare_digest(x_admin_token, settings.admin_token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+def get_message_fields(
+    fields: str | None = Query(None, description="Comma-separated message fields to return, e.g. id,date,text"),
+) -> frozenset[str] | None:
+    if not fields:
+        return None
+    requested = frozenset(f.strip() for f in fields.split(",") if f.strip())
+    unknown = requested - MESSAGE_FIELDS
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    return requested
+
+
+MessageFields = Annotated[frozenset[str] | None, Depends(get_message_fields)]
+
+
+InteractivePriority = Depends(request_class(Priority.INTERACTIVE))
+BatchPriority = Depends(request_class(Priority.BATCH))
+ExportPriority = Depends(request_class(Priority.EXPORT))
@@ -1,6 +1,7 @@
 import logging
 from collections.abc import AsyncIterator
 from contextlib import asynccontextmanager
+from typing import Any
 
 import structlog
 from fastapi import FastAPI
@@ -8,25 +9,55 @@ from fastapi import FastAPI
 from src.api.router import router
 from src.config import settings
 from src.core.exceptions import register_exception_handlers
+from src.core.log_pipeline import QueueLoggerFactory, SamplingProcessor, start_log_sink, stop_log_sink
+from src.core.message_store import close_message_store, open_message_store
 from src.core.middleware import register_middleware
-from src.dependencies import close_session_pool, init_session_pool
+from src.core.shared_state import close_shared_state, open_shared_state
+from src.core.timing import configure_tracing, shutdown_tracing
+from src.dependencies import (
+    close_admission_controller,
+    close_hot_channels,
+    close_loop_monitor,
+    close_search_prefetcher,
+    close_session_pool,
+    close_subscription_hub,
+    close_webhook_dispatcher,
+    close_worker_shard,
+    init_admission_controller,
+    init_hot_channels,
+    init_loop_monitor,
+    init_search_prefetcher,
+    init_session_pool,
+    init_subscription_hub,
+    init_webhook_dispatcher,
+    init_worker_shard,
+    start_worker_shard,
+)
 
 logger = structlog.get_logger()
 
 
 def configure_logging() -> None:
     log_level: int = getattr(logging, settings.log_level.upper())
+    renderer = structlog.dev.ConsoleRenderer() if settings.debug else structlog.processors.JSONRenderer()
+    processors: list[Any] = [
+        structlog.contextvars.merge_contextvars,
+        structlog.processors.add_log_level,
+        SamplingProcessor(settings.log_sample_rates),
+        structlog.processors.StackInfoRenderer(),
+        structlog.processors.TimeStamper(fmt="iso"),
+    ]
+    logger_factory: Any
+    if settings.log_mode == "queued":
+        logger_factory = QueueLoggerFactory(start_log_sink(renderer, settings.log_queue_size))
+    else:
+        processors.append(renderer)
+        logger_factory = structlog.PrintLoggerFactory()
     structlog.configure(
-        processors=[
-            structlog.contextvars.merge_contextvars,
-            structlog.processors.add_log_level,
-            structlog.processors.StackInfoRenderer(),
-            structlog.processors.TimeStamper(fmt="iso"),
-            structlog.dev.ConsoleRenderer() if settings.debug else structlog.processors.JSONRenderer(),
-        ],
+        processors=processors,
         wrapper_class=structlog.make_filtering_bound_logger(log_level),
         context_class=dict,
-        logger_factory=structlog.PrintLoggerFactory(),
+        logger_factory=logger_factory,
         cache_logger_on_first_use=True,
     )
 
@@ -34,11 +65,33 @@ def configure_logging() -> None:
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     configure_logging()
+    configure_tracing()
     logger.info("startup", app_name=settings.app_name)
+    await init_loop_monitor()
+    await init_worker_shard()
+    await open_shared_state()
+    open_message_store()
     await init_session_pool()
+    await init_admission_controller()
+    await init_search_prefetcher()
+    await init_hot_channels()
+    await init_subscription_hub()
+    await init_webhook_dispatcher()
+    await start_worker_shard(app)
     yield
+    await close_webhook_dispatcher()
+    await close_subscription_hub()
+    await close_hot_channels()
+    await close_search_prefetcher()
+    await close_admission_controller()
     await close_session_pool()
+    close_message_store()
+    await close_shared_state()
+    await close_worker_shard()
+    await close_loop_monitor()
+    shutdown_tracing()
     logger.info("shutdown", app_name=settings.app_name)
+    stop_log_sink()
 
 
 def create_app() -> FastAPI:
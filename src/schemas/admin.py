@@ -0,0 +1,26 @@
+from pydantic import BaseModel
+
+
+class TaskInfo(BaseModel):
+    name: str
+    coro: str
+    state: str
+    stack: list[str]
+    awaiting: str | None
+    telegram_call: str | None
+
+
+class TaskDumpResponse(BaseModel):
+    tasks: list[TaskInfo]
+    count: int
+    in_telegram: int
+
+
+class LoopLagResponse(BaseModel):
+    interval: float
+    samples: int
+    current_ms: float | None = None
+    mean_ms: float | None = None
+    p50_ms: float | None = None
+    p99_ms: float | None = None
+    max_ms: float | None = None
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class SenderInfo(BaseModel):
@@ -35,22 +35,73 @@ class MessageSchema(BaseModel):
     grouped_id: int | None = None
 
 
+class CommentNode(MessageSchema):
+    reply_to_msg_id: int | None = None
+    replies: list["CommentNode"] = []
+
+
 class ChannelPostsResponse(BaseModel):
     messages: list[MessageSchema]
     count: int
 
 
+class BatchChannelQuery(BaseModel):
+    channel: str = Field(min_length=1)
+    offset_id: int = Field(0, ge=0)
+    min_id: int = Field(0, ge=0)
+    limit: int = Field(20, ge=1, le=100)
+
+
+class BatchPostsRequest(BaseModel):
+    channels: list[BatchChannelQuery] = Field(min_length=1, max_length=500)
+
+
+class BatchChannelPostsResult(BaseModel):
+    channel: str
+    messages: list[MessageSchema] = []
+    count: int = 0
+    status_code: int = 200
+    error: str | None = None
+
+
 class PostCommentsResponse(BaseModel):
     messages: list[MessageSchema]
     count: int
 
 
+class BatchCommentsRequest(BaseModel):
+    post_ids: list[int] = Field(min_length=1, max_length=100)
+    limit: int = Field(20, ge=1, le=100)
+
+
+class BatchCommentsResponse(BaseModel):
+    comments: dict[int, list[MessageSchema]]
+    count: int
+
+
+class PostCommentTree(BaseModel):
+    post: MessageSchema
+    comments: list[CommentNode]
+
+
+class CommentTreesResponse(BaseModel):
+    posts: list[PostCommentTree]
+    count: int
+
+
 class SearchPostsResponse(BaseModel):
     messages: list[MessageSchema]
     next_cursor: str | None = None
     count: int
 
 
+class MultiSearchPostsResponse(BaseModel):
+    messages: list[MessageSchema]
+    next_cursor: str | None = None
+    count: int
+    errors: dict[str, str] = {}
+
+
 class ChannelSearchResult(BaseModel):
     id: int
     title: str | None = None
@@ -95,3 +146,15 @@ class ChannelFullInfo(BaseModel):
     linked_chat_id: int | None = None
     broadcast: bool = False
     megagroup: bool = False
+
+
+class BatchInfoRequest(BaseModel):
+    channels: list[str] = Field(min_length=1, max_length=5000)
+    full: bool = False
+
+
+class BatchChannelInfoResult(BaseModel):
+    channel: str
+    info: ChannelFullInfo | None = None
+    status_code: int = 200
+    error: str | None = None
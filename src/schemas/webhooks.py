@@ -0,0 +1,19 @@
+from pydantic import AnyHttpUrl, BaseModel, Field
+
+
+class WebhookCreateRequest(BaseModel):
+    url: AnyHttpUrl
+    channels: list[str] = Field(min_length=1, max_length=100)
+
+
+class WebhookInfo(BaseModel):
+    id: str
+    url: str
+    channels: list[str]
+    pending_batches: int
+    active: bool
+
+
+class WebhookListResponse(BaseModel):
+    webhooks: list[WebhookInfo]
+    count: int
@@ -1,10 +1,15 @@
+import asyncio
 import base64
 import json
+from collections.abc import Awaitable, Callable, Sequence
+from datetime import datetime
+from functools import lru_cache
 from typing import Any
 
 import structlog
 from telethon import TelegramClient
-from telethon.tl.functions.channels import GetFullChannelRequest, SearchPostsRequest
+from telethon.errors import FloodWaitError, MultiError, RPCError
+from telethon.tl.functions.channels import GetChannelsRequest, GetFullChannelRequest, SearchPostsRequest
 from telethon.tl.functions.contacts import SearchRequest
 from telethon.tl.types import (
     Channel,
@@ -12,11 +17,24 @@ from telethon.tl.types import (
     InputPeerEmpty,
     User,
 )
-from telethon.utils import get_peer_id
+from telethon.utils import get_input_channel, get_peer_id
+
+from src.core.message_store import Fetch, get_message_store
+from src.core.metrics import record_cache_lookup, session_label
+from src.core.shared_state import SharedState, get_shared_state
+from src.core.timing import span
 
 logger = structlog.get_logger()
 
 
+def _isoformat(value: datetime | None) -> str | None:
+    """``value`` formatted the way pydantic serializes datetimes, so responses match the response models."""
+    if value is None:
+        return None
+    formatted = value.isoformat()
+    return formatted[:-6] + "Z" if formatted.endswith("+00:00") else formatted
+
+
 def _serialize_sender(sender: Any) -> dict[str, Any] | None:
     if not sender:
         return None
@@ -26,12 +44,15 @@ def _serialize_sender(sender: Any) -> dict[str, Any] | None:
             "first_name": sender.first_name,
             "last_name": sender.last_name,
             "username": sender.username,
+            "title": None,
         }
     if isinstance(sender, Channel):
         return {
             "id": sender.id,
-            "title": sender.title,
+            "first_name": None,
+            "last_name": None,
             "username": sender.username,
+            "title": sender.title,
         }
     return None
 
@@ -48,38 +69,176 @@ def _serialize_channel(chat: Any) -> dict[str, Any] | None:
     return None
 
 
-def _serialize_message(message: Any) -> dict[str, Any]:
+def _message_sender(message: Any) -> dict[str, Any] | None:
     try:
-        sender = _serialize_sender(message.sender)
+        return _serialize_sender(message.sender)
     except Exception:
-        sender = None
+        return None
 
+
+def _message_channel(message: Any) -> dict[str, Any] | None:
     try:
-        channel = _serialize_channel(message.chat)
+        return _serialize_channel(message.chat)
     except Exception:
-        channel = None
+        return None
 
-    return {
-        "id": message.id,
-        "date": message.date.isoformat() if message.date else None,
-        "text": message.text or "",
-        "views": message.views,
-        "forwards": message.forwards,
-        "replies_count": message.replies.replies if message.replies else None,
-        "edit_date": message.edit_date.isoformat() if message.edit_date else None,
-        "grouped_id": message.grouped_id,
-        "sender": sender,
-        "channel": channel,
-        "media": {"type": type(message.media).__name__} if message.media else None,
-    }
+
+# Keys and their order follow MessageSchema, so the JSON is what the response model would produce.
+_FIELD_GETTERS: dict[str, Callable[[Any], Any]] = {
+    "id": lambda m: m.id,
+    "date": lambda m: _isoformat(m.date),
+    "text": lambda m: m.text or "",
+    "views": lambda m: m.views,
+    "forwards": lambda m: m.forwards,
+    "replies_count": lambda m: m.replies.replies if m.replies else None,
+    "channel": _message_channel,
+    "sender": _message_sender,
+    "media": lambda m: {"type": type(m.media).__name__} if m.media else None,
+    "edit_date": lambda m: _isoformat(m.edit_date),
+    "grouped_id": lambda m: m.grouped_id,
+}
+
+MESSAGE_FIELDS = frozenset(_FIELD_GETTERS)
+
+MessageSerializer = Callable[[Any], dict[str, Any]]
+
+
+def _serialize_message(message: Any) -> dict[str, Any]:
+    return {name: getter(message) for name, getter in _FIELD_GETTERS.items()}
+
+
+@lru_cache(maxsize=128)
+def compile_message_serializer(fields: frozenset[str] | None = None) -> MessageSerializer:
+    if fields is None or fields >= MESSAGE_FIELDS:
+        return _serialize_message
+    getters = tuple((name, getter) for name, getter in _FIELD_GETTERS.items() if name in fields or name == "id")
+
+    def serialize(message: Any) -> dict[str, Any]:
+        return {name: getter(message) for name, getter in getters}
+
+    return serialize
+
+
+MessageProjector = Callable[[dict[str, Any]], dict[str, Any]]
+
+
+def _unprojected(message: dict[str, Any]) -> dict[str, Any]:
+    return message
+
+
+@lru_cache(maxsize=128)
+def compile_message_projector(fields: frozenset[str] | None = None) -> MessageProjector:
+    """Projection of fully serialized messages onto ``fields``, with the key list worked out once."""
+    if fields is None or fields >= MESSAGE_FIELDS:
+        return _unprojected
+    keys = tuple(name for name in _FIELD_GETTERS if name in fields or name == "id")
+
+    def project(message: dict[str, Any]) -> dict[str, Any]:
+        return {key: message[key] for key in keys}
+
+    return project
+
+
+async def _cached_peer(client: TelegramClient, channel: str) -> tuple[Any | None, SharedState | None, str]:
+    """Input peer this session resolved ``channel`` to before, possibly on another replica."""
+    state = get_shared_state()
+    session = session_label(client)
+    if state is None or session == "unknown":
+        return None, None, session
+    peer = await state.get_entity(session, channel)
+    record_cache_lookup("entity", "hit" if peer is not None else "miss")
+    return peer, state, session
 
 
 async def _resolve_entity(client: TelegramClient, channel: str) -> Any:
     try:
-        channel_id = int(channel)
+        peer: int | str = int(channel)
     except (ValueError, TypeError):
-        return await client.get_entity(channel)
-    return await client.get_entity(channel_id)
+        peer = channel
+    with span("resolve"):
+        cached, state, session = await _cached_peer(client, channel)
+        if cached is not None:
+            return cached
+        entity = await client.get_entity(peer)
+        if state is not None:
+            await state.put_entity(session, channel, entity)
+        return entity
+
+
+async def get_channel_peer_id(client: TelegramClient, channel: str) -> int:
+    entity = await _resolve_entity(client, channel)
+    return get_peer_id(entity)  # type: ignore[no-any-return]
+
+
+def _linked_chat(full: Any) -> tuple[int | None, Any | None]:
+    """Linked discussion group id of a full channel response and the group itself if it came along."""
+    linked_chat_id = getattr(full.full_chat, "linked_chat_id", None)
+    if not linked_chat_id:
+        return None, None
+    return linked_chat_id, next((c for c in full.chats if c.id == linked_chat_id), None)
+
+
+async def _put_discussion(client: TelegramClient, channel: str, linked_chat_id: int | None, linked: Any) -> None:
+    state = get_shared_state()
+    session = session_label(client)
+    if state is not None and session != "unknown":
+        await state.put_discussion(session, channel, linked_chat_id, linked)
+
+
+async def _learn_discussion(client: TelegramClient, channel: str, entity: Any, comment: Any) -> None:
+    """Cache the discussion group a comment of ``channel`` was posted in."""
+    chat: Any = getattr(comment, "chat", None)
+    if getattr(chat, "megagroup", False) and get_peer_id(chat) != get_peer_id(entity):
+        await _put_discussion(client, channel, chat.id, chat)
+
+
+async def _discussion_group(client: TelegramClient, channel: str) -> Any:
+    """Input peer of ``channel``'s linked discussion group, resolved once per session and cached."""
+    state = get_shared_state()
+    session = session_label(client)
+    if state is not None and session != "unknown":
+        cached = await state.get_discussion(session, channel)
+        record_cache_lookup("discussion", "hit" if cached is not None else "miss")
+        if cached is not None:
+            linked_chat_id, linked = cached
+            if not linked_chat_id:
+                raise ValueError(f"Channel {channel} has no linked discussion group")
+            return linked
+    entity = await _resolve_entity(client, channel)
+    with span("full_channel"):
+        r = await client(GetFullChannelRequest(entity))
+    linked_chat_id, linked = _linked_chat(r)
+    if linked_chat_id and linked is None:
+        with span("resolve"):
+            linked = await client.get_entity(linked_chat_id)
+    await _put_discussion(client, channel, linked_chat_id, linked)
+    if not linked_chat_id:
+        raise ValueError(f"Channel {channel} has no linked discussion group")
+    return linked
+
+
+def _history_fetcher(
+    client: TelegramClient,
+    entity: Any,
+    reply_to: int | None = None,
+    on_page: Callable[[Any], Awaitable[None]] | None = None,
+) -> Fetch:
+    """Fetcher for the message store, which keeps fully serialized messages.
+
+    Stored rows serve every later request whatever its ``fields``, so pages are
+    serialized in full here and callers project them with
+    :func:`compile_message_projector`. ``on_page`` is called with the first raw
+    message of every non-empty page.
+    """
+
+    async def fetch(offset_id: int, limit: int, min_id: int) -> list[dict[str, Any]]:
+        messages = client.iter_messages(entity, limit=limit, offset_id=offset_id, min_id=min_id, reply_to=reply_to)
+        raw = [message async for message in messages]
+        if raw and on_page is not None:
+            await on_page(raw[0])
+        return [_serialize_message(message) for message in raw]
+
+    return fetch
 
 
 async def get_channel_posts(
@@ -87,12 +246,24 @@ async def get_channel_posts(
     channel: str,
     offset_id: int = 0,
     limit: int = 20,
+    min_id: int = 0,
+    fields: frozenset[str] | None = None,
 ) -> list[dict[str, Any]]:
-    logger.info("get_channel_posts", channel=channel, offset_id=offset_id, limit=limit)
+    logger.info("get_channel_posts", channel=channel, offset_id=offset_id, min_id=min_id, limit=limit)
+    serialize = compile_message_serializer(fields)
     entity = await _resolve_entity(client, channel)
-    messages = []
-    async for message in client.iter_messages(entity, limit=limit, offset_id=offset_id):
-        messages.append(_serialize_message(message))
+    store = get_message_store()
+    with span("history"):
+        if store is None:
+            messages = [
+                serialize(message)
+                async for message in client.iter_messages(entity, limit=limit, offset_id=offset_id, min_id=min_id)
+            ]
+        else:
+            peer = get_peer_id(entity)
+            await store.remember(channel, peer)
+            stored = await store.history(peer, 0, offset_id, limit, min_id, _history_fetcher(client, entity))
+            messages = list(map(compile_message_projector(fields), stored))
     logger.info("get_channel_posts_done", channel=channel, count=len(messages))
     return messages
 
@@ -103,30 +274,189 @@ async def get_post_comments(
     post_id: int,
     offset_id: int = 0,
     limit: int = 20,
+    fields: frozenset[str] | None = None,
 ) -> list[dict[str, Any]]:
     logger.info("get_post_comments", channel=channel, post_id=post_id, offset_id=offset_id, limit=limit)
+    serialize = compile_message_serializer(fields)
     entity = await _resolve_entity(client, channel)
-    messages = []
-    async for message in client.iter_messages(entity, reply_to=post_id, limit=limit, offset_id=offset_id):
-        messages.append(_serialize_message(message))
+    store = get_message_store()
+
+    async def learn(comment: Any) -> None:
+        await _learn_discussion(client, channel, entity, comment)
+
+    with span("comments"):
+        if store is None:
+            raw = [
+                message
+                async for message in client.iter_messages(entity, reply_to=post_id, limit=limit, offset_id=offset_id)
+            ]
+            if raw:
+                await learn(raw[0])
+            messages = [serialize(message) for message in raw]
+        else:
+            fetch = _history_fetcher(client, entity, reply_to=post_id, on_page=learn)
+            stored = await store.history(get_peer_id(entity), post_id, offset_id, limit, 0, fetch)
+            messages = list(map(compile_message_projector(fields), stored))
     logger.info("get_post_comments_done", channel=channel, post_id=post_id, count=len(messages))
     return messages
 
 
-def _encode_cursor(offset_rate: int, offset_id: int, peer_id: int, peer_hash: int) -> str:
-    data = {"r": offset_rate, "i": offset_id, "p": peer_id, "h": peer_hash}
+async def _fetch_comments(
+    client: TelegramClient,
+    entity: Any,
+    post_ids: Sequence[int],
+    limit: int | None,
+    concurrency: int,
+) -> dict[int, list[Any]]:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch(post_id: int) -> list[Any]:
+        async with semaphore:
+            with span("comments"):
+                return [message async for message in client.iter_messages(entity, reply_to=post_id, limit=limit)]
+
+    threads = await asyncio.gather(*(fetch(post_id) for post_id in post_ids))
+    return dict(zip(post_ids, threads, strict=True))
+
+
+def _has_comments(message: Any) -> bool:
+    return bool(message and message.replies and message.replies.replies)
+
+
+async def get_posts_comments(
+    client: TelegramClient,
+    channel: str,
+    post_ids: Sequence[int],
+    limit: int = 20,
+    concurrency: int = 4,
+    fields: frozenset[str] | None = None,
+) -> dict[int, list[dict[str, Any]]]:
+    logger.info("get_posts_comments", channel=channel, posts=len(post_ids), limit=limit)
+    serialize = compile_message_serializer(fields)
+    entity = await _resolve_entity(client, channel)
+    with span("messages"):
+        posts = await client.get_messages(entity, ids=list(post_ids))
+    with_comments = [post.id for post in posts if _has_comments(post)]
+    threads = await _fetch_comments(client, entity, with_comments, limit, concurrency)
+    result = {post_id: [serialize(m) for m in threads.get(post_id, [])] for post_id in post_ids}
+    logger.info(
+        "get_posts_comments_done",
+        channel=channel,
+        fetched=len(with_comments),
+        count=sum(len(comments) for comments in result.values()),
+    )
+    return result
+
+
+def _build_comment_tree(comments: Sequence[Any], serialize: MessageSerializer) -> list[dict[str, Any]]:
+    nodes: dict[int, dict[str, Any]] = {}
+    for message in sorted(comments, key=lambda m: m.id):
+        reply_to = getattr(message, "reply_to", None)
+        nodes[message.id] = {
+            **serialize(message),
+            "reply_to_msg_id": getattr(reply_to, "reply_to_msg_id", None),
+            "replies": [],
+        }
+    roots = []
+    for node in nodes.values():
+        parent = nodes.get(node["reply_to_msg_id"])
+        if parent is not None:
+            parent["replies"].append(node)
+        else:
+            roots.append(node)
+    return roots
+
+
+async def get_comment_trees(
+    client: TelegramClient,
+    channel: str,
+    offset_id: int = 0,
+    limit: int = 20,
+    max_comments: int = 100,
+    concurrency: int = 4,
+    fields: frozenset[str] | None = None,
+) -> list[dict[str, Any]]:
+    logger.info("get_comment_trees", channel=channel, offset_id=offset_id, limit=limit, max_comments=max_comments)
+    serialize = compile_message_serializer(fields)
+    entity = await _resolve_entity(client, channel)
+    with span("history"):
+        posts = [message async for message in client.iter_messages(entity, limit=limit, offset_id=offset_id)]
+    threads = await _fetch_comments(
+        client, entity, [post.id for post in posts if _has_comments(post)], max_comments, concurrency
+    )
+    result = [
+        {"post": serialize(post), "comments": _build_comment_tree(threads.get(post.id, []), serialize)}
+        for post in posts
+    ]
+    logger.info("get_comment_trees_done", channel=channel, posts=len(result), threads=len(threads))
+    return result
+
+
+def _encode_cursor(offset_rate: int, offset_id: int, peer_id: int, peer_hash: int, session: str | None = None) -> str:
+    data: dict[str, Any] = {"r": offset_rate, "i": offset_id, "p": peer_id, "h": peer_hash}
+    if session is not None:
+        # The access hash is only valid for the account that saw it.
+        data["s"] = session
     return base64.urlsafe_b64encode(json.dumps(data).encode()).decode()
 
 
-def _decode_cursor(cursor: str) -> dict[str, int]:
+def _decode_cursor(cursor: str) -> dict[str, Any]:
     return json.loads(base64.urlsafe_b64decode(cursor))  # type: ignore[no-any-return]
 
 
+def cursor_session(cursor: str) -> str | None:
+    """Session that issued a search cursor, or None for old, multi-tag or malformed cursors."""
+    try:
+        decoded = _decode_cursor(cursor)
+    except (ValueError, TypeError):
+        return None
+    session = decoded.get("s") if isinstance(decoded, dict) else None
+    return session if isinstance(session, str) else None
+
+
+def encode_multi_cursor(cursors: dict[str, str | None]) -> str | None:
+    if not any(cursors.values()):
+        return None
+    return base64.urlsafe_b64encode(json.dumps(cursors).encode()).decode()
+
+
+def decode_multi_cursor(cursor: str) -> dict[str, str | None]:
+    try:
+        decoded = json.loads(base64.urlsafe_b64decode(cursor))
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(decoded, dict):
+        raise ValueError("Invalid cursor")
+    return decoded
+
+
+def _message_key(message: dict[str, Any]) -> tuple[int | None, int]:
+    channel = message.get("channel")
+    return (channel["id"] if channel else None, message["id"])
+
+
+def merge_search_results(pages: Sequence[list[dict[str, Any]]]) -> list[dict[str, Any]]:
+    seen: set[tuple[int | None, int]] = set()
+    merged = []
+    for message in sorted(
+        (m for page in pages for m in page),
+        key=lambda m: (m.get("date") is not None, m.get("date") or ""),
+        reverse=True,
+    ):
+        key = _message_key(message)
+        if key in seen:
+            continue
+        seen.add(key)
+        merged.append(message)
+    return merged
+
+
 async def search_posts(
     client: TelegramClient,
     tag: str,
     cursor: str | None = None,
     limit: int = 100,
+    fields: frozenset[str] | None = None,
 ) -> tuple[list[dict[str, Any]], str | None]:
     if cursor:
         decoded = _decode_cursor(cursor)
@@ -139,13 +469,23 @@ async def search_posts(
         offset_peer = InputPeerEmpty()
 
     logger.info("search_posts", tag=tag, offset_rate=offset_rate, offset_id=offset_id, limit=limit)
-    r = await client(SearchPostsRequest(tag, offset_rate, offset_peer, offset_id, min(limit, 100)))
+    with span("search"):
+        r = await client(
+            SearchPostsRequest(
+                hashtag=tag,
+                offset_rate=offset_rate,
+                offset_peer=offset_peer,
+                offset_id=offset_id,
+                limit=min(limit, 100),
+            )
+        )
 
     entities = {get_peer_id(en): en for en in r.chats + r.users}
+    serialize = compile_message_serializer(fields)
     messages = []
     for message in r.messages:
         message._finish_init(client, entities, message.peer_id)
-        messages.append(_serialize_message(message))
+        messages.append(serialize(message))
 
     next_cursor = None
     next_rate = getattr(r, "next_rate", None)
@@ -154,7 +494,9 @@ async def search_posts(
         last_peer_id = get_peer_id(last_msg.peer_id)
         last_chat = entities.get(last_peer_id)
         if last_chat and hasattr(last_chat, "access_hash"):
-            next_cursor = _encode_cursor(next_rate, last_msg.id, last_chat.id, last_chat.access_hash)
+            next_cursor = _encode_cursor(
+                next_rate, last_msg.id, last_chat.id, last_chat.access_hash, session_label(client)
+            )
 
     logger.info("search_posts_done", tag=tag, count=len(messages), has_next=next_cursor is not None)
     return messages, next_cursor
@@ -166,7 +508,8 @@ async def search_channels(
     limit: int = 20,
 ) -> list[dict[str, Any]]:
     logger.info("search_channels", query=query, limit=limit)
-    r = await client(SearchRequest(q=query, limit=limit))
+    with span("search"):
+        r = await client(SearchRequest(q=query, limit=limit))
     channels = []
     for chat in r.chats:
         if not isinstance(chat, Channel):
@@ -190,12 +533,15 @@ async def search_channel_messages(
     query: str,
     offset_id: int = 0,
     limit: int = 20,
+    fields: frozenset[str] | None = None,
 ) -> list[dict[str, Any]]:
     logger.info("search_channel_messages", channel=channel, query=query, offset_id=offset_id, limit=limit)
+    serialize = compile_message_serializer(fields)
     entity = await _resolve_entity(client, channel)
     messages = []
-    async for message in client.iter_messages(entity, search=query, limit=limit, offset_id=offset_id):
-        messages.append(_serialize_message(message))
+    with span("search"):
+        async for message in client.iter_messages(entity, search=query, limit=limit, offset_id=offset_id):
+            messages.append(serialize(message))
     logger.info("search_channel_messages_done", channel=channel, query=query, count=len(messages))
     return messages
 
@@ -206,17 +552,15 @@ async def search_comments(
     query: str,
     offset_id: int = 0,
     limit: int = 20,
+    fields: frozenset[str] | None = None,
 ) -> list[dict[str, Any]]:
     logger.info("search_comments", channel=channel, query=query, offset_id=offset_id, limit=limit)
-    entity = await _resolve_entity(client, channel)
-    r = await client(GetFullChannelRequest(entity))
-    linked_chat_id = getattr(r.full_chat, "linked_chat_id", None)
-    if not linked_chat_id:
-        raise ValueError(f"Channel {channel} has no linked discussion group")
-    linked_entity = await client.get_entity(linked_chat_id)
+    serialize = compile_message_serializer(fields)
+    linked_entity = await _discussion_group(client, channel)
     messages = []
-    async for message in client.iter_messages(linked_entity, search=query, limit=limit, offset_id=offset_id):
-        messages.append(_serialize_message(message))
+    with span("search"):
+        async for message in client.iter_messages(linked_entity, search=query, limit=limit, offset_id=offset_id):
+            messages.append(serialize(message))
     logger.info("search_comments_done", channel=channel, query=query, count=len(messages))
     return messages
 
@@ -226,23 +570,29 @@ async def get_channel_photos(
     channel: str,
     offset_id: int = 0,
     limit: int = 20,
+    fields: frozenset[str] | None = None,
 ) -> list[dict[str, Any]]:
     """Get posts with photos, downloading each as base64."""
     logger.info("get_channel_photos", channel=channel, offset_id=offset_id, limit=limit)
+    serialize = compile_message_serializer(fields)
     entity = await _resolve_entity(client, channel)
+    with span("history"):
+        messages = [message async for message in client.iter_messages(entity, limit=limit, offset_id=offset_id)]
     results = []
-    async for message in client.iter_messages(entity, limit=limit, offset_id=offset_id):
+    for message in messages:
         if not message.media or type(message.media).__name__ != "MessageMediaPhoto":
             continue
-        photo_bytes = await client.download_media(message, bytes)
+        with span("download"):
+            photo_bytes = await client.download_media(message, bytes)
         if not photo_bytes:
             continue
-        results.append(
-            {
-                **_serialize_message(message),
-                "photo_base64": base64.b64encode(photo_bytes).decode(),
-            }
-        )
+        with span("encode"):
+            results.append(
+                {
+                    **serialize(message),
+                    "photo_base64": base64.b64encode(photo_bytes).decode(),
+                }
+            )
     logger.info("get_channel_photos_done", channel=channel, count=len(results))
     return results
 
@@ -255,41 +605,149 @@ async def get_user_profile_photos(
     """Download all profile photos for a user as base64."""
     logger.info("get_user_profile_photos", user=user, limit=limit)
     entity = await _resolve_entity(client, user)
-    photos = await client.get_profile_photos(entity, limit=limit)
+    with span("history"):
+        photos = await client.get_profile_photos(entity, limit=limit)
     results = []
     for i, photo in enumerate(photos):
-        photo_bytes = await client.download_media(photo, bytes)
+        with span("download"):
+            photo_bytes = await client.download_media(photo, bytes)
         if not photo_bytes:
             continue
-        results.append(
-            {
-                "index": i,
-                "date": photo.date.isoformat() if photo.date else None,
-                "photo_base64": base64.b64encode(photo_bytes).decode(),
-            }
-        )
+        with span("encode"):
+            results.append(
+                {
+                    "index": i,
+                    "date": _isoformat(photo.date),
+                    "photo_base64": base64.b64encode(photo_bytes).decode(),
+                }
+            )
     logger.info("get_user_profile_photos_done", user=user, count=len(results))
     return results
 
 
-async def get_channel_info(
-    client: TelegramClient,
-    channel: str,
-) -> dict[str, Any]:
-    logger.info("get_channel_info", channel=channel)
-    entity = await _resolve_entity(client, channel)
-    r = await client(GetFullChannelRequest(entity))
-    chat = r.chats[0] if r.chats else entity
-    full = r.full_chat
-    result = {
+def _channel_info(chat: Any, full: Any | None = None) -> dict[str, Any]:
+    return {
         "id": chat.id,
         "title": getattr(chat, "title", None),
         "username": getattr(chat, "username", None),
         "about": getattr(full, "about", None),
-        "participants_count": getattr(full, "participants_count", None),
+        "participants_count": getattr(full or chat, "participants_count", None),
         "linked_chat_id": getattr(full, "linked_chat_id", None),
         "broadcast": getattr(chat, "broadcast", False),
         "megagroup": getattr(chat, "megagroup", False),
     }
+
+
+async def get_channel_info(
+    client: TelegramClient,
+    channel: str,
+) -> dict[str, Any]:
+    logger.info("get_channel_info", channel=channel)
+    entity = await _resolve_entity(client, channel)
+    with span("full_channel"):
+        r = await client(GetFullChannelRequest(entity))
+    chat = r.chats[0] if r.chats else entity
+    result = _channel_info(chat, r.full_chat)
+    await _put_discussion(client, channel, *_linked_chat(r))
     logger.info("get_channel_info_done", channel=channel)
     return result
+
+
+def _info_result(channel: str, info: dict[str, Any]) -> dict[str, Any]:
+    return {"channel": channel, "info": info, "status_code": 200, "error": None}
+
+
+def _info_error(channel: str, status_code: int, error: str) -> dict[str, Any]:
+    return {"channel": channel, "info": None, "status_code": status_code, "error": error}
+
+
+async def _resolve_input_channel(client: TelegramClient, channel: str) -> Any:
+    try:
+        peer: int | str = int(channel)
+    except (ValueError, TypeError):
+        peer = channel
+    with span("resolve"):
+        cached, state, session = await _cached_peer(client, channel)
+        if cached is not None:
+            return get_input_channel(cached)
+        entity = await client.get_input_entity(peer)
+        if state is not None:
+            await state.put_entity(session, channel, entity)
+        return get_input_channel(entity)
+
+
+async def is_channel_member(client: TelegramClient, channel: str) -> bool:
+    """Whether this session's account has joined ``channel`` and so receives its updates."""
+    input_channel = await _resolve_input_channel(client, channel)
+    with span("channels"):
+        r = await client(GetChannelsRequest([input_channel]))
+    return bool(r.chats) and not r.chats[0].left
+
+
+def _full_channel_info(r: Any) -> dict[str, Any]:
+    full = r.full_chat
+    chat = next((c for c in r.chats if c.id == full.id), r.chats[0] if r.chats else full)
+    return _channel_info(chat, full)
+
+
+async def get_channels_info(
+    client: TelegramClient,
+    channels: Sequence[str],
+    full: bool = False,
+    concurrency: int = 4,
+) -> list[dict[str, Any]]:
+    logger.info("get_channels_info", count=len(channels), full=full)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def resolve(channel: str) -> Any:
+        # Uncached usernames cost a ResolveUsername call each, which Telegram floods quickly.
+        async with semaphore:
+            return await _resolve_input_channel(client, channel)
+
+    resolved = await asyncio.gather(*(resolve(channel) for channel in channels), return_exceptions=True)
+    results: list[dict[str, Any]] = []
+    known: list[tuple[str, Any]] = []
+    for channel, input_channel in zip(channels, resolved, strict=True):
+        if isinstance(input_channel, FloodWaitError):
+            raise input_channel
+        if isinstance(input_channel, (ValueError, TypeError)):
+            results.append(_info_error(channel, 404, str(input_channel)))
+        elif isinstance(input_channel, RPCError):
+            results.append(_info_error(channel, input_channel.code or 500, str(input_channel)))
+        elif isinstance(input_channel, BaseException):
+            raise input_channel
+        else:
+            known.append((channel, input_channel))
+
+    if known and full:
+        requests = [GetFullChannelRequest(input_channel) for _, input_channel in known]
+        try:
+            with span("full_channel"):
+                responses: list[Any] = await client(requests)
+            errors: list[BaseException | None] = [None] * len(requests)
+        except MultiError as e:
+            responses, errors = e.results, e.exceptions
+        except RPCError as e:
+            responses, errors = [None], [e]
+        for error in errors:
+            if isinstance(error, FloodWaitError):
+                raise error
+        for (channel, _), response, error in zip(known, responses, errors, strict=True):
+            if error is not None:
+                results.append(_info_error(channel, getattr(error, "code", None) or 500, str(error)))
+            else:
+                results.append(_info_result(channel, _full_channel_info(response)))
+                await _put_discussion(client, channel, *_linked_chat(response))
+    elif known:
+        with span("channels"):
+            r = await client(GetChannelsRequest([input_channel for _, input_channel in known]))
+        chats = {chat.id: chat for chat in r.chats}
+        for channel, input_channel in known:
+            chat = chats.get(input_channel.channel_id)
+            if chat is None:
+                results.append(_info_error(channel, 404, f"Channel {channel} not returned by Telegram"))
+            else:
+                results.append(_info_result(channel, _channel_info(chat)))
+
+    logger.info("get_channels_info_done", count=len(channels), ok=sum(1 for r in results if r["info"]))
+    return results
@@ -0,0 +1,53 @@
+from collections.abc import Iterator
+
+import pytest
+from httpx import AsyncClient
+from src.config import settings
+from src.core.profiling import LoopLagMonitor
+from src.dependencies import get_loop_monitor
+from src.main import app
+
+HEADERS = {"X-Admin-Token": "secret"}
+
+
+@pytest.fixture
+def admin_token(monkeypatch: pytest.MonkeyPatch) -> Iterator[None]:
+    monkeypatch.setattr(settings, "admin_token", "secret")
+    monitor = LoopLagMonitor(interval=0.5)
+    monitor.record(0.004)
+    app.dependency_overrides[get_loop_monitor] = lambda: monitor
+    yield
+    app.dependency_overrides.pop(get_loop_monitor, None)
+
+
+class TestAdminEndpoints:
+    async def test_hidden_without_token_configured(self, client: AsyncClient) -> None:
+        response = await client.get("/api/admin/tasks", headers=HEADERS)
+        assert response.status_code == 404
+
+    async def test_rejects_wrong_token(self, client: AsyncClient, admin_token: None) -> None:
+        response = await client.get("/api/admin/tasks", headers={"X-Admin-Token": "nope"})
+        assert response.status_code == 403
+        response = await client.get("/api/admin/tasks")
+        assert response.status_code == 403
+
+    async def test_tasks(self, client: AsyncClient, admin_token: None) -> None:
+        response = await client.get("/api/admin/tasks", headers=HEADERS)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["count"] == len(data["tasks"]) >= 1
+
+    async def test_loop(self, client: AsyncClient, admin_token: None) -> None:
+        response = await client.get("/api/admin/loop", headers=HEADERS)
+        assert response.status_code == 200
+        assert response.json()["current_ms"] == 4.0
+
+    async def test_profile(self, client: AsyncClient, admin_token: None) -> None:
+        response = await client.get("/api/admin/profile", params={"seconds": 0.05, "interval_ms": 1}, headers=HEADERS)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert response.text.startswith("MainThread;")
+
+    async def test_profile_duration_is_capped(self, client: AsyncClient, admin_token: None) -> None:
+        response = await client.get("/api/admin/profile", params={"seconds": 3600}, headers=HEADERS)
+        assert response.status_code == 422
@@ -1,9 +1,15 @@
-from unittest.mock import AsyncMock, MagicMock
+import asyncio
+import json
+from typing import Any
+from unittest.mock import AsyncMock, MagicMock, patch
 
 from httpx import AsyncClient
+from src.core.admission import AdmissionController, Priority, current_priority
+from src.core.deadline import current_deadline
 from telethon.errors import FloodWaitError
+from telethon.tl.types import InputPeerChannel
 
-from tests.conftest import AsyncIter, make_mock_message
+from tests.conftest import AsyncIter, make_mock_channel, make_mock_message
 
 
 class TestChannelPostsEndpoint:
@@ -14,6 +20,8 @@ class TestChannelPostsEndpoint:
         assert "messages" in data
         assert "count" in data
         assert data["count"] == 3
+        assert data["messages"][0]["sender"]["username"] == "testuser"
+        assert data["messages"][0]["date"].startswith("2025-01-01T00:00:00")
 
     async def test_with_pagination_params(self, test_client: AsyncClient) -> None:
         response = await test_client.get("/api/channels/testchannel/posts", params={"offset_id": 50, "limit": 10})
@@ -27,6 +35,16 @@ class TestChannelPostsEndpoint:
         response = await test_client.get("/api/channels/testchannel/posts", params={"offset_id": -1})
         assert response.status_code == 422
 
+    async def test_fields_projection(self, test_client: AsyncClient) -> None:
+        response = await test_client.get("/api/channels/testchannel/posts", params={"fields": "date,text"})
+        assert response.status_code == 200
+        assert set(response.json()["messages"][0]) == {"id", "date", "text"}
+
+    async def test_unknown_field(self, test_client: AsyncClient) -> None:
+        response = await test_client.get("/api/channels/testchannel/posts", params={"fields": "text,secret"})
+        assert response.status_code == 422
+        assert "secret" in response.json()["detail"]
+
 
 class TestPostCommentsEndpoint:
     async def test_success(self, test_client: AsyncClient) -> None:
@@ -82,3 +100,180 @@ class TestFloodWaitRetry:
         response = await test_client.get("/api/channels/testchannel/posts")
         assert response.status_code == 429
         assert "Rate limited" in response.json()["detail"]
+
+
+class TestAdmission:
+    async def test_shed_with_retry_after(self, test_client: AsyncClient) -> None:
+        limits = {"interactive": 0, "batch": 0, "export": 0}
+        controller = AdmissionController(1, queue_limits=limits, max_wait={})
+        await controller.acquire(Priority.EXPORT)
+        with patch("src.core.retry.get_admission_controller", return_value=controller):
+            response = await test_client.get("/api/channels/testchannel/posts")
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "1"
+        assert controller.active == 1
+
+    async def test_route_priorities(self, test_client: AsyncClient, mock_client: AsyncMock) -> None:
+        seen: list[Priority] = []
+
+        async def get_entity(*args: Any) -> MagicMock:
+            seen.append(current_priority())
+            return MagicMock()
+
+        mock_client.get_entity = AsyncMock(side_effect=get_entity)
+        await test_client.get("/api/channels/testchannel/posts")
+        await test_client.get("/api/channels/testchannel/posts", headers={"X-Priority": "export"})
+        await test_client.post(
+            "/api/channels/batch/posts",
+            json={"channels": [{"channel": "a"}]},
+            headers={"X-Priority": "interactive"},
+        )
+        assert seen == [Priority.INTERACTIVE, Priority.EXPORT, Priority.BATCH]
+
+    async def test_unknown_priority(self, test_client: AsyncClient) -> None:
+        response = await test_client.get("/api/channels/testchannel/posts", headers={"X-Priority": "urgent"})
+        assert response.status_code == 422
+
+
+class TestDeadlines:
+    async def test_slow_call_is_cancelled(self, test_client: AsyncClient, mock_client: AsyncMock) -> None:
+        cancelled = False
+
+        async def get_entity(*args: Any) -> MagicMock:
+            nonlocal cancelled
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled = True
+                raise
+            return MagicMock()
+
+        mock_client.get_entity = AsyncMock(side_effect=get_entity)
+        response = await test_client.get("/api/channels/testchannel/posts", headers={"X-Request-Timeout": "0.05"})
+        assert response.status_code == 504
+        assert cancelled
+
+    async def test_retry_skipped_without_time_left(self, test_client: AsyncClient, mock_pool: MagicMock) -> None:
+        flood_error = FloodWaitError(request=None, capture=0)
+        flood_error.seconds = 30
+
+        async def get_entity(*args: Any) -> MagicMock:
+            await asyncio.sleep(0.2)
+            raise flood_error
+
+        fail_client = AsyncMock()
+        fail_client.get_entity = AsyncMock(side_effect=get_entity)
+        mock_pool.get_next.return_value = fail_client
+        response = await test_client.get("/api/channels/testchannel/posts", headers={"X-Request-Timeout": "0.3"})
+        assert response.status_code == 429
+        assert fail_client.get_entity.await_count == 1
+
+    async def test_class_without_timeout_has_no_deadline(
+        self, test_client: AsyncClient, mock_client: AsyncMock
+    ) -> None:
+        seen: list[float | None] = []
+
+        async def get_entity(*args: Any) -> MagicMock:
+            seen.append(current_deadline())
+            return MagicMock()
+
+        mock_client.get_entity = AsyncMock(side_effect=get_entity)
+        with patch("src.dependencies.settings.request_timeouts", {"interactive": 30.0}):
+            await test_client.post("/api/channels/batch/posts", json={"channels": [{"channel": "a"}]})
+            await test_client.get("/api/channels/testchannel/posts")
+        assert seen[0] is None
+        assert seen[1] is not None
+
+    async def test_invalid_timeout(self, test_client: AsyncClient) -> None:
+        response = await test_client.get("/api/channels/testchannel/posts", headers={"X-Request-Timeout": "-1"})
+        assert response.status_code == 422
+
+
+class TestBatchChannelPostsEndpoint:
+    async def test_streams_result_per_channel(self, test_client: AsyncClient, mock_client: AsyncMock) -> None:
+        mock_client.iter_messages = MagicMock(side_effect=lambda *a, **kw: AsyncIter([make_mock_message(msg_id=1)]))
+        response = await test_client.post(
+            "/api/channels/batch/posts",
+            json={"channels": [{"channel": "one"}, {"channel": "two", "offset_id": 10, "min_id": 2, "limit": 5}]},
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert sorted(line["channel"] for line in lines) == ["one", "two"]
+        assert all(line["count"] == 1 and line["error"] is None for line in lines)
+        mock_client.iter_messages.assert_any_call(mock_client.get_entity.return_value, limit=5, offset_id=10, min_id=2)
+
+    async def test_per_channel_error_does_not_fail_batch(
+        self, test_client: AsyncClient, mock_client: AsyncMock
+    ) -> None:
+        async def get_entity(channel: str) -> MagicMock:
+            if channel == "missing":
+                raise ValueError('No user has "missing" as username')
+            return MagicMock()
+
+        mock_client.get_entity = AsyncMock(side_effect=get_entity)
+        mock_client.iter_messages = MagicMock(side_effect=lambda *a, **kw: AsyncIter([make_mock_message(msg_id=1)]))
+        response = await test_client.post(
+            "/api/channels/batch/posts", json={"channels": [{"channel": "missing"}, {"channel": "ok"}]}
+        )
+        assert response.status_code == 200
+        results = {line["channel"]: line for line in map(json.loads, response.text.splitlines())}
+        assert results["missing"]["status_code"] == 404
+        assert results["missing"]["messages"] == []
+        assert results["ok"]["count"] == 1
+
+    async def test_empty_batch_rejected(self, test_client: AsyncClient) -> None:
+        response = await test_client.post("/api/channels/batch/posts", json={"channels": []})
+        assert response.status_code == 422
+
+
+class TestBatchChannelInfoEndpoint:
+    async def test_streams_results_per_channel(self, test_client: AsyncClient, mock_client: AsyncMock) -> None:
+        mock_client.get_input_entity = AsyncMock(
+            side_effect=lambda peer: InputPeerChannel(channel_id=int(peer), access_hash=1)
+        )
+        chats = MagicMock()
+        chats.chats = [make_mock_channel(channel_id=1, title="One"), make_mock_channel(channel_id=2, title="Two")]
+        mock_client.return_value = chats
+
+        response = await test_client.post("/api/channels/batch/info", json={"channels": ["1", "2"]})
+        assert response.status_code == 200
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert {line["info"]["title"] for line in lines} == {"One", "Two"}
+
+    async def test_chunk_failure_reported_per_channel(self, test_client: AsyncClient, mock_pool: MagicMock) -> None:
+        mock_pool.get_next.return_value = None
+        response = await test_client.post("/api/channels/batch/info", json={"channels": ["1", "2"]})
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [line["status_code"] for line in lines] == [503, 503]
+
+
+class TestBatchPostCommentsEndpoint:
+    async def test_success(self, test_client: AsyncClient, mock_client: AsyncMock) -> None:
+        mock_client.get_messages = AsyncMock(return_value=[make_mock_message(msg_id=100)])
+        response = await test_client.post("/api/channels/testchannel/comments/batch", json={"post_ids": [100]})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["count"] == 3
+        assert len(data["comments"]["100"]) == 3
+
+    async def test_too_many_posts(self, test_client: AsyncClient) -> None:
+        response = await test_client.post(
+            "/api/channels/testchannel/comments/batch", json={"post_ids": list(range(101))}
+        )
+        assert response.status_code == 422
+
+
+class TestCommentTreesEndpoint:
+    async def test_success(self, test_client: AsyncClient, mock_client: AsyncMock) -> None:
+        posts = [make_mock_message(msg_id=100)]
+        comments = [
+            make_mock_message(msg_id=201, reply_to_msg_id=1),
+            make_mock_message(msg_id=202, reply_to_msg_id=201),
+        ]
+        mock_client.iter_messages = MagicMock(side_effect=[AsyncIter(posts), AsyncIter(comments)])
+        response = await test_client.get("/api/channels/testchannel/comments/tree", params={"max_comments": 50})
+        assert response.status_code == 200
+        tree = response.json()["posts"][0]
+        assert tree["post"]["id"] == 100
+        assert tree["comments"][0]["replies"][0]["id"] == 202
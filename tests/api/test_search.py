@@ -28,3 +28,47 @@ class TestSearchEndpoint:
     async def test_missing_tag(self, test_client: AsyncClient) -> None:
         response = await test_client.get("/api/search/posts")
         assert response.status_code == 422
+
+
+class TestMultiSearchEndpoint:
+    async def test_success(self, test_client: AsyncClient, mock_pool: MagicMock) -> None:
+        search_response = MagicMock()
+        search_response.messages = [make_mock_message(msg_id=1)]
+        search_response.chats = []
+        search_response.users = []
+        search_response.next_rate = None
+        mock_pool.get_next.return_value = AsyncMock(return_value=search_response)
+
+        response = await test_client.get("/api/search/posts/multi", params={"tags": ["#a", "#b"]})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["count"] == 1
+        assert data["next_cursor"] is None
+
+    async def test_invalid_cursor(self, test_client: AsyncClient) -> None:
+        response = await test_client.get("/api/search/posts/multi", params={"tags": ["#a"], "cursor": "garbage"})
+        assert response.status_code == 400
+
+
+class TestMessagesSearchEndpoint:
+    async def test_searches_every_channel(self, test_client: AsyncClient, mock_pool: MagicMock) -> None:
+        mock_client = AsyncMock()
+        mock_client.get_entity = AsyncMock()
+        mock_client.iter_messages = MagicMock(side_effect=lambda *a, **kw: AsyncIter([make_mock_message(msg_id=1)]))
+        mock_pool.get_next.return_value = mock_client
+
+        response = await test_client.get(
+            "/api/search/messages", params={"channels": ["a", "b"], "q": "test", "limit": 1, "fields": "id,text"}
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["count"] == 2
+        assert data["next_cursor"] is not None
+        assert data["messages"][0]["text"] == "test message"
+        assert "date" not in data["messages"][0]
+
+    async def test_invalid_cursor(self, test_client: AsyncClient) -> None:
+        response = await test_client.get(
+            "/api/search/messages", params={"channels": ["a"], "q": "test", "cursor": "garbage"}
+        )
+        assert response.status_code == 400
@@ -0,0 +1,26 @@
+from unittest.mock import AsyncMock, MagicMock
+
+from httpx import AsyncClient
+from src.core.subscriptions import SubscriptionHub
+from src.dependencies import get_subscription_hub
+from src.main import app
+
+
+class TestStreamChannelsEndpoint:
+    async def test_unknown_channel(self, test_client: AsyncClient, mock_pool: MagicMock) -> None:
+        hub = SubscriptionHub(mock_pool, queue_size=10)
+        hub.subscribe = AsyncMock(side_effect=ValueError("No channel"))  # type: ignore[method-assign]
+        app.dependency_overrides[get_subscription_hub] = lambda: hub
+        try:
+            response = await test_client.get("/api/stream/channels", params={"channels": ["missing"]})
+        finally:
+            app.dependency_overrides.pop(get_subscription_hub, None)
+        assert response.status_code == 404
+
+    async def test_requires_channels(self, test_client: AsyncClient) -> None:
+        app.dependency_overrides[get_subscription_hub] = lambda: MagicMock()
+        try:
+            response = await test_client.get("/api/stream/channels")
+        finally:
+            app.dependency_overrides.pop(get_subscription_hub, None)
+        assert response.status_code == 422
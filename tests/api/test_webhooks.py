@@ -0,0 +1,64 @@
+from collections.abc import Iterator
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from httpx import AsyncClient
+from src.config import settings
+from src.core.webhooks import Webhook
+from src.dependencies import get_webhook_dispatcher
+from src.main import app
+
+HEADERS = {"X-Admin-Token": "secret"}
+
+
+@pytest.fixture(autouse=True)
+def admin_token(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "admin_token", "secret")
+
+
+@pytest.fixture
+def dispatcher(tmp_path: Path) -> Iterator[MagicMock]:
+    webhook = Webhook(id="abc", url="http://receiver/hook", channels=["a"], directory=tmp_path)
+    mock = MagicMock()
+    mock.webhooks = [webhook]
+    mock.get = MagicMock(side_effect=lambda webhook_id: webhook if webhook_id == "abc" else None)
+    app.dependency_overrides[get_webhook_dispatcher] = lambda: mock
+    yield mock
+    app.dependency_overrides.pop(get_webhook_dispatcher, None)
+
+
+class TestWebhooksEndpoint:
+    async def test_list(self, client: AsyncClient, dispatcher: MagicMock) -> None:
+        response = await client.get("/api/webhooks", headers=HEADERS)
+        assert response.status_code == 200
+        assert response.json()["webhooks"][0]["id"] == "abc"
+
+    async def test_get_missing(self, client: AsyncClient, dispatcher: MagicMock) -> None:
+        response = await client.get("/api/webhooks/nope", headers=HEADERS)
+        assert response.status_code == 404
+
+    async def test_create_validates_url(self, client: AsyncClient, dispatcher: MagicMock) -> None:
+        response = await client.post("/api/webhooks", json={"url": "not a url", "channels": ["a"]}, headers=HEADERS)
+        assert response.status_code == 422
+
+    async def test_requires_admin_token(self, client: AsyncClient, dispatcher: MagicMock) -> None:
+        response = await client.get("/api/webhooks")
+        assert response.status_code == 403
+
+    @pytest.mark.parametrize("url", ["http://127.0.0.1/hook", "http://10.1.2.3/hook", "http://[::1]/hook"])
+    async def test_create_rejects_internal_targets(self, client: AsyncClient, dispatcher: MagicMock, url: str) -> None:
+        response = await client.post("/api/webhooks", json={"url": url, "channels": ["a"]}, headers=HEADERS)
+        assert response.status_code == 400
+        dispatcher.create.assert_not_called()
+
+    async def test_create_allows_listed_host(
+        self, client: AsyncClient, dispatcher: MagicMock, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr(settings, "webhook_allowed_hosts", ["127.0.0.1"])
+        dispatcher.create = AsyncMock(return_value=dispatcher.get("abc"))
+        response = await client.post(
+            "/api/webhooks", json={"url": "http://127.0.0.1/hook", "channels": ["a"]}, headers=HEADERS
+        )
+        assert response.status_code == 201
+        dispatcher.create.assert_awaited_once_with("http://127.0.0.1/hook", ["a"])
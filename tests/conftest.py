@@ -5,6 +5,10 @@ from unittest.mock import AsyncMock, MagicMock, patch
 import pytest
 import pytest_asyncio
 from httpx import ASGITransport, AsyncClient
+from src.core.hot_channels import HotChannels
+from src.core.page_buffer import PageBuffer
+from src.core.search_prefetch import SearchPrefetcher
+from src.dependencies import get_hot_channels, get_search_prefetcher
 from src.main import app
 from telethon.tl.types import Channel, PeerChannel, User
 
@@ -58,6 +62,7 @@ def make_mock_message(
     chat: MagicMock | None = None,
     media: object | None = None,
     peer_id: PeerChannel | None = None,
+    reply_to_msg_id: int | None = None,
 ) -> MagicMock:
     msg = MagicMock()
     msg.id = msg_id
@@ -72,6 +77,7 @@ def make_mock_message(
     msg.chat = chat or make_mock_channel()
     msg.media = media
     msg.peer_id = peer_id or PeerChannel(channel_id=456)
+    msg.reply_to = MagicMock(reply_to_msg_id=reply_to_msg_id) if reply_to_msg_id is not None else None
     msg._finish_init = MagicMock()
     return msg
 
@@ -98,12 +104,33 @@ def mock_pool(mock_client: AsyncMock) -> MagicMock:
     pool = MagicMock()
     pool.get_next = AsyncMock(return_value=mock_client)
     pool.remove_client = AsyncMock()
+    pool.cooldown = AsyncMock()
     pool.available = True
     return pool
 
 
 @pytest_asyncio.fixture
-async def test_client(mock_pool: MagicMock) -> AsyncIterator[AsyncClient]:
+async def search_prefetcher() -> AsyncIterator[SearchPrefetcher]:
+    prefetcher = SearchPrefetcher(PageBuffer(ttl=60, max_bytes=1024 * 1024), depth=2, concurrency=2)
+    app.dependency_overrides[get_search_prefetcher] = lambda: prefetcher
+    yield prefetcher
+    await prefetcher.close()
+    app.dependency_overrides.pop(get_search_prefetcher, None)
+
+
+@pytest_asyncio.fixture
+async def hot_channels() -> AsyncIterator[HotChannels]:
+    hot = HotChannels(PageBuffer(ttl=60, max_bytes=1024 * 1024))
+    app.dependency_overrides[get_hot_channels] = lambda: hot
+    yield hot
+    await hot.close()
+    app.dependency_overrides.pop(get_hot_channels, None)
+
+
+@pytest_asyncio.fixture
+async def test_client(
+    mock_pool: MagicMock, search_prefetcher: SearchPrefetcher, hot_channels: HotChannels
+) -> AsyncIterator[AsyncClient]:
     with (
         patch("src.core.retry.get_session_pool", new_callable=AsyncMock, return_value=mock_pool),
         patch("src.dependencies.init_session_pool", new_callable=AsyncMock),
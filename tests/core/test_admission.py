@@ -0,0 +1,108 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from src.core.admission import AdmissionController, Priority, current_priority, use_priority
+
+LIMITS = {"interactive": 10, "batch": 10, "export": 10}
+WAITS = {"interactive": 5.0, "batch": 5.0, "export": 5.0}
+
+
+def _controller(
+    capacity: int = 1, queue_limits: dict[str, int] | None = None, max_wait: dict[str, float] | None = None
+) -> AdmissionController:
+    return AdmissionController(capacity, queue_limits or LIMITS, max_wait or WAITS)
+
+
+class TestAdmissionController:
+    async def test_admits_up_to_capacity(self) -> None:
+        controller = _controller(capacity=2)
+        await controller.acquire(Priority.INTERACTIVE)
+        await controller.acquire(Priority.EXPORT)
+        assert controller.active == 2
+        assert controller.predicted_wait(Priority.INTERACTIVE) > 0
+        controller.release(0.1)
+        controller.release(0.1)
+        assert controller.active == 0
+
+    async def test_freed_slot_goes_to_highest_priority(self) -> None:
+        controller = _controller()
+        await controller.acquire(Priority.INTERACTIVE)
+        order: list[Priority] = []
+
+        async def worker(priority: Priority) -> None:
+            await controller.acquire(priority)
+            order.append(priority)
+            controller.release(0.01)
+
+        tasks = [asyncio.create_task(worker(p)) for p in (Priority.EXPORT, Priority.BATCH, Priority.INTERACTIVE)]
+        await asyncio.sleep(0)
+        assert [controller.depth(p) for p in Priority] == [1, 1, 1]
+        controller.release(0.01)
+        await asyncio.gather(*tasks)
+        assert order == [Priority.INTERACTIVE, Priority.BATCH, Priority.EXPORT]
+        assert controller.active == 0
+
+    async def test_full_queue_is_shed(self) -> None:
+        controller = _controller(queue_limits={**LIMITS, "batch": 0})
+        await controller.acquire(Priority.INTERACTIVE)
+        with pytest.raises(HTTPException) as exc_info:
+            await controller.acquire(Priority.BATCH)
+        assert exc_info.value.status_code == 503
+        assert exc_info.value.headers == {"Retry-After": "1"}
+
+    async def test_predicted_wait_is_shed_early(self) -> None:
+        controller = _controller(max_wait={**WAITS, "export": 1.0})
+        await controller.acquire(Priority.INTERACTIVE)
+        controller._service_time = 2.0
+        assert controller.predicted_wait(Priority.EXPORT) > 1.0
+        with pytest.raises(HTTPException) as exc_info:
+            await controller.acquire(Priority.EXPORT)
+        assert exc_info.value.status_code == 503
+        assert int(exc_info.value.headers["Retry-After"]) >= 1  # type: ignore[index]
+        assert controller.depth(Priority.EXPORT) == 0
+
+    async def test_waiting_past_the_limit_is_shed(self) -> None:
+        controller = _controller(max_wait={**WAITS, "interactive": 0.05})
+        await controller.acquire(Priority.BATCH)
+        controller._service_time = 0.01  # the estimate says the slot frees up quickly, but it never does
+        assert controller.predicted_wait(Priority.INTERACTIVE) < 0.05
+        with pytest.raises(HTTPException) as exc_info:
+            await controller.acquire(Priority.INTERACTIVE)
+        assert exc_info.value.status_code == 503
+        assert controller.depth(Priority.INTERACTIVE) == 0
+
+    async def test_cancelled_waiter_leaves_queue(self) -> None:
+        controller = _controller()
+        await controller.acquire(Priority.INTERACTIVE)
+        task = asyncio.create_task(controller.acquire(Priority.BATCH))
+        await asyncio.sleep(0)
+        task.cancel()
+        controller.release(0.01)
+        await asyncio.gather(task, return_exceptions=True)
+        assert controller.depth(Priority.BATCH) == 0
+        assert controller.active == 0
+
+    async def test_capacity_follows_sessions(self) -> None:
+        sessions = 2
+        controller = AdmissionController(lambda: sessions, LIMITS, WAITS)
+        await controller.acquire(Priority.INTERACTIVE)
+        await controller.acquire(Priority.INTERACTIVE)
+        waiter = asyncio.create_task(controller.acquire(Priority.INTERACTIVE))
+        await asyncio.sleep(0)
+        sessions = 1
+        # The first freed slot is retired instead of handed over, the next one goes to the waiter.
+        controller.release(0.1)
+        await asyncio.sleep(0)
+        assert not waiter.done()
+        assert controller.active == 1
+        controller.release(0.1)
+        await waiter
+        assert controller.active == 1
+
+
+async def test_use_priority() -> None:
+    assert current_priority() is Priority.INTERACTIVE
+    with use_priority(Priority.EXPORT):
+        assert current_priority() is Priority.EXPORT
+    assert current_priority() is Priority.INTERACTIVE
@@ -0,0 +1,95 @@
+from typing import Any, cast
+from unittest.mock import patch
+
+import pytest
+from src.core.fake_telegram import FakeBackendConfig, FakeTelegramClient, create_fake_clients
+from src.core.session_pool import SessionPool
+from src.services.telegram import (
+    get_channel_info,
+    get_channel_photos,
+    get_channel_posts,
+    get_channels_info,
+    get_comment_trees,
+    search_posts,
+)
+from telethon.errors import FloodWaitError, UserDeactivatedBanError
+
+FAST = FakeBackendConfig(latency_ms=0, latency_sigma=0, posts_per_channel=250, comments_per_post=5, seed=1)
+
+
+def _client(**overrides: Any) -> Any:
+    config = FakeBackendConfig(**{**FAST.__dict__, **overrides})
+    return FakeTelegramClient("fake-test", config)
+
+
+class TestFakeTelegramClient:
+    async def test_channel_posts_page_through_history(self) -> None:
+        client = _client()
+        first = await get_channel_posts(client, "somechannel", limit=150)
+        assert [m["id"] for m in first] == list(range(250, 100, -1))
+        assert first[0]["channel"]["title"].startswith("Channel ")
+        rest = await get_channel_posts(client, "somechannel", offset_id=first[-1]["id"], limit=150)
+        assert [m["id"] for m in rest] == list(range(100, 0, -1))
+        assert client.stats.calls == 1 + 2 + 1
+
+    async def test_entities_resolve_deterministically(self) -> None:
+        a, b = _client(), _client()
+        assert (await a.get_entity("news")).id == (await b.get_entity("@News")).id
+        with pytest.raises(ValueError):
+            await a.get_entity("missing_channel")
+
+    async def test_comment_trees_and_info(self) -> None:
+        client = _client()
+        trees = await get_comment_trees(client, "somechannel", limit=3, max_comments=10)
+        assert sum(len(t["comments"]) for t in trees) > 0
+        info = await get_channel_info(client, "somechannel")
+        assert info["linked_chat_id"] == info["id"] + 1
+        results = await get_channels_info(client, ["a", "b", "missing"], full=True)
+        assert [r["status_code"] for r in results] == [404, 200, 200]
+
+    async def test_search_posts_cursor_pages(self) -> None:
+        client = _client()
+        messages, cursor = await search_posts(client, "#tag", limit=20)
+        assert len(messages) == 20
+        assert all("#tag" in m["text"] for m in messages)
+        more, _ = await search_posts(client, "#tag", cursor=cursor, limit=20)
+        assert {(m["channel"]["id"], m["id"]) for m in more}.isdisjoint(
+            {(m["channel"]["id"], m["id"]) for m in messages}
+        )
+
+    async def test_media_download_counts_bytes(self) -> None:
+        client = _client(media_ratio=1.0, media_bytes=1024)
+        photos = await get_channel_photos(client, "somechannel", limit=3)
+        assert len(photos) == 3
+        assert client.stats.bytes_downloaded == 3 * 1024
+
+    async def test_injected_errors(self) -> None:
+        flood = _client(flood_wait_rate=1.0, flood_wait_seconds=7)
+        with pytest.raises(FloodWaitError) as exc:
+            await flood.get_entity("news")
+        assert exc.value.seconds == 7
+
+        banned = _client(ban_rate=1.0)
+        with pytest.raises(UserDeactivatedBanError):
+            await banned.get_entity("news")
+        assert banned.banned
+        assert not await banned.is_user_authorized()
+
+
+class TestFakeSessionPool:
+    async def test_pool_loads_fake_clients(self) -> None:
+        pool = SessionPool()
+        with (
+            patch("src.core.session_pool.settings.telegram_backend", "fake"),
+            patch("src.core.session_pool.settings.fake_sessions", 3),
+        ):
+            await pool.init()
+        assert len(pool.clients) == 3
+        assert all(isinstance(c, FakeTelegramClient) for c in pool.clients)
+        await pool.remove_client(pool.clients[0])
+        assert len(pool.clients) == 2
+        await pool.close()
+
+    def test_create_fake_clients_names(self) -> None:
+        clients = [cast("FakeTelegramClient", c) for c in create_fake_clients(2, FAST)]
+        assert [c.name for c in clients] == ["fake-0", "fake-1"]
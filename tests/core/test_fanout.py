@@ -0,0 +1,46 @@
+import asyncio
+
+from fastapi import HTTPException
+from src.core.fanout import fan_out, to_http_error
+
+
+class TestToHttpError:
+    def test_passthrough(self) -> None:
+        error = HTTPException(status_code=429, detail="slow down")
+        assert to_http_error(error) is error
+
+    def test_value_error_is_not_found(self) -> None:
+        assert to_http_error(ValueError("nope")).status_code == 404
+
+    def test_other_errors_are_internal(self) -> None:
+        assert to_http_error(RuntimeError("boom")).status_code == 500
+
+
+class TestFanOut:
+    async def test_collects_results_and_errors(self) -> None:
+        async def work(item: int) -> int:
+            if item == 2:
+                raise ValueError("bad item")
+            return item * 10
+
+        results = {item: (value, error) async for item, value, error in fan_out([1, 2, 3], work, concurrency=2)}
+        assert results[1] == (10, None)
+        assert results[3] == (30, None)
+        assert results[2][0] is None
+        assert results[2][1] is not None and results[2][1].status_code == 404
+
+    async def test_respects_concurrency(self) -> None:
+        running = 0
+        peak = 0
+
+        async def work(item: int) -> int:
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return item
+
+        results = [value async for _, value, _ in fan_out(list(range(10)), work, concurrency=3)]
+        assert sorted(results) == list(range(10))  # type: ignore[type-var]
+        assert peak == 3
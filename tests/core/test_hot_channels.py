@@ -0,0 +1,81 @@
+from typing import Any
+from unittest.mock import AsyncMock, patch
+
+from fastapi import HTTPException
+from src.core.admission import AdmissionController, Priority, current_priority
+from src.core.hot_channels import HotChannels
+from src.core.page_buffer import PageBuffer
+from src.services.telegram import get_channel_info
+
+POSTS = [{"id": i, "text": f"post {i}", "views": i} for i in range(100, 0, -1)]
+priorities: list[Priority] = []
+
+
+async def _fetch(func: object, channel: str, limit: int = 20, **kwargs: Any) -> Any:
+    priorities.append(current_priority())
+    if func is get_channel_info:
+        return {"id": 1, "title": channel}
+    return POSTS[:limit]
+
+
+def _hot(**kwargs: Any) -> HotChannels:
+    return HotChannels(PageBuffer(ttl=300, max_bytes=1 << 20), **kwargs)
+
+
+class TestHotChannels:
+    async def test_configured_channel_is_served_from_cache(self) -> None:
+        hot = _hot(channels=["Durov"], page_size=50)
+        with patch("src.core.hot_channels.with_retry", new=AsyncMock(side_effect=_fetch)) as retry:
+            assert await hot.info("durov") == {"id": 1, "title": "durov"}
+            first = await hot.posts("durov", 20, frozenset({"text"}))
+            assert await hot.info("DUROV") == {"id": 1, "title": "durov"}
+            second = await hot.posts("durov", 50)
+            assert retry.await_count == 2
+        assert first == [{"id": m["id"], "text": m["text"]} for m in POSTS[:20]]
+        assert second == POSTS[:50]
+
+    async def test_cold_channel_is_passed_through(self) -> None:
+        hot = _hot(learned=0)
+        with patch("src.core.hot_channels.with_retry", new=AsyncMock(side_effect=_fetch)) as retry:
+            await hot.info("other")
+            await hot.info("other")
+            assert await hot.posts("other", 5) == POSTS[:5]
+            assert retry.await_count == 3
+
+    async def test_frequent_channels_are_learned(self) -> None:
+        hot = _hot(learned=1, min_hits=3)
+        with patch("src.core.hot_channels.with_retry", new=AsyncMock(side_effect=_fetch)):
+            for _ in range(3):
+                await hot.info("popular")
+            await hot.info("rare")
+            await hot.warm()
+        assert hot.hot() == ["popular"]
+        assert not hot.is_hot("rare")
+
+    async def test_warm_refreshes_stale_entries_at_export_priority(self) -> None:
+        hot = _hot(channels=["a", "b"], refresh_after=0)
+        priorities.clear()
+        with patch("src.core.hot_channels.with_retry", new=AsyncMock(side_effect=_fetch)) as retry:
+            assert await hot.warm() == 4
+            assert retry.await_count == 4
+        assert set(priorities) == {Priority.EXPORT}
+
+    async def test_warm_waits_for_idle_capacity(self) -> None:
+        hot = _hot(channels=["a"], refresh_after=0, idle_fraction=0.5)
+        admission = AdmissionController(2, queue_limits={}, max_wait={})
+        await admission.acquire(Priority.INTERACTIVE)
+        with (
+            patch("src.core.hot_channels.get_admission_controller", return_value=admission),
+            patch("src.core.hot_channels.with_retry", new=AsyncMock(side_effect=_fetch)) as retry,
+        ):
+            assert await hot.warm() == 0
+            admission.release(0.1)
+            assert await hot.warm() == 2
+            assert retry.await_count == 2
+
+    async def test_failed_refresh_is_skipped(self) -> None:
+        hot = _hot(channels=["a"])
+        retry = AsyncMock(side_effect=[HTTPException(status_code=429, detail="Rate limited"), POSTS[:100]])
+        with patch("src.core.hot_channels.with_retry", new=retry):
+            assert await hot.warm() == 1
+        assert await hot.posts("a", 3) == POSTS[:3]
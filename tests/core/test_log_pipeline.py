@@ -0,0 +1,69 @@
+import contextlib
+import io
+import json
+from typing import Any
+
+import pytest
+import structlog
+from src.core.log_pipeline import LogSink, QueueLoggerFactory, SamplingProcessor
+
+
+def _render(logger: Any, method_name: str, event_dict: dict[str, Any]) -> str:
+    return json.dumps(event_dict)
+
+
+class TestSamplingProcessor:
+    def test_unlisted_events_pass(self) -> None:
+        processor = SamplingProcessor({"noisy": 0.0})
+        assert processor(None, "info", {"event": "quiet"}) == {"event": "quiet"}
+
+    def test_rate_zero_drops_and_rate_one_keeps(self) -> None:
+        with pytest.raises(structlog.DropEvent):
+            SamplingProcessor({"noisy": 0.0})(None, "info", {"event": "noisy"})
+        assert SamplingProcessor({"noisy": 1.0})(None, "info", {"event": "noisy"}) == {"event": "noisy"}
+
+    def test_kept_events_carry_rate(self) -> None:
+        processor = SamplingProcessor({"noisy": 0.5})
+        kept = []
+        for _ in range(200):
+            with contextlib.suppress(structlog.DropEvent):
+                kept.append(processor(None, "info", {"event": "noisy"}))
+        assert 40 < len(kept) < 160
+        assert all(e["sample_rate"] == 0.5 for e in kept)
+
+
+class TestLogSink:
+    def test_background_thread_renders_records(self) -> None:
+        stream = io.StringIO()
+        sink = LogSink(_render, stream=stream)
+        sink.start()
+        log = structlog.wrap_logger(
+            QueueLoggerFactory(sink)(),
+            processors=[structlog.processors.add_log_level],
+            wrapper_class=structlog.make_filtering_bound_logger(0),
+        )
+        log.info("first", n=1)
+        log.warning("second")
+        sink.close()
+        lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+        assert lines == [{"n": 1, "event": "first", "level": "info"}, {"event": "second", "level": "warning"}]
+
+    def test_full_queue_drops_and_reports(self) -> None:
+        stream = io.StringIO()
+        sink = LogSink(_render, stream=stream, maxsize=2)
+        for i in range(5):
+            sink.put({"event": "e", "i": i})
+        assert sink.dropped == 3
+        sink.start()
+        sink.close()
+        lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+        assert [line["event"] for line in lines] == ["e", "e", "log_records_dropped"]
+        assert lines[-1]["dropped"] == 3
+
+    def test_writes_synchronously_after_close(self) -> None:
+        stream = io.StringIO()
+        sink = LogSink(_render, stream=stream)
+        sink.start()
+        sink.close()
+        sink.put({"event": "late"})
+        assert json.loads(stream.getvalue()) == {"event": "late"}
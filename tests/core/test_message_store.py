@@ -0,0 +1,211 @@
+import random
+import sqlite3
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from src.core.fake_telegram import FakeBackendConfig, FakeTelegramClient
+from src.core.message_search import search_channel
+from src.core.message_store import MessageStore, open_message_store
+from src.services.telegram import get_channel_posts, get_post_comments
+
+# Ids 1..300 with some deleted messages.
+IDS = [i for i in range(1, 301) if i % 7 != 0]
+
+
+class History:
+    def __init__(self) -> None:
+        self.calls: list[tuple[int, int, int]] = []
+
+    @staticmethod
+    def page(offset_id: int, limit: int, min_id: int) -> list[dict[str, Any]]:
+        ids = [i for i in reversed(IDS) if (not offset_id or i < offset_id) and i > min_id]
+        return [{"id": i, "text": f"message {i}" + (" naïve café" if i % 10 == 3 else "")} for i in ids[:limit]]
+
+    async def fetch(self, offset_id: int, limit: int, min_id: int) -> list[dict[str, Any]]:
+        self.calls.append((offset_id, limit, min_id))
+        return self.page(offset_id, limit, min_id)
+
+
+@pytest.fixture
+def store(tmp_path: Path) -> Iterator[MessageStore]:
+    store = MessageStore(tmp_path / "messages.db", index=True)
+    yield store
+    store.close()
+
+
+class TestMessageStore:
+    async def test_pagination_is_served_locally(self, store: MessageStore) -> None:
+        history = History()
+        offset = 0
+        while page := await store.history(1, 0, offset, 50, 0, history.fetch):
+            assert page == History.page(offset, 50, 0)
+            offset = page[-1]["id"]
+        assert len(history.calls) == 6
+
+        history.calls.clear()
+        assert await store.history(1, 0, 200, 50, 0, history.fetch) == History.page(200, 50, 0)
+        assert await store.history(1, 0, 120, 30, 100, history.fetch) == History.page(120, 30, 100)
+        assert history.calls == []
+
+    async def test_only_gaps_are_fetched(self, store: MessageStore) -> None:
+        history = History()
+        upper = await store.history(1, 0, 251, 20, 0, history.fetch)
+        lower = await store.history(1, 0, 151, 20, 0, history.fetch)
+        history.calls.clear()
+        page = await store.history(1, 0, 251, 200, 0, history.fetch)
+        assert page == History.page(251, 200, 0)
+        between = len([i for i in IDS if 150 < i < upper[-1]["id"]])
+        # Telegram is asked for the gap between the stored ranges, then for what lies below the lower one.
+        assert history.calls == [
+            (upper[-1]["id"], 180, 150),
+            (lower[-1]["id"], 180 - between - 20, 0),
+        ]
+
+    async def test_matches_telegram_for_random_pages(self, store: MessageStore) -> None:
+        history = History()
+        rng = random.Random(0)
+        for _ in range(200):
+            offset = rng.choice([0, rng.randint(1, 320)])
+            limit = rng.randint(1, 60)
+            min_id = rng.choice([0, 0, rng.randint(0, 300)])
+            assert await store.history(1, 0, offset, limit, min_id, history.fetch) == History.page(
+                offset, limit, min_id
+            )
+
+    async def test_threads_and_peers_are_separate(self, store: MessageStore) -> None:
+        history = History()
+        await store.history(1, 0, 0, 10, 0, history.fetch)
+        await store.history(1, 5, 0, 10, 0, history.fetch)
+        await store.history(2, 0, 0, 10, 0, history.fetch)
+        assert len(history.calls) == 3
+
+    async def test_stale_ranges_are_refetched(self, store: MessageStore) -> None:
+        history = History()
+        await store.history(1, 0, 100, 10, 0, history.fetch)
+        store.ttl = 0
+        await store.history(1, 0, 100, 10, 0, history.fetch)
+        store.ttl = 60
+        await store.history(1, 0, 100, 10, 0, history.fetch)
+        assert len(history.calls) == 2
+
+    async def test_prune_evicts_least_recently_fetched_ranges(self, store: MessageStore) -> None:
+        history = History()
+        await store.history(1, 0, 101, 20, 0, history.fetch)
+        await store.history(2, 0, 101, 20, 0, history.fetch)
+        assert await store.prune() == 0
+        store.max_rows = 30
+        assert await store.prune() == 20
+        history.calls.clear()
+        await store.history(2, 0, 101, 20, 0, history.fetch)
+        await store.history(1, 0, 101, 20, 0, history.fetch)
+        assert len(history.calls) == 1
+
+    async def test_prune_evicts_stale_ranges(self, store: MessageStore) -> None:
+        history = History()
+        await store.history(1, 0, 101, 20, 0, history.fetch)
+        store.ttl = 0
+        assert await store.prune() == 20
+        assert store._read(1, 0, 100, 0, 100) == []
+
+
+def test_unusable_path_disables_store(tmp_path: Path) -> None:
+    (tmp_path / "file").write_text("")
+    with patch("src.core.message_store.settings.message_store_path", str(tmp_path / "file" / "messages.db")):
+        assert open_message_store() is None
+
+
+async def test_service_reads_through_store(store: MessageStore) -> None:
+    client = FakeTelegramClient("fake-0", FakeBackendConfig(latency_ms=0, posts_per_channel=500, comments_per_post=30))
+    with (
+        patch("src.services.telegram.get_message_store", return_value=store),
+        patch.object(client, "iter_messages", wraps=client.iter_messages) as iter_messages,
+    ):
+        first = await get_channel_posts(client, "durov", offset_id=300, limit=20, fields=frozenset({"text"}))  # type: ignore[arg-type]
+        second = await get_channel_posts(client, "durov", offset_id=300, limit=20, fields=frozenset({"text"}))  # type: ignore[arg-type]
+        comments = await get_post_comments(client, "durov", 3, limit=10)  # type: ignore[arg-type]
+        again = await get_post_comments(client, "durov", 3, offset_id=comments[-1]["id"] + 5, limit=5)  # type: ignore[arg-type]
+    assert first == second
+    assert [m["id"] for m in first] == list(range(299, 279, -1))
+    assert set(first[0]) == {"id", "text"}
+    assert again == comments[5:]
+    assert iter_messages.call_count == 2
+
+
+async def _index_all(store: MessageStore, history: History, peer: int = 1) -> None:
+    await store.remember("Chan", peer)
+    offset = 0
+    while page := await store.history(peer, 0, offset, 100, 0, history.fetch):
+        offset = page[-1]["id"]
+
+
+class TestMessageIndex:
+    async def test_fully_indexed_channel_is_searched_locally(self, store: MessageStore) -> None:
+        history = History()
+        await store.history(1, 0, 0, 100, 0, history.fetch)
+        await store.remember("chan", 1)
+        assert await store.indexed_peer("chan") is None
+
+        await _index_all(store, history)
+        assert await store.indexed_peer("CHAN") == 1
+        cafe = [i for i in reversed(IDS) if i % 10 == 3]
+        assert [m["id"] for m in await store.search(1, "cafe NAIVE")] == cafe[:20]
+        assert [m["id"] for m in await store.search(1, "café", offset_id=cafe[2], limit=2)] == cafe[3:5]
+        assert await store.search(2, "café") == []
+
+    async def test_fts_syntax_is_taken_literally(self, store: MessageStore) -> None:
+        await _index_all(store, History())
+        assert await store.search(1, 'message AND "13') == []
+        assert [m["id"] for m in await store.search(1, "13 message")] == [13]
+        assert await store.search(1, "   ") == []
+
+    async def test_stale_head_is_not_indexed(self, store: MessageStore) -> None:
+        await _index_all(store, History())
+        store.max_lag = 0
+        assert await store.indexed_peer("chan") is None
+
+    async def test_deleted_messages_leave_the_index(self, store: MessageStore) -> None:
+        await _index_all(store, History())
+        IDS.remove(13)
+        try:
+            store.ttl = 0
+            await store.history(1, 0, 20, 10, 0, History().fetch)
+        finally:
+            IDS.insert(IDS.index(12) + 1, 13)
+        assert await store.search(1, "13 message") == []
+
+    async def test_tokenizer_change_rebuilds_index(self, store: MessageStore, tmp_path: Path) -> None:
+        await _index_all(store, History())
+        store.close()
+        trigram = MessageStore(tmp_path / "messages.db", index=True, tokenizer="trigram")
+        try:
+            assert [m["id"] for m in await trigram.search(1, "ssage 130")] == [130]
+        finally:
+            trigram.close()
+
+    def test_old_schema_is_dropped(self, tmp_path: Path) -> None:
+        conn = sqlite3.connect(tmp_path / "old.db")
+        conn.execute("CREATE TABLE messages (peer, thread, id, data, PRIMARY KEY (peer, thread, id)) WITHOUT ROWID")
+        conn.execute("INSERT INTO messages VALUES (1, 0, 1, '{}')")
+        conn.commit()
+        conn.close()
+        store = MessageStore(tmp_path / "old.db", index=True)
+        try:
+            assert store.index_enabled
+            assert store._read(1, 0, 10, 0, 10) == []
+        finally:
+            store.close()
+
+
+async def test_channel_search_falls_back_to_telegram(store: MessageStore) -> None:
+    telegram = AsyncMock(return_value=[{"id": 99, "text": "remote"}])
+    with (
+        patch("src.core.message_search.get_message_store", return_value=store),
+        patch("src.core.message_search.with_retry", new=telegram),
+    ):
+        assert await search_channel("chan", "message 13") == [{"id": 99, "text": "remote"}]
+        await _index_all(store, History())
+        assert await search_channel("chan", "message 13", fields=frozenset()) == [{"id": 13}]
+    assert telegram.await_count == 1
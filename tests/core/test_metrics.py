@@ -0,0 +1,91 @@
+import time
+from pathlib import Path
+from typing import Any
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi import HTTPException
+from prometheus_client import REGISTRY
+from src.core.fake_telegram import FakeBackendConfig, FakeTelegramClient
+from src.core.retry import with_retry
+from src.core.session_pool import InstrumentedTelegramClient
+from telethon import TelegramClient
+from telethon.errors import AuthKeyUnregisteredError, FloodWaitError
+from telethon.tl.functions.channels import GetFullChannelRequest
+
+
+def _value(name: str, **labels: str) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+class TestInstrumentedTelegramClient:
+    @pytest.fixture
+    def client(self, tmp_path: Path) -> InstrumentedTelegramClient:
+        return InstrumentedTelegramClient(str(tmp_path / "acct1"), 1, "hash")
+
+    async def test_records_latency_per_method_and_session(self, client: InstrumentedTelegramClient) -> None:
+        before = _value("telegram_rpc_duration_seconds_count", method="GetFullChannelRequest", session="acct1")
+        with patch.object(TelegramClient, "_call", new=AsyncMock(return_value="ok")):
+            assert await client._call(None, GetFullChannelRequest(channel=MagicMock())) == "ok"
+        after = _value("telegram_rpc_duration_seconds_count", method="GetFullChannelRequest", session="acct1")
+        assert after == before + 1
+
+    async def test_counts_raised_and_slept_flood_waits(self, client: InstrumentedTelegramClient) -> None:
+        labels = {"method": "GetFullChannelRequest", "session": "acct1"}
+        raised = _value("telegram_flood_waits_total", outcome="raised", **labels)
+        slept = _value("telegram_flood_waits_total", outcome="slept", **labels)
+
+        with (
+            patch.object(TelegramClient, "_call", new=AsyncMock(side_effect=FloodWaitError(None, capture=120))),
+            pytest.raises(FloodWaitError),
+        ):
+            await client._call(None, GetFullChannelRequest(channel=MagicMock()))
+
+        async def sleeps_through_flood(*args: Any, **kwargs: Any) -> str:
+            client._flood_waited_requests[GetFullChannelRequest.CONSTRUCTOR_ID] = time.time() + 5
+            return "ok"
+
+        with patch.object(TelegramClient, "_call", new=sleeps_through_flood):
+            await client._call(None, GetFullChannelRequest(channel=MagicMock()))
+
+        assert _value("telegram_flood_waits_total", outcome="raised", **labels) == raised + 1
+        assert _value("telegram_flood_waits_total", outcome="slept", **labels) == slept + 1
+
+
+class TestRetryMetrics:
+    async def test_retries_and_removed_sessions(self) -> None:
+        client = FakeTelegramClient("metrics-0", FakeBackendConfig(latency_ms=0))
+        pool = MagicMock()
+        pool.get_next = AsyncMock(return_value=client)
+        pool.remove_client = AsyncMock()
+        pool.cooldown = AsyncMock()
+        pool._clients = [client]
+        func = AsyncMock(side_effect=[FloodWaitError(None, capture=3), AuthKeyUnregisteredError(None), "done"])
+        func.__name__ = "metrics_func"
+
+        with patch("src.core.retry.get_session_pool", new=AsyncMock(return_value=pool)):
+            assert await with_retry(func) == "done"
+
+        assert _value("telegram_retries_total", func="metrics_func", reason="flood_wait") == 1
+        assert _value("telegram_retries_total", func="metrics_func", reason="session_dead") == 1
+        pool.remove_client.assert_awaited_once_with(client, reason="AuthKeyUnregisteredError")
+        assert _value("telegram_pool_in_flight", session="metrics-0") == 0
+
+    async def test_no_sessions_still_observes_wait(self) -> None:
+        pool = MagicMock()
+        pool.get_next = AsyncMock(return_value=None)
+        before = _value("telegram_session_wait_seconds_count")
+        with (
+            patch("src.core.retry.get_session_pool", new=AsyncMock(return_value=pool)),
+            pytest.raises(HTTPException),
+        ):
+            await with_retry(AsyncMock(__name__="f"))
+        assert _value("telegram_session_wait_seconds_count") == before + 1
+
+
+class TestFakeClientMetrics:
+    async def test_downloads_and_rpcs_are_recorded(self) -> None:
+        client = FakeTelegramClient("metrics-1", FakeBackendConfig(latency_ms=0, media_bytes=10))
+        await client.download_media(object(), bytes)
+        assert _value("telegram_downloaded_bytes_total", session="metrics-1") == 10
+        assert _value("telegram_rpc_duration_seconds_count", method="GetFileRequest", session="metrics-1") == 1
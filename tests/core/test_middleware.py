@@ -1,4 +1,13 @@
-from httpx import AsyncClient
+import asyncio
+import gzip
+from collections.abc import AsyncIterator
+from unittest.mock import patch
+
+from fastapi import FastAPI, Response
+from fastapi.responses import StreamingResponse
+from httpx import ASGITransport, AsyncClient, Headers
+from src.core.middleware import CancelOnDisconnectMiddleware, CompressionMiddleware, GzipCompressor, negotiate_encoding
+from starlette.types import Message
 
 
 async def test_request_id_generated(client: AsyncClient) -> None:
@@ -11,3 +20,137 @@ async def test_request_id_preserved(client: AsyncClient) -> None:
     request_id = "test-request-id-123"
     response = await client.get("/health", headers={"x-request-id": request_id})
     assert response.headers["x-request-id"] == request_id
+
+
+def _compression_app(**kwargs: int) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, **kwargs)
+
+    @app.get("/small")
+    async def small() -> Response:
+        return Response(b"{}", media_type="application/json")
+
+    @app.get("/large")
+    async def large() -> Response:
+        return Response(LARGE_BODY, media_type="application/json")
+
+    @app.get("/jpeg")
+    async def jpeg() -> Response:
+        return Response(LARGE_BODY, media_type="image/jpeg")
+
+    @app.get("/stream")
+    async def stream() -> StreamingResponse:
+        async def lines() -> AsyncIterator[bytes]:
+            for i in range(3):
+                yield b'{"line": %d}\n' % i
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    return app
+
+
+LARGE_BODY = b'{"text": "' + b"a" * 4096 + b'"}'
+
+
+async def _get(app: FastAPI, path: str, accept_encoding: str = "gzip") -> tuple[Headers, bytes]:
+    async with (
+        AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client,
+        client.stream("GET", path, headers={"accept-encoding": accept_encoding}) as response,
+    ):
+        body = b"".join([chunk async for chunk in response.aiter_raw()])
+    return response.headers, body
+
+
+class TestCompressionMiddleware:
+    async def test_large_body_gzipped(self) -> None:
+        headers, body = await _get(_compression_app(), "/large")
+        assert headers["content-encoding"] == "gzip"
+        assert headers["content-length"] == str(len(body))
+        assert "accept-encoding" in headers["vary"].lower()
+        assert gzip.decompress(body) == LARGE_BODY
+
+    async def test_small_body_untouched(self) -> None:
+        headers, body = await _get(_compression_app(), "/small")
+        assert "content-encoding" not in headers
+        assert body == b"{}"
+
+    async def test_already_compressed_type_skipped(self) -> None:
+        headers, body = await _get(_compression_app(), "/jpeg")
+        assert "content-encoding" not in headers
+        assert body == LARGE_BODY
+
+    async def test_identity_without_accept_encoding(self) -> None:
+        headers, body = await _get(_compression_app(), "/large", accept_encoding="identity")
+        assert "content-encoding" not in headers
+
+    async def test_stream_compressed_chunk_by_chunk(self) -> None:
+        headers, body = await _get(_compression_app(), "/stream")
+        assert headers["content-encoding"] == "gzip"
+        assert "content-length" not in headers
+        assert gzip.decompress(body) == b'{"line": 0}\n{"line": 1}\n{"line": 2}\n'
+
+    async def test_large_chunks_compressed_in_thread(self) -> None:
+        with patch("src.core.middleware.asyncio.to_thread", wraps=asyncio.to_thread) as to_thread:
+            headers, body = await _get(_compression_app(thread_threshold=1024), "/large")
+        assert to_thread.await_count == 1
+        assert gzip.decompress(body) == LARGE_BODY
+
+
+class TestNegotiateEncoding:
+    def test_prefers_highest_weight(self) -> None:
+        encodings = {"br": GzipCompressor, "gzip": GzipCompressor}
+        assert negotiate_encoding("gzip;q=1.0, br;q=0.5", encodings) == "gzip"
+
+    def test_server_preference_breaks_ties(self) -> None:
+        encodings = {"br": GzipCompressor, "gzip": GzipCompressor}
+        assert negotiate_encoding("gzip, br", encodings) == "br"
+
+    def test_wildcard_and_refusal(self) -> None:
+        encodings = {"br": GzipCompressor, "gzip": GzipCompressor}
+        assert negotiate_encoding("*, br;q=0", encodings) == "gzip"
+        assert negotiate_encoding("gzip;q=0", encodings) is None
+        assert negotiate_encoding("", encodings) is None
+
+
+class TestCancelOnDisconnect:
+    @staticmethod
+    async def _run(handler_seconds: float, disconnect_after: float) -> tuple[list[Message], bool]:
+        cancelled = False
+
+        async def app(scope: object, receive: object, send: object) -> None:
+            nonlocal cancelled
+            try:
+                await asyncio.sleep(handler_seconds)
+            except asyncio.CancelledError:
+                cancelled = True
+                raise
+            await send({"type": "http.response.start", "status": 200, "headers": []})  # type: ignore[operator]
+            await send({"type": "http.response.body", "body": b"ok"})  # type: ignore[operator]
+
+        incoming: list[Message] = [{"type": "http.request", "body": b"", "more_body": False}]
+
+        async def receive() -> Message:
+            if incoming:
+                return incoming.pop()
+            await asyncio.sleep(disconnect_after)
+            return {"type": "http.disconnect"}
+
+        sent: list[Message] = []
+
+        async def send(message: Message) -> None:
+            sent.append(message)
+
+        scope = {"type": "http", "method": "GET", "path": "/slow"}
+        await CancelOnDisconnectMiddleware(app)(scope, receive, send)  # type: ignore[arg-type]
+        return sent, cancelled
+
+    async def test_handler_is_cancelled(self) -> None:
+        sent, cancelled = await self._run(handler_seconds=10, disconnect_after=0.01)
+        assert cancelled
+        assert sent[0]["status"] == 499
+
+    async def test_completed_response_is_untouched(self) -> None:
+        sent, cancelled = await self._run(handler_seconds=0, disconnect_after=0)
+        assert not cancelled
+        assert sent[0]["status"] == 200
+        assert sent[1]["body"] == b"ok"
@@ -0,0 +1,36 @@
+from unittest.mock import patch
+
+from src.core.page_buffer import PageBuffer
+
+
+class TestPageBuffer:
+    def test_get_put(self) -> None:
+        buffer = PageBuffer(ttl=60, max_bytes=100)
+        assert buffer.put("a", [1], size=10)
+        assert buffer.get("a") == [1]
+        assert buffer.get("b") is None
+        assert buffer.size == 10
+
+    def test_expired_entry_is_dropped(self) -> None:
+        buffer = PageBuffer(ttl=5, max_bytes=100)
+        with patch("src.core.page_buffer.time.monotonic", return_value=100.0):
+            buffer.put("a", [1], size=10)
+        with patch("src.core.page_buffer.time.monotonic", return_value=106.0):
+            assert buffer.get("a") is None
+        assert buffer.size == 0
+
+    def test_evicts_least_recently_used(self) -> None:
+        buffer = PageBuffer(ttl=60, max_bytes=30)
+        buffer.put("a", 1, size=10)
+        buffer.put("b", 2, size=10)
+        buffer.put("c", 3, size=10)
+        buffer.get("a")
+        buffer.put("d", 4, size=10)
+        assert "b" not in buffer
+        assert "a" in buffer
+        assert buffer.size == 30
+
+    def test_rejects_oversized_entry(self) -> None:
+        buffer = PageBuffer(ttl=60, max_bytes=10)
+        assert not buffer.put("a", 1, size=11)
+        assert buffer.size == 0
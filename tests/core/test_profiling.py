@@ -0,0 +1,104 @@
+import asyncio
+import threading
+import time
+from collections import Counter
+from typing import Any
+
+import pytest
+from src.core.profiling import LoopLagMonitor, collapse, collect_stacks, dump_tasks
+from telethon.tl.functions.messages import GetHistoryRequest
+
+
+def _spin(stop: threading.Event) -> None:
+    while not stop.is_set():
+        time.sleep(0.001)
+
+
+class TestCollectStacks:
+    def test_samples_target_thread(self) -> None:
+        stop = threading.Event()
+        thread = threading.Thread(target=_spin, args=(stop,), name="spinner")
+        thread.start()
+        try:
+            assert thread.ident is not None
+            counts = collect_stacks(0.05, interval=0.001, thread_ids=[thread.ident])
+        finally:
+            stop.set()
+            thread.join()
+        assert counts
+        assert all(stack.startswith("spinner;") for stack in counts)
+        assert any("_spin (" in stack for stack in counts)
+
+    def test_collapse_format(self) -> None:
+        output = collapse(Counter({"MainThread;main (app.py);handler (app.py)": 7, "MainThread;main (app.py)": 2}))
+        assert output == "MainThread;main (app.py);handler (app.py) 7\nMainThread;main (app.py) 2\n"
+
+    def test_one_profile_at_a_time(self) -> None:
+        thread = threading.Thread(target=collect_stacks, args=(0.2,))
+        thread.start()
+        time.sleep(0.02)
+        try:
+            with pytest.raises(RuntimeError):
+                collect_stacks(0.01)
+        finally:
+            thread.join()
+
+
+# Compiled under a telethon path so the dump treats it as a TelegramClient frame.
+_TELETHON_SOURCE = """
+async def _call(self, sender, request):
+    await self.event.wait()
+"""
+_telethon: dict[str, Any] = {}
+exec(compile(_TELETHON_SOURCE, "/site-packages/telethon/client/users.py", "exec"), _telethon)
+
+
+class _Client:
+    def __init__(self) -> None:
+        self.event = asyncio.Event()
+
+
+async def _handler(client: _Client) -> None:
+    await _telethon["_call"](client, None, GetHistoryRequest(None, 0, None, 0, 100, 0, 0, 0))
+
+
+class TestDumpTasks:
+    async def test_reports_telegram_call(self) -> None:
+        client = _Client()
+        task = asyncio.create_task(_handler(client), name="GET /api/channels/x/posts")
+        idle = asyncio.create_task(asyncio.sleep(10), name="idle")
+        await asyncio.sleep(0)
+        try:
+            tasks = {t["name"]: t for t in dump_tasks()}
+        finally:
+            client.event.set()
+            idle.cancel()
+            await task
+        dumped = tasks["GET /api/channels/x/posts"]
+        assert dumped["state"] == "pending"
+        assert dumped["telegram_call"] == "_call -> GetHistoryRequest"
+        assert dumped["stack"][0].startswith("_handler (")
+        assert "Future" in dumped["awaiting"]
+        assert tasks["idle"]["telegram_call"] is None
+
+
+class TestLoopLagMonitor:
+    def test_stats(self) -> None:
+        monitor = LoopLagMonitor(interval=0.5)
+        assert monitor.stats() == {"interval": 0.5, "samples": 0}
+        for lag in (0.001, 0.002, 0.1):
+            monitor.record(lag)
+        stats = monitor.stats()
+        assert stats["samples"] == 3
+        assert stats["current_ms"] == 100.0
+        assert stats["max_ms"] == 100.0
+        assert stats["p50_ms"] == 2.0
+
+    async def test_measures_blocking(self) -> None:
+        monitor = LoopLagMonitor(interval=0.01)
+        monitor.start()
+        await asyncio.sleep(0.005)
+        time.sleep(0.05)
+        await asyncio.sleep(0.02)
+        await monitor.close()
+        assert monitor.stats()["max_ms"] >= 30
@@ -0,0 +1,35 @@
+import json
+from datetime import UTC, datetime
+
+import pytest
+from src.core.responses import FastJSONResponse, to_ndjson_line
+from src.schemas.telegram import MessageSchema
+from src.services.telegram import _serialize_message
+
+from tests.conftest import make_mock_channel, make_mock_message, make_mock_user
+
+
+class TestFastJSONResponse:
+    def test_renders_compact_json(self) -> None:
+        response = FastJSONResponse({"messages": [{"id": 1, "text": "привет"}], "count": 1})
+        assert response.media_type == "application/json"
+        assert json.loads(response.body) == {"messages": [{"id": 1, "text": "привет"}], "count": 1}
+
+    def test_ndjson_line(self) -> None:
+        assert to_ndjson_line({"a": 1}) == b'{"a":1}\n'
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        make_mock_message(msg_id=1),
+        make_mock_message(msg_id=2, date=datetime(2025, 1, 1, 12, 0, 0, 1234, tzinfo=UTC), replies_count=None),
+        make_mock_message(msg_id=3, sender=make_mock_channel(), media=object()),
+        make_mock_message(msg_id=4, sender=make_mock_user(username=None)),
+    ],
+)
+def test_matches_response_model(message: object) -> None:
+    """The fast path must put on the wire exactly what the response model used to."""
+    serialized = _serialize_message(message)
+    expected = MessageSchema.model_validate(serialized).model_dump_json()
+    assert FastJSONResponse(serialized).body == expected.encode()
@@ -0,0 +1,138 @@
+import asyncio
+from typing import Any
+from unittest.mock import AsyncMock, patch
+
+from fastapi import HTTPException
+from src.core.page_buffer import PageBuffer
+from src.core.search_prefetch import SearchPrefetcher, search_many
+from src.core.shared_state import MemoryBackend, SharedState
+from src.services.telegram import decode_multi_cursor, encode_multi_cursor
+
+PAGES: dict[str | None, tuple[list[dict[str, Any]], str | None]] = {
+    None: ([{"id": 1, "text": "one"}], "c1"),
+    "c1": ([{"id": 2, "text": "two"}], "c2"),
+    "c2": ([{"id": 3, "text": "three"}], "c3"),
+    "c3": ([{"id": 4, "text": "four"}], None),
+}
+
+
+async def _search(
+    func: object, tag: str, cursor: str | None, limit: int, fields: frozenset[str] | None = None
+) -> tuple[list[dict[str, Any]], str | None]:
+    return PAGES[cursor]
+
+
+async def _drain(prefetcher: SearchPrefetcher) -> None:
+    while prefetcher._inflight:
+        await asyncio.gather(*prefetcher._inflight.values())
+
+
+class TestSearchPrefetcher:
+    async def test_prefetches_following_pages(self) -> None:
+        prefetcher = SearchPrefetcher(PageBuffer(ttl=60, max_bytes=1 << 20), depth=2, concurrency=2)
+        with patch("src.core.search_prefetch.with_retry", new=AsyncMock(side_effect=_search)) as retry:
+            assert await prefetcher.fetch("#tag", None, 10) == PAGES[None]
+            await _drain(prefetcher)
+            assert retry.await_count == 3
+
+            assert await prefetcher.fetch("#tag", "c1", 10) == PAGES["c1"]
+            await _drain(prefetcher)
+            assert retry.await_count == 4
+            assert await prefetcher.fetch("#tag", "c2", 10) == PAGES["c2"]
+            assert await prefetcher.fetch("#tag", "c3", 10) == PAGES["c3"]
+            assert retry.await_count == 4
+        await prefetcher.close()
+
+    async def test_disabled_with_zero_depth(self) -> None:
+        prefetcher = SearchPrefetcher(PageBuffer(ttl=60, max_bytes=1 << 20), depth=0, concurrency=2)
+        with patch("src.core.search_prefetch.with_retry", new=AsyncMock(side_effect=_search)) as retry:
+            await prefetcher.fetch("#tag", None, 10)
+            assert not prefetcher._inflight
+            assert retry.await_count == 1
+
+    async def test_failed_prefetch_falls_back_to_fetch(self) -> None:
+        prefetcher = SearchPrefetcher(PageBuffer(ttl=60, max_bytes=1 << 20), depth=1, concurrency=2)
+        retry = AsyncMock(
+            side_effect=[PAGES[None], HTTPException(status_code=429, detail="Rate limited"), PAGES["c1"], PAGES["c2"]]
+        )
+        with patch("src.core.search_prefetch.with_retry", new=retry):
+            await prefetcher.fetch("#tag", None, 10)
+            await _drain(prefetcher)
+            assert await prefetcher.fetch("#tag", "c1", 10) == PAGES["c1"]
+        await prefetcher.close()
+
+
+def _message(msg_id: int, day: int) -> dict[str, Any]:
+    return {"id": msg_id, "date": f"2025-01-{day:02d}T00:00:00+00:00", "channel": {"id": 1}}
+
+
+class TestSearchMany:
+    async def test_merges_tags_and_builds_composite_cursor(self) -> None:
+        pages = {
+            ("#a", None): ([_message(1, 1), _message(2, 3)], "a1"),
+            ("#b", None): ([_message(2, 3), _message(3, 2)], None),
+        }
+        prefetcher = SearchPrefetcher(PageBuffer(ttl=60, max_bytes=1 << 20), depth=0, concurrency=1)
+        with patch.object(prefetcher, "fetch", new=AsyncMock(side_effect=lambda t, c, *_: pages[(t, c)])):
+            messages, cursor, errors = await search_many(prefetcher, ["#a", "#b"], None, 10)
+        assert [m["id"] for m in messages] == [2, 3, 1]
+        assert errors == {}
+        assert cursor is not None
+        assert decode_multi_cursor(cursor) == {"#a": "a1", "#b": None}
+
+    async def test_resumes_only_open_streams_and_keeps_failed_cursor(self) -> None:
+        cursor = encode_multi_cursor({"#a": "a1", "#b": None, "#c": "c1"})
+        fetch = AsyncMock(side_effect=[([_message(5, 5)], None), HTTPException(status_code=429, detail="Rate limited")])
+        prefetcher = SearchPrefetcher(PageBuffer(ttl=60, max_bytes=1 << 20), depth=0, concurrency=1)
+        with patch.object(prefetcher, "fetch", new=fetch):
+            messages, next_cursor, errors = await search_many(prefetcher, ["#a", "#b", "#c"], cursor, 10)
+        assert [call.args[0] for call in fetch.await_args_list] == ["#a", "#c"]
+        assert [m["id"] for m in messages] == [5]
+        assert errors == {"#c": "Rate limited"}
+        assert next_cursor is not None
+        assert decode_multi_cursor(next_cursor) == {"#a": None, "#b": None, "#c": "c1"}
+
+    async def test_pages_hold_at_most_limit_and_continue(self) -> None:
+        pages = {
+            ("#a", None): ([_message(1, 6), _message(2, 4), _message(3, 2)], "a1"),
+            ("#a", "a1"): ([_message(4, 1)], None),
+            ("#b", None): ([_message(10, 5), _message(11, 3)], None),
+        }
+        prefetcher = SearchPrefetcher(PageBuffer(ttl=60, max_bytes=1 << 20), depth=0, concurrency=1)
+        seen: list[list[int]] = []
+        cursor = None
+        with patch.object(prefetcher, "fetch", new=AsyncMock(side_effect=lambda t, c, *_: pages[(t, c)])):
+            while True:
+                messages, cursor, errors = await search_many(prefetcher, ["#a", "#b"], cursor, 2)
+                assert len(messages) <= 2
+                assert errors == {}
+                seen.append([m["id"] for m in messages])
+                if cursor is None:
+                    break
+        assert seen == [[1, 10], [2, 11], [3], [4]]
+
+    async def test_projects_after_merging(self) -> None:
+        fetch = AsyncMock(return_value=([{**_message(1, 1), "text": "one", "views": 3}], None))
+        prefetcher = SearchPrefetcher(PageBuffer(ttl=60, max_bytes=1 << 20), depth=0, concurrency=1)
+        with patch.object(prefetcher, "fetch", new=fetch):
+            messages, _, _ = await search_many(prefetcher, ["#a"], None, 10, frozenset({"text"}))
+        assert fetch.await_args is not None
+        assert fetch.await_args.args[3] == frozenset({"text", "date", "channel"})
+        assert messages == [{"id": 1, "text": "one"}]
+
+
+class TestSharedPages:
+    async def test_page_prefetched_by_another_replica(self) -> None:
+        state = SharedState(MemoryBackend())
+        replicas = [
+            SearchPrefetcher(PageBuffer(ttl=60, max_bytes=1 << 20), depth=1, concurrency=2, state=state)
+            for _ in range(2)
+        ]
+        with patch("src.core.search_prefetch.with_retry", new=AsyncMock(side_effect=_search)) as retry:
+            await replicas[0].fetch("#tag", None, 10)
+            await _drain(replicas[0])
+            assert retry.await_count == 2
+            assert await replicas[1].fetch("#tag", "c1", 10) == PAGES["c1"]
+            assert retry.await_count == 2
+        for prefetcher in replicas:
+            await prefetcher.close()
@@ -0,0 +1,60 @@
+import sqlite3
+from pathlib import Path
+
+from src.core.session_pool import InstrumentedTelegramClient
+from src.core.session_storage import BufferedSQLiteSession
+from telethon.crypto import AuthKey
+from telethon.sessions import SQLiteSession
+from telethon.tl.types import InputPeerUser, User
+
+
+def _disk_entities(path: Path) -> list[tuple[int, str]]:
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("select id, username from entities").fetchall()
+    finally:
+        conn.close()
+
+
+def _make_session_file(tmp_path: Path) -> Path:
+    session = SQLiteSession(str(tmp_path / "acc"))
+    session.set_dc(2, "149.154.167.51", 443)
+    session.auth_key = AuthKey(b"k" * 256)
+    session.save()
+    session.close()
+    return tmp_path / "acc.session"
+
+
+class TestBufferedSQLiteSession:
+    async def test_loads_file_and_defers_writes(self, tmp_path: Path) -> None:
+        path = _make_session_file(tmp_path)
+        session = BufferedSQLiteSession(str(tmp_path / "acc"))
+        assert session.dc_id == 2
+        assert session.auth_key.key == b"k" * 256
+        assert not session.dirty
+
+        session.process_entities([User(id=7, access_hash=70, username="someone")])
+        session.save()
+        assert session.get_input_entity("someone") == InputPeerUser(7, 70)
+        assert _disk_entities(path) == []
+
+        assert await session.flush()
+        assert _disk_entities(path) == [(7, "someone")]
+        assert not await session.flush()
+        assert not Path(f"{path}.tmp").exists()
+
+    async def test_close_flushes(self, tmp_path: Path) -> None:
+        path = _make_session_file(tmp_path)
+        session = BufferedSQLiteSession(str(tmp_path / "acc"))
+        session.process_entities([User(id=8, access_hash=80, username="other")])
+        await session.close()
+        assert _disk_entities(path) == [(8, "other")]
+        reopened = SQLiteSession(str(tmp_path / "acc"))
+        assert reopened.auth_key.key == b"k" * 256
+        reopened.close()
+
+    def test_client_uses_buffered_session(self, tmp_path: Path) -> None:
+        _make_session_file(tmp_path)
+        client = InstrumentedTelegramClient(str(tmp_path / "acc"), 1, "hash", buffered=True)
+        assert isinstance(client.session, BufferedSQLiteSession)
+        assert client.session_name == "acc"
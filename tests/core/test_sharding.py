@@ -0,0 +1,131 @@
+import os
+from collections.abc import AsyncIterator, Iterator
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from fastapi import FastAPI, Request
+from src.core.metrics import session_label
+from src.core.session_pool import SessionPool, prefer_session
+from src.core.sharding import FORWARDED_HEADER, WEBHOOKS_ROLE, WorkerShard, _target, request_session
+from src.services.telegram import _encode_cursor, encode_multi_cursor
+from starlette.types import Message
+
+NAMES = ["a.session", "b.session", "c.session", "d.session"]
+
+
+async def _receive() -> Message:
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+def _request(path: str, query: str = "", headers: dict[str, str] | None = None) -> Request:
+    raw_headers = [(k.encode(), v.encode()) for k, v in (headers or {}).items()]
+    scope = {"type": "http", "method": "GET", "path": path, "query_string": query.encode(), "headers": raw_headers}
+    return Request(scope, _receive)
+
+
+@pytest.fixture
+def shards(tmp_path: Path) -> Iterator[list[WorkerShard]]:
+    shards = [WorkerShard(tmp_path, workers=2, address=str(tmp_path / f"w{i}.sock")) for i in range(2)]
+    yield shards
+    for shard in shards:
+        shard.release()
+
+
+class TestWorkerShard:
+    def test_sessions_are_split(self, shards: list[WorkerShard]) -> None:
+        first, second = (shard.claim(NAMES) for shard in shards)
+        assert len(first) == len(second) == 2
+        assert set(first) | set(second) == set(NAMES)
+        assert shards[0].owner(second[0]) == shards[1].address
+        assert shards[1].owner(first[0]) == shards[0].address
+        assert shards[0].peers() == [shards[1].address]
+
+    def test_released_sessions_can_be_claimed(self, shards: list[WorkerShard], tmp_path: Path) -> None:
+        shards[0].claim(NAMES)
+        shards[0].release()
+        assert shards[1].owner(NAMES[0]) is None
+        assert len(WorkerShard(tmp_path, workers=1, address="x").claim(NAMES)) == 4
+
+    def test_role_is_singleton(self, shards: list[WorkerShard]) -> None:
+        assert shards[0].claim_role(WEBHOOKS_ROLE)
+        assert not shards[1].claim_role(WEBHOOKS_ROLE)
+        assert shards[1].owner(WEBHOOKS_ROLE) == shards[0].address
+        assert shards[1].peers() == []
+
+
+class TestRouting:
+    def test_request_session(self) -> None:
+        cursor = _encode_cursor(1, 2, 3, 4, "b.session")
+        assert request_session(_request("/api/search/posts", f"cursor={cursor}")) == "b.session"
+        multi = encode_multi_cursor({"#a": None, "#b": cursor})
+        assert request_session(_request("/api/search/posts/multi", f"cursor={multi}")) == "b.session"
+        assert request_session(_request("/api/search/posts", "cursor=junk")) is None
+
+    def test_target(self, shards: list[WorkerShard]) -> None:
+        local, remote = shards
+        local.claim(NAMES)
+        remote.claim(NAMES)
+        cursor = f"cursor={_encode_cursor(1, 2, 3, 4, sorted(remote.owned)[0])}"
+        assert _target(local, _request("/api/search/posts", cursor)) == remote.address
+        assert _target(remote, _request("/api/search/posts", cursor)) is None
+        assert _target(local, _request("/api/search/posts", cursor, {FORWARDED_HEADER: "1"})) is None
+        assert _target(local, _request("/api/channels/x/posts")) is None
+
+    def test_worker_without_sessions_forwards(self, shards: list[WorkerShard]) -> None:
+        idle, busy = shards
+        busy.claim(NAMES)
+        busy.claim_role(WEBHOOKS_ROLE)
+        assert _target(idle, _request("/api/channels/x/posts")) == busy.address
+        assert _target(idle, _request("/api/webhooks")) == busy.address
+        assert _target(idle, _request("/api/admin/tasks")) is None
+        assert _target(idle, _request("/health")) is None
+
+
+@pytest.fixture
+async def serving(tmp_path: Path) -> AsyncIterator[WorkerShard]:
+    app = FastAPI()
+
+    @app.get("/api/echo")
+    async def echo(request: Request) -> dict[str, str | None]:
+        return {"q": request.query_params.get("q"), "forwarded": request.headers.get(FORWARDED_HEADER)}
+
+    shard = WorkerShard(tmp_path, workers=2, address=str(tmp_path / "s.sock"))
+    await shard.start(app)
+    yield shard
+    await shard.close()
+
+
+async def test_forward_over_unix_socket(serving: WorkerShard, tmp_path: Path) -> None:
+    shard = WorkerShard(tmp_path, workers=2, address=str(tmp_path / "c.sock"))
+    response = await shard.forward(_request("/api/echo", "q=1"), serving.address)
+    body = b"".join([chunk async for chunk in response.body_iterator])  # type: ignore[misc]
+    await response.background()  # type: ignore[misc]
+    await shard.close()
+    assert response.status_code == 200
+    assert body == f'{{"q":"1","forwarded":"{os.getpid()}"}}'.encode()
+
+
+async def test_pool_loads_only_owned_sessions(shards: list[WorkerShard]) -> None:
+    pools = [SessionPool(shard) for shard in shards]
+    with (
+        patch("src.core.session_pool.settings.telegram_backend", "fake"),
+        patch("src.core.session_pool.settings.fake_sessions", 4),
+    ):
+        for pool in pools:
+            await pool.init()
+    names = [{session_label(c) for c in pool.clients} for pool in pools]
+    assert len(names[0]) == len(names[1]) == 2
+    assert names[0].isdisjoint(names[1])
+
+    preferred = sorted(names[0])[1]
+    with prefer_session(preferred):
+        assert {session_label(await pools[0].get_next()) for _ in range(4)} == {preferred}
+    with prefer_session("elsewhere"):
+        assert {session_label(await pools[0].get_next()) for _ in range(4)} == names[0]
+    # A preferred session that is flood-waiting is skipped like any other cooling one.
+    await pools[0].cooldown(next(c for c in pools[0].clients if session_label(c) == preferred), 60)
+    with prefer_session(preferred):
+        assert {session_label(await pools[0].get_next()) for _ in range(4)} == names[0] - {preferred}
+    for pool in pools:
+        await pool.close()
@@ -0,0 +1,270 @@
+import asyncio
+import time
+from collections.abc import AsyncIterator
+from unittest.mock import patch
+
+import pytest
+from src.core.fake_telegram import FakeBackendConfig, FakeTelegramClient
+from src.core.metrics import session_label
+from src.core.session_pool import SessionPool
+from src.core.shared_state import MemoryBackend, RedisBackend, SharedState, StateBackend, StateBackendError
+from src.services.telegram import _resolve_entity, get_channel_info, get_channel_posts, search_comments
+from telethon.tl.types import InputPeerChannel
+
+
+class RespStandIn:
+    """Just enough of a Redis server for the commands RedisBackend sends."""
+
+    def __init__(self) -> None:
+        self.data: dict[bytes, tuple[bytes, float | None]] = {}
+        self.commands: list[bytes] = []
+        self.server: asyncio.Server | None = None
+
+    @property
+    def url(self) -> str:
+        assert self.server is not None
+        port = self.server.sockets[0].getsockname()[1]
+        return f"redis://127.0.0.1:{port}/0"
+
+    async def start(self) -> None:
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+
+    async def close(self) -> None:
+        assert self.server is not None
+        self.server.close()
+        await self.server.wait_closed()
+
+    def _get(self, key: bytes) -> bytes | None:
+        entry = self.data.get(key)
+        if entry is None or (entry[1] is not None and entry[1] <= time.monotonic()):
+            self.data.pop(key, None)
+            return None
+        return entry[0]
+
+    @staticmethod
+    def _bulk(value: bytes | None) -> bytes:
+        return b"$-1\r\n" if value is None else b"$%d\r\n%b\r\n" % (len(value), value)
+
+    def _execute(self, args: list[bytes]) -> bytes:
+        command = args[0].upper()
+        self.commands.append(command)
+        if command in (b"PING", b"AUTH", b"SELECT"):
+            return b"+OK\r\n"
+        if command == b"GET":
+            return self._bulk(self._get(args[1]))
+        if command == b"MGET":
+            return b"*%d\r\n" % (len(args) - 1) + b"".join(self._bulk(self._get(k)) for k in args[1:])
+        if command == b"SET":
+            options = [a.upper() for a in args[3:]]
+            if b"NX" in options and self._get(args[1]) is not None:
+                return b"$-1\r\n"
+            ttl = int(args[4 + options.index(b"PX")]) / 1000 if b"PX" in options else None
+            self.data[args[1]] = (args[2], time.monotonic() + ttl if ttl is not None else None)
+            return b"+OK\r\n"
+        if command == b"PEXPIRE":
+            value = self._get(args[1])
+            if value is None:
+                return b":0\r\n"
+            self.data[args[1]] = (value, time.monotonic() + int(args[2]) / 1000)
+            return b":1\r\n"
+        if command == b"DEL":
+            return b":%d\r\n" % int(self.data.pop(args[1], None) is not None)
+        return b"-ERR unknown command\r\n"
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while line := await reader.readline():
+                args = []
+                for _ in range(int(line[1:-2])):
+                    length = int((await reader.readline())[1:-2])
+                    args.append((await reader.readexactly(length + 2))[:-2])
+                writer.write(self._execute(args))
+                await writer.drain()
+        finally:
+            writer.close()
+
+
+@pytest.fixture
+async def stand_in() -> AsyncIterator[RespStandIn]:
+    server = RespStandIn()
+    await server.start()
+    yield server
+    await server.close()
+
+
+@pytest.fixture(params=["memory", "redis"])
+async def backend(request: pytest.FixtureRequest, stand_in: RespStandIn) -> AsyncIterator[StateBackend]:
+    backend: StateBackend = MemoryBackend() if request.param == "memory" else RedisBackend(stand_in.url)
+    yield backend
+    await backend.close()
+
+
+class TestBackends:
+    async def test_get_set_delete(self, backend: StateBackend) -> None:
+        assert await backend.get("k") is None
+        assert await backend.set("k", b"v")
+        assert await backend.get("k") == b"v"
+        assert await backend.mget(["k", "missing"]) == [b"v", None]
+        await backend.delete("k")
+        assert await backend.get("k") is None
+
+    async def test_nx_and_ttl(self, backend: StateBackend) -> None:
+        assert await backend.set("k", b"a", ttl=0.05, nx=True)
+        assert not await backend.set("k", b"b", nx=True)
+        assert await backend.expire("k", 0.05)
+        await asyncio.sleep(0.08)
+        assert await backend.get("k") is None
+        assert not await backend.expire("k", 1)
+
+    async def test_redis_error_reply(self, stand_in: RespStandIn) -> None:
+        backend = RedisBackend(stand_in.url)
+        with pytest.raises(StateBackendError, match="unknown command"):
+            await backend._command("FLUSHALL")
+        assert await backend.set("k", b"v")
+        await backend.close()
+
+    async def test_unreachable_redis_is_a_miss(self) -> None:
+        state = SharedState(RedisBackend("redis://127.0.0.1:1/0", timeout=0.5))
+        assert await state.get_json("k") is None
+        assert not await state.acquire_lease("s", "me", 10)
+        assert await state.get_cooldowns(["s"]) == {}
+
+
+class TestSharedState:
+    async def test_leases(self, backend: StateBackend) -> None:
+        state = SharedState(backend, "t:")
+        assert await state.acquire_lease("s1", "a", 10)
+        assert not await state.acquire_lease("s1", "b", 10)
+        assert await state.acquire_lease("s1", "a", 10)
+        await state.release_lease("s1", "b")
+        assert not await state.acquire_lease("s1", "b", 10)
+        await state.release_lease("s1", "a")
+        assert await state.acquire_lease("s1", "b", 10)
+
+    async def test_entity_round_trip(self, backend: StateBackend) -> None:
+        state = SharedState(backend)
+        entity = await FakeTelegramClient("fake-0", FakeBackendConfig(latency_ms=0)).get_entity("durov")
+        await state.put_entity("fake-0", "Durov", entity)
+        assert await state.get_entity("fake-0", "durov") == InputPeerChannel(entity.id, entity.access_hash)
+        assert await state.get_entity("fake-1", "durov") is None
+
+
+class TestReplicas:
+    async def test_cooldown_is_seen_by_other_replica(self, stand_in: RespStandIn) -> None:
+        states = [SharedState(RedisBackend(stand_in.url), "t:") for _ in range(2)]
+        pools = [SessionPool(state=state) for state in states]
+        with (
+            patch("src.core.session_pool.settings.telegram_backend", "fake"),
+            patch("src.core.session_pool.settings.fake_sessions", 2),
+            patch("src.core.session_pool.settings.state_sync_interval", 0.01),
+        ):
+            for pool in pools:
+                await pool.init()
+            cooled = pools[0].clients[0]
+            await pools[0].cooldown(cooled, 60)
+            await asyncio.sleep(0.05)
+            picked = {session_label(await pools[1].get_next()) for _ in range(4)}
+        assert picked == {session_label(c) for c in pools[1].clients} - {session_label(cooled)}
+        for pool, state in zip(pools, states, strict=True):
+            await pool.close()
+            await state.close()
+
+    async def test_all_cooling_down_returns_earliest(self) -> None:
+        pool = SessionPool(state=SharedState(MemoryBackend()))
+        with (
+            patch("src.core.session_pool.settings.telegram_backend", "fake"),
+            patch("src.core.session_pool.settings.fake_sessions", 2),
+        ):
+            await pool.init()
+        first, second = pool.clients
+        await pool.cooldown(first, 30)
+        await pool.cooldown(second, 10)
+        assert await pool.get_next() is second
+        await pool.close()
+
+    async def test_leases_split_sessions(self, stand_in: RespStandIn) -> None:
+        states = [SharedState(RedisBackend(stand_in.url), "t:") for _ in range(2)]
+        pools = [SessionPool(state=state) for state in states]
+        pools[1]._owner = "other-replica"
+        with (
+            patch("src.core.session_pool.settings.telegram_backend", "fake"),
+            patch("src.core.session_pool.settings.fake_sessions", 4),
+            patch("src.core.session_pool.settings.replicas", 2),
+        ):
+            for pool in pools:
+                await pool.init()
+        names = [{session_label(c) for c in pool.clients} for pool in pools]
+        assert len(names[0]) == len(names[1]) == 2
+        assert names[0].isdisjoint(names[1])
+        for pool, state in zip(pools, states, strict=True):
+            await pool.close()
+            await state.close()
+        assert not any(key.startswith(b"t:lease:") for key in stand_in.data)
+
+    async def test_expired_lease_is_taken_over(self) -> None:
+        backend = MemoryBackend()
+        pools = [SessionPool(state=SharedState(backend)) for _ in range(2)]
+        pools[1]._owner = "other-replica"
+        with (
+            patch("src.core.session_pool.settings.telegram_backend", "fake"),
+            patch("src.core.session_pool.settings.fake_sessions", 3),
+            patch("src.core.session_pool.settings.replicas", 2),
+            patch("src.core.session_pool.settings.session_lease_ttl", 0.1),
+            patch("src.core.session_pool.settings.state_sync_interval", 0.01),
+        ):
+            for pool in pools:
+                await pool.init()
+            assert [len(pool.clients) for pool in pools] == [2, 1]
+            # The first replica dies: it stops renewing and its leases run out.
+            assert pools[0]._sync_task is not None
+            pools[0]._sync_task.cancel()
+            async with asyncio.timeout(2):
+                while len(pools[1].clients) < 2:
+                    await asyncio.sleep(0.01)
+        taken = {session_label(c) for c in pools[1].clients}
+        assert len(taken & {session_label(c) for c in pools[0].clients}) == 1
+        for pool in pools:
+            await pool.close()
+
+
+class TestEntityCache:
+    async def test_resolution_is_reused(self, stand_in: RespStandIn) -> None:
+        state = SharedState(RedisBackend(stand_in.url))
+        client = FakeTelegramClient("fake-0", FakeBackendConfig(latency_ms=0, posts_per_channel=10))
+        with (
+            patch("src.services.telegram.get_shared_state", return_value=state),
+            patch.object(client, "get_entity", wraps=client.get_entity) as get_entity,
+        ):
+            first = await _resolve_entity(client, "durov")  # type: ignore[arg-type]
+            second = await _resolve_entity(client, "durov")  # type: ignore[arg-type]
+            posts = await get_channel_posts(client, "durov", limit=5)  # type: ignore[arg-type]
+        assert get_entity.await_count == 1
+        assert second == InputPeerChannel(first.id, first.access_hash)
+        assert len(posts) == 5
+        await state.close()
+
+
+class TestDiscussionCache:
+    async def test_search_comments_after_channel_info_is_one_call(self, backend: StateBackend) -> None:
+        state = SharedState(backend)
+        client = FakeTelegramClient("fake-0", FakeBackendConfig(latency_ms=0))
+        with patch("src.services.telegram.get_shared_state", return_value=state):
+            info = await get_channel_info(client, "durov")  # type: ignore[arg-type]
+            calls = client.stats.calls
+            comments = await search_comments(client, "durov", "launch", limit=5)  # type: ignore[arg-type]
+        assert client.stats.calls == calls + 1
+        assert len(comments) == 5
+        assert await state.get_discussion("fake-0", "DUROV") == (
+            info["linked_chat_id"],
+            InputPeerChannel(info["linked_chat_id"], info["linked_chat_id"] * 7 + 1),
+        )
+        assert await state.get_discussion("fake-1", "durov") is None
+
+    async def test_search_comments_fills_cache(self, backend: StateBackend) -> None:
+        state = SharedState(backend)
+        client = FakeTelegramClient("fake-0", FakeBackendConfig(latency_ms=0))
+        with patch("src.services.telegram.get_shared_state", return_value=state):
+            await search_comments(client, "durov", "launch", limit=5)  # type: ignore[arg-type]
+            calls = client.stats.calls
+            await search_comments(client, "durov", "launch", limit=5)  # type: ignore[arg-type]
+        assert client.stats.calls == calls + 1
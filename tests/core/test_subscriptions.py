@@ -0,0 +1,127 @@
+import asyncio
+from collections.abc import Iterator
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from src.core.subscriptions import Subscription, SubscriptionHub
+
+from tests.conftest import make_mock_message
+
+
+def _pool(count: int) -> MagicMock:
+    pool = MagicMock()
+    pool.clients = [MagicMock(name=f"client{i}") for i in range(count)]
+    return pool
+
+
+@pytest.fixture(autouse=True)
+def members() -> Iterator[AsyncMock]:
+    with patch("src.core.subscriptions.is_channel_member", new=AsyncMock(return_value=True)) as member:
+        yield member
+
+
+def _event(channel_id: int, client: MagicMock, msg_id: int = 1) -> SimpleNamespace:
+    return SimpleNamespace(chat_id=channel_id, client=client, message=make_mock_message(msg_id=msg_id))
+
+
+class TestSubscription:
+    def test_drops_oldest_when_full(self) -> None:
+        subscription = Subscription(frozenset({1}), maxsize=2)
+        for i in range(3):
+            subscription.push({"i": i})
+        assert subscription.dropped == 1
+        assert subscription._queue.get_nowait() == {"i": 1}
+
+
+class TestSubscriptionHub:
+    async def test_spreads_channels_across_sessions(self) -> None:
+        pool = _pool(2)
+        hub = SubscriptionHub(pool, queue_size=10)
+        with patch("src.core.subscriptions.with_retry", new=AsyncMock(side_effect=[-1001, -1002])):
+            await hub.subscribe(["a", "b"])
+        assert set(hub._owners.values()) == set(pool.clients)
+        for client in pool.clients:
+            assert client.add_event_handler.call_count == 2
+
+    async def test_fans_out_owner_events_only(self) -> None:
+        pool = _pool(2)
+        hub = SubscriptionHub(pool, queue_size=10)
+        with patch("src.core.subscriptions.with_retry", new=AsyncMock(return_value=-1001)):
+            first = await hub.subscribe(["a"])
+            second = await hub.subscribe(["a"])
+        owner = hub._owners[-1001]
+        other = next(c for c in pool.clients if c is not owner)
+
+        await hub._on_new_message(_event(-1001, other))
+        await hub._on_message_edited(_event(-1001, owner, msg_id=7))
+        await hub._on_new_message(_event(-1009, owner))
+
+        for subscription in (first, second):
+            event = await subscription.get()
+            assert event["event"] == "message_edited"
+            assert event["message"]["id"] == 7
+            assert subscription._queue.empty()
+
+    async def test_unsubscribe_releases_channel(self) -> None:
+        hub = SubscriptionHub(_pool(1), queue_size=10)
+        with patch("src.core.subscriptions.with_retry", new=AsyncMock(return_value=-1001)):
+            subscription = await hub.subscribe(["a"])
+        await hub.unsubscribe(subscription)
+        assert hub.subscriber_count == 0
+        assert -1001 not in hub._owners
+
+    async def test_unsubscribe_waits_for_subscribe(self, members: AsyncMock) -> None:
+        hub = SubscriptionHub(_pool(1), queue_size=10)
+        with patch("src.core.subscriptions.with_retry", new=AsyncMock(side_effect=[-1001, -1001, -1002])):
+            first = await hub.subscribe(["a"])
+            checking, release = asyncio.Event(), asyncio.Event()
+
+            async def is_member(client: object, channel: str) -> bool:
+                if channel == "b":
+                    checking.set()
+                    await release.wait()
+                return True
+
+            members.side_effect = is_member
+            subscribing = asyncio.create_task(hub.subscribe(["a", "b"]))
+            await checking.wait()
+            unsubscribing = asyncio.create_task(hub.unsubscribe(first))
+            await asyncio.sleep(0)
+            release.set()
+            second = await subscribing
+            await unsubscribing
+        assert hub._subscribers == {-1001: {second}, -1002: {second}}
+        assert set(hub._owners) == {-1001, -1002}
+
+    async def test_no_sessions(self) -> None:
+        hub = SubscriptionHub(_pool(0), queue_size=10)
+        with (
+            patch("src.core.subscriptions.with_retry", new=AsyncMock(return_value=-1001)),
+            pytest.raises(RuntimeError),
+        ):
+            await hub.subscribe(["a"])
+
+    async def test_owner_must_have_joined_channel(self, members: AsyncMock) -> None:
+        pool = _pool(2)
+        busy, idle = pool.clients
+        hub = SubscriptionHub(pool, queue_size=10)
+        with patch("src.core.subscriptions.with_retry", new=AsyncMock(side_effect=[-1001, -1002])):
+            await hub.subscribe(["a"])
+            assert hub._owners[-1001] is busy
+            # The idle session has not joined "b", so the busier member owns it.
+            members.side_effect = lambda client, channel: client is busy
+            await hub.subscribe(["b"])
+        assert hub._owners[-1002] is busy
+        idle.add_event_handler.assert_not_called()
+
+    async def test_no_member_session_is_an_error(self, members: AsyncMock) -> None:
+        members.side_effect = [True, False]
+        hub = SubscriptionHub(_pool(1), queue_size=10)
+        with (
+            patch("src.core.subscriptions.with_retry", new=AsyncMock(side_effect=[-1001, -1002])),
+            pytest.raises(ValueError, match="No session has joined channel b"),
+        ):
+            await hub.subscribe(["a", "b"])
+        assert hub._owners == {}
+        assert hub.subscriber_count == 0
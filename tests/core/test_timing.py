@@ -0,0 +1,38 @@
+import asyncio
+
+from httpx import AsyncClient
+from src.core.timing import RequestTimings, record_span, request_timings, span
+
+
+class TestSpans:
+    def test_noop_without_collector(self) -> None:
+        with span("resolve"):
+            pass
+        record_span("retry", 1.0)
+
+    async def test_spans_aggregate_across_tasks(self) -> None:
+        async def download() -> None:
+            with span("download"):
+                await asyncio.sleep(0.01)
+
+        with request_timings("GET /x") as timings:
+            with span("resolve"):
+                pass
+            await asyncio.gather(download(), download())
+            record_span("retry", 0.5)
+        assert timings.counts == {"resolve": 1, "download": 2, "retry": 1}
+        assert timings.spans["download"] >= 0.02
+        assert timings.fields()["retry"] == 500.0
+
+    def test_server_timing_header(self) -> None:
+        timings = RequestTimings()
+        timings.add("history", 0.1234)
+        assert timings.server_timing(0.2) == "history;dur=123.4, total;dur=200.0"
+
+
+async def test_response_carries_server_timing(test_client: AsyncClient) -> None:
+    response = await test_client.get("/api/channels/testchannel/posts")
+    header = response.headers["server-timing"]
+    names = [entry.split(";")[0] for entry in header.split(", ")]
+    assert names[-1] == "total"
+    assert {"session_wait", "resolve", "history", "render"} <= set(names)
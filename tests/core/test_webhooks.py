@@ -0,0 +1,223 @@
+import asyncio
+import json
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import pytest
+from src.core.subscriptions import Subscription
+from src.core.webhooks import WebhookDispatcher, _write_json
+
+
+def _hub() -> MagicMock:
+    hub = MagicMock()
+    hub.subscribe = AsyncMock(side_effect=lambda channels: Subscription(frozenset({-1001}), maxsize=100))
+    hub.unsubscribe = AsyncMock()
+    return hub
+
+
+def _dispatcher(hub: MagicMock, outbox: Path, handler: httpx.MockTransport) -> WebhookDispatcher:
+    dispatcher = WebhookDispatcher(
+        hub,
+        outbox_dir=outbox,
+        batch_size=3,
+        batch_window=0.05,
+        max_attempts=3,
+        backoff_base=0.01,
+        backoff_max=0.02,
+        timeout=1,
+    )
+    dispatcher._http = httpx.AsyncClient(transport=handler)
+    return dispatcher
+
+
+async def _wait_for(condition: object, timeout: float = 2.0) -> None:
+    async with asyncio.timeout(timeout):
+        while not condition():  # type: ignore[operator]
+            await asyncio.sleep(0.01)
+
+
+class TestWebhookDispatcher:
+    async def test_batches_events_by_size_and_window(self, tmp_path: Path) -> None:
+        received: list[dict[str, object]] = []
+        transport = httpx.MockTransport(
+            lambda request: received.append(json.loads(request.content)) or httpx.Response(200)
+        )
+        dispatcher = _dispatcher(_hub(), tmp_path, transport)
+        await dispatcher.start()
+        webhook = await dispatcher.create("http://receiver/hook", ["a"])
+        assert webhook.subscription is not None
+        for i in range(4):
+            webhook.subscription.push({"event": "new_message", "message": {"id": i}})
+
+        await _wait_for(lambda: len(received) == 2)
+        assert [len(batch["events"]) for batch in received] == [3, 1]  # type: ignore[arg-type]
+        assert received[0]["webhook_id"] == webhook.id
+        await _wait_for(lambda: not webhook.pending_batches())
+        await dispatcher.close()
+
+    async def test_retries_until_receiver_recovers(self, tmp_path: Path) -> None:
+        responses = iter([httpx.Response(503), httpx.Response(200)])
+        attempts: list[int] = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            attempts.append(1)
+            return next(responses)
+
+        dispatcher = _dispatcher(_hub(), tmp_path, httpx.MockTransport(handler))
+        await dispatcher.start()
+        webhook = await dispatcher.create("http://receiver/hook", ["a"])
+        assert webhook.subscription is not None
+        webhook.subscription.push({"event": "new_message"})
+
+        await _wait_for(lambda: len(attempts) == 2 and not webhook.pending_batches())
+        await dispatcher.close()
+
+    async def test_abandons_batch_after_max_attempts(self, tmp_path: Path) -> None:
+        dispatcher = _dispatcher(_hub(), tmp_path, httpx.MockTransport(lambda request: httpx.Response(500)))
+        await dispatcher.start()
+        webhook = await dispatcher.create("http://receiver/hook", ["a"])
+        assert webhook.subscription is not None
+        webhook.subscription.push({"event": "new_message"})
+
+        await _wait_for(lambda: list((webhook.directory / "failed").glob("batch-*.json")))
+        assert not webhook.pending_batches()
+        await dispatcher.close()
+
+    async def test_restart_delivers_persisted_outbox(self, tmp_path: Path) -> None:
+        hub = _hub()
+        dispatcher = _dispatcher(hub, tmp_path, httpx.MockTransport(lambda request: httpx.Response(500)))
+        dispatcher._max_attempts = 1
+        dispatcher._backoff_base = 10
+        await dispatcher.start()
+        webhook = await dispatcher.create("http://receiver/hook", ["a"])
+        assert webhook.subscription is not None
+        webhook.subscription.push({"event": "new_message"})
+        await _wait_for(lambda: webhook.pending_batches())
+        await dispatcher.close()
+
+        received: list[bytes] = []
+        transport = httpx.MockTransport(lambda request: received.append(request.content) or httpx.Response(204))
+        restarted = _dispatcher(hub, tmp_path, transport)
+        await restarted.start()
+        assert [w.id for w in restarted.webhooks] == [webhook.id]
+        await _wait_for(lambda: len(received) == 1)
+        await restarted.close()
+
+    async def test_corrupt_webhook_is_skipped(self, tmp_path: Path) -> None:
+        hub = _hub()
+        dispatcher = _dispatcher(hub, tmp_path, httpx.MockTransport(lambda request: httpx.Response(200)))
+        await dispatcher.start()
+        webhook = await dispatcher.create("http://receiver/hook", ["a"])
+        await dispatcher.close()
+        for name, content in {"truncated": '{"id": "trun', "incomplete": '{"url": "http://receiver/hook"}'}.items():
+            (tmp_path / name).mkdir()
+            (tmp_path / name / "webhook.json").write_text(content)
+
+        restarted = _dispatcher(hub, tmp_path, httpx.MockTransport(lambda request: httpx.Response(200)))
+        await restarted.start()
+        assert [w.id for w in restarted.webhooks] == [webhook.id]
+        await restarted.close()
+
+    async def test_delete_removes_outbox(self, tmp_path: Path) -> None:
+        hub = _hub()
+        dispatcher = _dispatcher(hub, tmp_path, httpx.MockTransport(lambda request: httpx.Response(200)))
+        await dispatcher.start()
+        webhook = await dispatcher.create("http://receiver/hook", ["a"])
+        assert await dispatcher.delete(webhook.id)
+        assert not webhook.directory.exists()
+        assert not await dispatcher.delete(webhook.id)
+        hub.unsubscribe.assert_awaited_once()
+        await dispatcher.close()
+
+    async def test_failed_create_leaves_nothing_behind(self, tmp_path: Path) -> None:
+        hub = _hub()
+        dispatcher = _dispatcher(hub, tmp_path, httpx.MockTransport(lambda request: httpx.Response(200)))
+        await dispatcher.start()
+        with (
+            patch("src.core.webhooks._write_json", side_effect=OSError("No space left on device")),
+            pytest.raises(OSError),
+        ):
+            await dispatcher.create("http://receiver/hook", ["a"])
+        hub.subscribe.assert_not_awaited()
+
+        hub.subscribe = AsyncMock(side_effect=ValueError("No session has joined channel a"))
+        with pytest.raises(ValueError):
+            await dispatcher.create("http://receiver/hook", ["a"])
+        assert not dispatcher.webhooks
+        assert not list(tmp_path.iterdir())
+        await dispatcher.close()
+
+    async def test_client_errors_are_not_retried(self, tmp_path: Path) -> None:
+        statuses = iter([429, 404])
+        attempts: list[int] = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            attempts.append(1)
+            return httpx.Response(next(statuses))
+
+        dispatcher = _dispatcher(_hub(), tmp_path, httpx.MockTransport(handler))
+        await dispatcher.start()
+        webhook = await dispatcher.create("http://receiver/hook", ["a"])
+        assert webhook.subscription is not None
+        webhook.subscription.push({"event": "new_message"})
+
+        await _wait_for(lambda: list((webhook.directory / "failed").glob("batch-*.json")))
+        assert len(attempts) == 2
+        await dispatcher.close()
+
+    async def test_failed_subscribe_is_retried(self, tmp_path: Path) -> None:
+        hub = _hub()
+        dispatcher = _dispatcher(hub, tmp_path, httpx.MockTransport(lambda request: httpx.Response(200)))
+        await dispatcher.start()
+        webhook = await dispatcher.create("http://receiver/hook", ["a"])
+        await dispatcher.close()
+
+        subscription = Subscription(frozenset({-1001}), maxsize=100)
+        hub.subscribe = AsyncMock(side_effect=[RuntimeError("No telegram sessions available"), subscription])
+        restarted = _dispatcher(hub, tmp_path, httpx.MockTransport(lambda request: httpx.Response(200)))
+        await restarted.start()
+        restored = restarted.get(webhook.id)
+        assert restored is not None
+        await _wait_for(lambda: restored.subscription is subscription)
+        assert hub.subscribe.await_count == 2
+        await restarted.close()
+
+    async def test_delivery_loop_survives_errors(self, tmp_path: Path) -> None:
+        received: list[bytes] = []
+        transport = httpx.MockTransport(lambda request: received.append(request.content) or httpx.Response(200))
+        dispatcher = _dispatcher(_hub(), tmp_path, transport)
+        deliver = dispatcher._deliver
+        dispatcher._deliver = AsyncMock(side_effect=OSError("disk gone"))  # type: ignore[method-assign]
+        await dispatcher.start()
+        webhook = await dispatcher.create("http://receiver/hook", ["a"])
+        assert webhook.subscription is not None
+        webhook.subscription.push({"event": "new_message"})
+        await _wait_for(lambda: dispatcher._deliver.await_count >= 1)  # type: ignore[attr-defined]
+        dispatcher._deliver = deliver  # type: ignore[method-assign]
+        await _wait_for(lambda: len(received) == 1)
+        await dispatcher.close()
+
+    async def test_batch_written_while_listing_is_delivered(self, tmp_path: Path) -> None:
+        received: list[bytes] = []
+        transport = httpx.MockTransport(lambda request: received.append(request.content) or httpx.Response(200))
+        dispatcher = _dispatcher(_hub(), tmp_path, transport)
+        await dispatcher.start()
+        webhook = await dispatcher.create("http://receiver/hook", ["a"])
+        loop = asyncio.get_running_loop()
+        listing = webhook.pending_batches
+        raced = False
+
+        def racing_listing() -> list[Path]:
+            nonlocal raced
+            batches = listing()
+            if not raced:
+                # The batch loop finishes a batch after the outbox was listed but before the listing returns.
+                raced = True
+                _write_json(webhook.directory / "batch-00000000000000000001.json", {"events": []})
+                loop.call_soon_threadsafe(webhook.wakeup.set)
+            return batches
+
+        webhook.pending_batches = racing_listing  # type: ignore[method-assign]
+        await _wait_for(lambda: len(received) == 1)
+        await dispatcher.close()
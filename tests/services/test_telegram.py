@@ -1,5 +1,8 @@
+import asyncio
 from unittest.mock import AsyncMock, MagicMock, patch
 
+import pytest
+from src.core.shared_state import MemoryBackend, SharedState
 from src.services.telegram import (
     _decode_cursor,
     _encode_cursor,
@@ -7,11 +10,25 @@ from src.services.telegram import (
     _serialize_channel,
     _serialize_message,
     _serialize_sender,
+    compile_message_projector,
+    compile_message_serializer,
+    cursor_session,
+    decode_multi_cursor,
+    encode_multi_cursor,
+    get_channel_info,
     get_channel_posts,
+    get_channels_info,
+    get_comment_trees,
     get_post_comments,
+    get_posts_comments,
+    is_channel_member,
+    merge_search_results,
+    search_comments,
     search_posts,
 )
-from telethon.tl.types import PeerChannel
+from telethon.errors import ChannelPrivateError, FloodWaitError, MultiError
+from telethon.tl.functions.channels import GetChannelsRequest, GetFullChannelRequest
+from telethon.tl.types import InputChannel, InputPeerChannel, PeerChannel
 
 from tests.conftest import AsyncIter, make_mock_channel, make_mock_message, make_mock_user
 
@@ -22,12 +39,12 @@ class TestSerializeSender:
     def test_user(self) -> None:
         user = make_mock_user(user_id=1, first_name="John", last_name="Doe", username="johndoe")
         result = _serialize_sender(user)
-        assert result == {"id": 1, "first_name": "John", "last_name": "Doe", "username": "johndoe"}
+        assert result == {"id": 1, "first_name": "John", "last_name": "Doe", "username": "johndoe", "title": None}
 
     def test_channel(self) -> None:
         ch = make_mock_channel(channel_id=2, title="News", username="news")
         result = _serialize_sender(ch)
-        assert result == {"id": 2, "title": "News", "username": "news"}
+        assert result == {"id": 2, "first_name": None, "last_name": None, "username": "news", "title": "News"}
 
     def test_none(self) -> None:
         assert _serialize_sender(None) is None
@@ -90,6 +107,31 @@ class TestSerializeMessage:
         assert result["channel"] is None
 
 
+class TestCompileMessageSerializer:
+    def test_all_fields_returns_full_serializer(self) -> None:
+        assert compile_message_serializer(None) is _serialize_message
+        assert compile_message_serializer(frozenset({"id", "date", "text"})) is compile_message_serializer(
+            frozenset({"text", "date", "id"})
+        )
+
+    def test_projects_requested_fields_and_id(self) -> None:
+        serialize = compile_message_serializer(frozenset({"text", "views"}))
+        assert serialize(make_mock_message(msg_id=7, text="hi", views=5)) == {"id": 7, "text": "hi", "views": 5}
+
+    def test_excluded_fields_are_not_read(self) -> None:
+        msg = make_mock_message()
+        type(msg).sender = property(lambda self: (_ for _ in ()).throw(AssertionError("sender read")))
+        assert "sender" not in compile_message_serializer(frozenset({"text"}))(msg)
+
+
+class TestCompileMessageProjector:
+    def test_matches_serializer_for_same_fields(self) -> None:
+        msg = make_mock_message(msg_id=7, text="hi", views=5)
+        full = _serialize_message(msg)
+        for fields in (None, frozenset({"text", "views"}), frozenset(), frozenset({"date", "sender", "channel"})):
+            assert compile_message_projector(fields)(full) == compile_message_serializer(fields)(msg)
+
+
 class TestCursor:
     def test_encode_decode_roundtrip(self) -> None:
         cursor = _encode_cursor(100, 200, 300, 400)
@@ -101,6 +143,39 @@ class TestCursor:
         decoded = _decode_cursor(cursor)
         assert decoded == {"r": 0, "i": 0, "p": 0, "h": 0}
 
+    def test_session(self) -> None:
+        assert cursor_session(_encode_cursor(1, 2, 3, 4, "a.session")) == "a.session"
+        assert cursor_session(_encode_cursor(1, 2, 3, 4)) is None
+        assert cursor_session("not-a-cursor") is None
+
+
+class TestMultiCursor:
+    def test_roundtrip(self) -> None:
+        cursor = encode_multi_cursor({"#a": "c1", "#b": None})
+        assert cursor is not None
+        assert decode_multi_cursor(cursor) == {"#a": "c1", "#b": None}
+
+    def test_all_exhausted(self) -> None:
+        assert encode_multi_cursor({"#a": None}) is None
+
+    def test_invalid(self) -> None:
+        with pytest.raises(ValueError, match="Invalid cursor"):
+            decode_multi_cursor("not-a-cursor")
+
+
+class TestMergeSearchResults:
+    def test_orders_by_date_and_deduplicates(self) -> None:
+        def msg(msg_id: int, channel_id: int, date: str) -> dict[str, object]:
+            return {"id": msg_id, "date": date, "channel": {"id": channel_id}}
+
+        merged = merge_search_results(
+            [
+                [msg(1, 10, "2025-01-01T00:00:00+00:00"), msg(2, 10, "2025-01-03T00:00:00+00:00")],
+                [msg(1, 10, "2025-01-01T00:00:00+00:00"), msg(1, 20, "2025-01-02T00:00:00+00:00")],
+            ]
+        )
+        assert [(m["channel"]["id"], m["id"]) for m in merged] == [(10, 2), (20, 1), (10, 1)]  # type: ignore[index]
+
 
 class TestResolveEntity:
     async def test_numeric_string(self) -> None:
@@ -211,3 +286,199 @@ class TestSearchPosts:
         result_msgs, next_cursor = await search_posts(client, "#test", cursor=cursor)
         assert result_msgs == []
         assert next_cursor is None
+
+
+def _full_response(channel_id: int, about: str) -> MagicMock:
+    r = MagicMock()
+    r.full_chat = MagicMock(id=channel_id, about=about, participants_count=1000, linked_chat_id=None)
+    r.chats = [make_mock_channel(channel_id=channel_id, title=f"Channel {channel_id}")]
+    return r
+
+
+def _info_client() -> AsyncMock:
+    async def get_input_entity(peer: int | str) -> InputPeerChannel:
+        if peer == "missing":
+            raise ValueError("Cannot find any entity corresponding to missing")
+        channel_id = peer if isinstance(peer, int) else len(peer)
+        return InputPeerChannel(channel_id=channel_id, access_hash=channel_id * 10)
+
+    client = AsyncMock()
+    client.get_input_entity = AsyncMock(side_effect=get_input_entity)
+    return client
+
+
+class TestGetChannelInfo:
+    async def test_merges_full_and_basic_fields(self) -> None:
+        client = AsyncMock(return_value=_full_response(456, "about text"))
+        client.get_entity = AsyncMock(return_value=make_mock_channel())
+        result = await get_channel_info(client, "testchannel")
+        assert result["id"] == 456
+        assert result["about"] == "about text"
+        assert result["participants_count"] == 1000
+
+
+class TestSearchComments:
+    async def test_fetches_linked_entity_missing_from_full_response(self) -> None:
+        full = _full_response(456, "about")
+        full.full_chat.linked_chat_id = 789
+        channel, linked = make_mock_channel(), make_mock_channel(channel_id=789)
+        channel.min = linked.min = False
+        client = AsyncMock(return_value=full)
+        client.session_name = "s1"
+        client.get_entity = AsyncMock(side_effect=[channel, linked])
+        client.iter_messages = MagicMock(side_effect=lambda *a, **kw: AsyncIter([make_mock_message(msg_id=1)]))
+        state = SharedState(MemoryBackend())
+        with patch("src.services.telegram.get_shared_state", return_value=state):
+            await search_comments(client, "testchannel", "q")
+            await search_comments(client, "testchannel", "q")
+        assert client.await_count == 1
+        assert client.get_entity.await_count == 2
+        assert client.iter_messages.call_args.args[0] == InputPeerChannel(789, 789)
+
+    async def test_discussion_group_is_learned_from_comments(self) -> None:
+        channel, group = make_mock_channel(), make_mock_channel(channel_id=789)
+        channel.min = group.min = False
+        group.megagroup = True
+        client = AsyncMock()
+        client.session_name = "s1"
+        client.get_entity = AsyncMock(return_value=channel)
+        client.iter_messages = MagicMock(
+            side_effect=lambda *a, **kw: AsyncIter([make_mock_message(msg_id=1, chat=group)])
+        )
+        state = SharedState(MemoryBackend())
+        with patch("src.services.telegram.get_shared_state", return_value=state):
+            await get_post_comments(client, "testchannel", 100)
+            await search_comments(client, "testchannel", "q")
+        client.assert_not_awaited()
+        assert client.iter_messages.call_args.args[0] == InputPeerChannel(789, 789)
+
+    async def test_missing_discussion_group_is_cached(self) -> None:
+        channel = make_mock_channel()
+        channel.min = False
+        client = AsyncMock(return_value=_full_response(456, "about"))
+        client.session_name = "s1"
+        client.get_entity = AsyncMock(return_value=channel)
+        state = SharedState(MemoryBackend())
+        with patch("src.services.telegram.get_shared_state", return_value=state):
+            for _ in range(2):
+                with pytest.raises(ValueError, match="no linked discussion group"):
+                    await search_comments(client, "testchannel", "q")
+        assert client.await_count == 1
+
+
+class TestIsChannelMember:
+    @pytest.mark.parametrize(("left", "member"), [(False, True), (True, False)])
+    async def test_reads_left_flag(self, left: bool, member: bool) -> None:
+        client = _info_client()
+        client.return_value = MagicMock(chats=[MagicMock(left=left)])
+        assert await is_channel_member(client, "testchannel") is member
+        assert isinstance(client.await_args.args[0], GetChannelsRequest)
+
+
+class TestGetChannelsInfo:
+    async def test_basic_uses_single_get_channels_request(self) -> None:
+        client = _info_client()
+        response = MagicMock()
+        response.chats = [make_mock_channel(channel_id=1, title="One"), make_mock_channel(channel_id=2, title="Two")]
+        client.return_value = response
+
+        results = await get_channels_info(client, ["1", "2", "missing"])
+        client.assert_awaited_once()
+        request = client.await_args.args[0]
+        assert request.id == [InputChannel(1, 10), InputChannel(2, 20)]
+        by_channel = {r["channel"]: r for r in results}
+        assert by_channel["1"]["info"]["title"] == "One"
+        assert by_channel["1"]["info"]["about"] is None
+        assert by_channel["missing"]["status_code"] == 404
+
+    async def test_resolves_are_bounded(self) -> None:
+        client = _info_client()
+        resolve = client.get_input_entity.side_effect
+        running = peak = 0
+
+        async def get_input_entity(peer: int | str) -> InputPeerChannel:
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0)
+            running -= 1
+            return await resolve(peer)
+
+        client.get_input_entity.side_effect = get_input_entity
+        client.return_value = MagicMock(chats=[])
+        await get_channels_info(client, [f"channel{i}" for i in range(10)], concurrency=2)
+        assert client.get_input_entity.await_count == 10
+        assert peak == 2
+
+    async def test_full_sends_requests_in_one_call(self) -> None:
+        client = _info_client()
+        client.return_value = [_full_response(1, "first"), _full_response(2, "second")]
+
+        results = await get_channels_info(client, ["1", "2"], full=True)
+        client.assert_awaited_once()
+        requests = client.await_args.args[0]
+        assert [type(r) for r in requests] == [GetFullChannelRequest, GetFullChannelRequest]
+        assert [r["info"]["about"] for r in results] == ["first", "second"]
+
+    async def test_full_partial_failure(self) -> None:
+        requests = [GetFullChannelRequest(InputChannel(1, 10)), GetFullChannelRequest(InputChannel(2, 20))]
+        error = MultiError([None, ChannelPrivateError(request=None)], [_full_response(1, "first"), None], requests)
+        client = _info_client()
+        client.side_effect = error
+
+        results = await get_channels_info(client, ["1", "2"], full=True)
+        assert results[0]["info"]["about"] == "first"
+        assert results[1]["info"] is None
+        assert results[1]["status_code"] == 400
+
+    async def test_flood_wait_propagates(self) -> None:
+        flood = FloodWaitError(request=None, capture=0)
+        flood.seconds = 10
+        requests = [GetFullChannelRequest(InputChannel(1, 10)), GetFullChannelRequest(InputChannel(2, 20))]
+        client = _info_client()
+        client.side_effect = MultiError([None, flood], [_full_response(1, "first"), None], requests)
+
+        with pytest.raises(FloodWaitError):
+            await get_channels_info(client, ["1", "2"], full=True)
+
+
+def _threads_client(posts: list[MagicMock | None], threads: dict[int, list[MagicMock]]) -> AsyncMock:
+    def iter_messages(entity: object, reply_to: int | None = None, **kwargs: object) -> AsyncIter:
+        return AsyncIter(threads[reply_to] if reply_to is not None else posts)
+
+    client = AsyncMock()
+    client.get_entity = AsyncMock(return_value=MagicMock())
+    client.get_messages = AsyncMock(return_value=posts)
+    client.iter_messages = MagicMock(side_effect=iter_messages)
+    return client
+
+
+class TestGetPostsComments:
+    async def test_skips_posts_without_replies(self) -> None:
+        posts = [make_mock_message(msg_id=1, replies_count=2), make_mock_message(msg_id=2, replies_count=0), None]
+        client = _threads_client(posts, {1: [make_mock_message(msg_id=11), make_mock_message(msg_id=12)]})
+
+        result = await get_posts_comments(client, "testchannel", [1, 2, 3], limit=10)
+        client.get_entity.assert_awaited_once()
+        assert client.iter_messages.call_count == 1
+        assert [m["id"] for m in result[1]] == [11, 12]
+        assert result[2] == []
+        assert result[3] == []
+
+
+class TestGetCommentTrees:
+    async def test_nests_replies(self) -> None:
+        posts = [make_mock_message(msg_id=5, replies_count=3), make_mock_message(msg_id=4, replies_count=None)]
+        thread = [
+            make_mock_message(msg_id=102, reply_to_msg_id=101),
+            make_mock_message(msg_id=101, reply_to_msg_id=50),
+            make_mock_message(msg_id=103, reply_to_msg_id=50),
+        ]
+        client = _threads_client(posts, {5: thread})
+
+        result = await get_comment_trees(client, "testchannel", limit=2)
+        assert [p["post"]["id"] for p in result] == [5, 4]
+        roots = result[0]["comments"]
+        assert [c["id"] for c in roots] == [101, 103]
+        assert [c["id"] for c in roots[0]["replies"]] == [102]
+        assert result[1]["comments"] == []